@@ -0,0 +1,212 @@
+"""本地假 SeaTable 服务：实现 seatable_api 用到的接口子集，并统计请求次数"""
+import json
+import re
+import threading
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_WHERE_EQ = re.compile(r"`([^`]+)`\s*=\s*'((?:[^']|'')*)'")
+_WHERE_IN = re.compile(r"`([^`]+)`\s+IN\s*\(([^)]*)\)", re.IGNORECASE)
+_LIMIT = re.compile(r"LIMIT\s+(\d+)(?:\s+OFFSET\s+(\d+))?", re.IGNORECASE)
+_SELECT = re.compile(r"SELECT\s+(.*?)\s+FROM", re.IGNORECASE | re.DOTALL)
+
+
+class FakeSeaTable:
+    """单 base、单表的内存实现；rows 以 _id 为键"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables: dict[str, dict] = {}   # name → {"_id", "columns", "rows"}
+        self.requests: Counter = Counter()  # "METHOD /path" → 次数
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self) -> "FakeSeaTable":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    # ---- 表结构 ----
+
+    def _metadata(self) -> dict:
+        return {"tables": [
+            {"_id": t["_id"], "name": name, "columns": list(t["columns"].values())}
+            for name, t in self.tables.items()
+        ]}
+
+    def _add_table(self, name: str):
+        self.tables.setdefault(name, {
+            "_id": uuid.uuid4().hex[:4],
+            "columns": {"Name": {"key": "0000", "name": "Name", "type": "text", "data": None}},
+            "rows": {},
+        })
+
+    def _add_column(self, table: str, name: str, col_type: str, data: dict | None):
+        cols = self.tables[table]["columns"]
+        if col_type == "link":
+            data = dict(data or {}, link_id=uuid.uuid4().hex[:4])
+        cols[name] = {"key": uuid.uuid4().hex[:4], "name": name, "type": col_type, "data": data}
+
+    # ---- SQL ----
+
+    def _query(self, sql: str) -> dict:
+        m = re.search(r"FROM\s+`([^`]+)`", sql)
+        table = self.tables[m.group(1)]
+        where = sql.split("WHERE", 1)[1] if "WHERE" in sql else ""
+        where = _LIMIT.split(where)[0]
+        conds = [(c, v.replace("''", "'")) for c, v in _WHERE_EQ.findall(where)]
+        in_conds = [
+            (c, {v.strip().strip("'").replace("''", "'") for v in vals.split(",")})
+            for c, vals in _WHERE_IN.findall(where)
+        ]
+        rows = [
+            r for r in table["rows"].values()
+            if all(str(r.get(c, "")) == v for c, v in conds)
+            and all(str(r.get(c, "")) in vs for c, vs in in_conds)
+        ]
+        if re.search(r"ORDER\s+BY\s+_id", sql, re.IGNORECASE):
+            rows.sort(key=lambda r: r["_id"])
+        lm = _LIMIT.search(sql)
+        limit, offset = (int(lm.group(1)), int(lm.group(2) or 0)) if lm else (100, 0)
+        rows = rows[offset:offset + limit]
+
+        cols = [c.strip().strip("`") for c in _SELECT.search(sql).group(1).split(",")]
+        metadata = [{"key": c, "name": c, "type": "text", "data": None} for c in cols]
+        results = []
+        for r in rows:
+            out = {}
+            for c in cols:
+                value = r.get(c)
+                if c == "父任务" and value:
+                    value = [{"row_id": rid, "display_value": ""} for rid in value]
+                out[c] = value
+            results.append(out)
+        return {"success": True, "metadata": metadata, "results": results}
+
+    # ---- 行与链接 ----
+
+    def _links(self, method: str, body: dict):
+        table = self.tables[body["table_name"]]["rows"]
+        pairs = []
+        if "other_rows_ids_map" in body:
+            for row_id, others in body["other_rows_ids_map"].items():
+                pairs.extend((row_id, o) for o in others)
+        elif "table_row_id" in body:
+            pairs.append((body["table_row_id"], body["other_table_row_id"]))
+        for row_id, other in pairs:
+            links = table.setdefault(row_id, {}).setdefault("父任务", [])
+            if method == "POST" and other not in links:
+                links.append(other)
+            elif method == "DELETE" and other in links:
+                links.remove(other)
+
+    def _handle(self, method: str, path: str, body: dict):
+        if path.startswith("/api/v2.1/dtable/app-access-token"):
+            return {
+                "dtable_server": self.url + "/dtable-server/",
+                "dtable_db": self.url + "/dtable-db/",
+                "access_token": "fake-jwt",
+                "dtable_uuid": "fake-uuid",
+                "dtable_name": "bench",
+                "workspace_id": 1,
+                "use_api_gateway": False,
+            }
+        if "/query/" in path:
+            return self._query(body["sql"])
+        endpoint = path.rstrip("/").rsplit("/", 1)[-1]
+        if endpoint == "metadata":
+            return {"metadata": self._metadata()}
+        if endpoint == "tables" and method == "POST":
+            self._add_table(body["table_name"])
+            return {}
+        if endpoint == "columns" and method == "POST":
+            self._add_column(body["table_name"], body["column_name"], body["column_type"], body.get("column_data"))
+            return {}
+        if endpoint == "columns" and method == "PUT":
+            cols = self.tables[body["table_name"]]["columns"]
+            for name, col in list(cols.items()):
+                if col["key"] == body["column"]:
+                    cols[body["new_column_name"]] = dict(cols.pop(name), name=body["new_column_name"])
+            return {}
+        if endpoint == "column-options":
+            col = self.tables[body["table_name"]]["columns"][body["column"]]
+            data = col["data"] or {}
+            data.setdefault("options", []).extend(
+                dict(o, id=uuid.uuid4().hex[:6]) for o in body["options"]
+            )
+            col["data"] = data
+            return {}
+        rows = self.tables.get(body.get("table_name", ""), {}).get("rows")
+        if endpoint == "batch-append-rows":
+            ids = []
+            for r in body["rows"]:
+                rid = uuid.uuid4().hex[:22]
+                rows[rid] = dict(r, _id=rid)
+                ids.append({"_id": rid})
+            return {"inserted_row_count": len(ids), "row_ids": ids}
+        if endpoint == "rows" and method == "POST":
+            rid = uuid.uuid4().hex[:22]
+            rows[rid] = dict(body["row"], _id=rid)
+            return {"_id": rid}
+        if endpoint == "rows" and method == "PUT":
+            rows.get(body["row_id"], {}).update(body["row"])
+            return {"success": True}
+        if endpoint == "batch-update-rows":
+            for u in body["updates"]:
+                if u["row_id"] in rows:
+                    rows[u["row_id"]].update(u["row"])
+            return {"success": True}
+        if endpoint == "batch-delete-rows":
+            for rid in body["row_ids"]:
+                rows.pop(rid, None)
+            return {"success": True}
+        if endpoint == "links":
+            self._links(method, body)
+            return {"success": True}
+        if endpoint == "batch-update-links":
+            for row_id in body["row_id_list"]:
+                rows.setdefault(row_id, {})["父任务"] = list(body["other_rows_ids_map"].get(row_id, []))
+            return {"success": True}
+        return None
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+                path = self.path.split("?", 1)[0]
+                if fake.latency:
+                    threading.Event().wait(fake.latency)
+                with fake.lock:
+                    fake.requests[f"{self.command} {path}"] += 1
+                    try:
+                        result = fake._handle(self.command, path, body)
+                    except Exception as e:
+                        result, status = {"error_msg": repr(e)}, 400
+                    else:
+                        status = 404 if result is None else 200
+                data = json.dumps(result or {}, ensure_ascii=False).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,145 @@
+"""中继模式对比：N 台机器各自直连 SeaTable vs. 经聚合器统一写入。
+
+全部在本机运行：假 SeaTable 服务 + 1 个聚合器 + N 个 agent（各自独立的 TaskWriter/outbox），
+每台机器提交 --cycles 轮合成任务，统计两种方式的 HTTP 请求数与耗时，并校验最终表内容一致。
+
+用法：
+    uv run python benchmarks/relay.py --agents 8 --tasks 200 --cycles 3
+"""
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+sys.path.insert(0, str(HERE.parent / "src"))
+
+from fake_seatable import FakeSeaTable  # noqa: E402
+
+from seatable_monitor.models import TaskInfo  # noqa: E402
+from seatable_monitor.outbox import Outbox  # noqa: E402
+from seatable_monitor.relay import RelayClient, RelayServer  # noqa: E402
+from seatable_monitor.row_cache import RowCache  # noqa: E402
+from seatable_monitor.seatable_client import SeaTableClient  # noqa: E402
+from seatable_monitor.transport import SeaTableTransport  # noqa: E402
+from seatable_monitor.writer import TaskWriter  # noqa: E402
+
+TABLE = "任务监控"
+
+
+def _tasks(machine: str, n: int, cycle: int) -> list[TaskInfo]:
+    # 每轮约 1/10 的任务状态变化
+    return [
+        TaskInfo(
+            name=f"task {i}", status="已完成" if i % 10 < cycle else "进行中", source="claude-code",
+            session_id=f"sess{i // 20}", latest_output=f"step {cycle if i % 10 < cycle else 0}",
+            parent_name=None, machine=machine,
+        )
+        for i in range(n)
+    ]
+
+
+def _client(fake: FakeSeaTable, cache: Path) -> SeaTableClient:
+    client = SeaTableClient(
+        fake.url, "bench", TABLE, row_cache=RowCache(cache),
+        transport=SeaTableTransport(rate_per_minute=1e9, burst=1000),
+    )
+    client.init()
+    return client
+
+
+def _drain(writers: list[TaskWriter], timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while any(w.qsize() for w in writers) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def _table_snapshot(fake: FakeSeaTable) -> set:
+    rows = fake.tables[TABLE]["rows"].values()
+    return {(r.get("任务名"), r.get("会话ID"), r.get("机器"), r.get("状态"), r.get("最新输出")) for r in rows}
+
+
+def run_direct(args, workdir: Path) -> dict:
+    fake = FakeSeaTable().start()
+    try:
+        start = time.perf_counter()
+        writers = []
+        for i in range(args.agents):
+            w = TaskWriter(_client(fake, workdir / f"direct-{i}.json"), Outbox(None), flush_interval=0)
+            w.start()
+            writers.append(w)
+        for cycle in range(args.cycles):
+            for i, w in enumerate(writers):
+                w.submit(_tasks(f"node{i}", args.tasks, cycle))
+            _drain(writers)
+        elapsed = time.perf_counter() - start
+        for w in writers:
+            w.stop()
+        return {"wall_s": round(elapsed, 3), "http_calls": fake.total_requests(),
+                "auth_calls": sum(v for k, v in fake.requests.items() if "app-access-token" in k),
+                "_table": _table_snapshot(fake)}
+    finally:
+        fake.stop()
+
+
+def run_relay(args, workdir: Path) -> dict:
+    fake = FakeSeaTable().start()
+    try:
+        start = time.perf_counter()
+        aggregator = TaskWriter(_client(fake, workdir / "aggregator.json"), Outbox(None), flush_interval=0.2)
+        aggregator.start()
+        server = RelayServer(args.listen or f"unix://{workdir / 'relay.sock'}", aggregator, "secret").start()
+        if server.listen.startswith("unix://"):
+            url = server.listen
+        else:
+            url = "tcp://%s:%d" % server.address
+        agents = []
+        for i in range(args.agents):
+            w = TaskWriter(RelayClient(url, "secret", f"node{i}"), Outbox(None), flush_interval=0)
+            w.start()
+            agents.append(w)
+        for cycle in range(args.cycles):
+            for i, w in enumerate(agents):
+                w.submit(_tasks(f"node{i}", args.tasks, cycle))
+            _drain(agents)
+            _drain([aggregator])
+        elapsed = time.perf_counter() - start
+        for w in agents:
+            w.stop()
+        server.stop()
+        aggregator.stop()
+        return {"wall_s": round(elapsed, 3), "http_calls": fake.total_requests(),
+                "auth_calls": sum(v for k, v in fake.requests.items() if "app-access-token" in k),
+                "_table": _table_snapshot(fake)}
+    finally:
+        fake.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=200, help="每台机器的任务数")
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--listen", help="聚合器监听地址，默认临时目录下的 Unix socket；如 tcp://127.0.0.1:0")
+    args = parser.parse_args()
+    logging.basicConfig(stream=sys.stderr, level=logging.WARNING, force=True)
+
+    with tempfile.TemporaryDirectory(prefix="seatable-monitor-relay-") as tmp:
+        workdir = Path(tmp)
+        direct = run_direct(args, workdir)
+        relay = run_relay(args, workdir)
+    same = direct.pop("_table") == relay.pop("_table")
+    print(json.dumps({
+        "agents": args.agents, "tasks": args.tasks, "cycles": args.cycles,
+        "direct": direct, "relay": relay, "tables_match": same,
+    }, indent=2))
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
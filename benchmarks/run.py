@@ -0,0 +1,218 @@
+"""seatable-monitor 基准测试。
+
+在临时目录生成合成 ~/.claude 目录树、假 tmux 与假 SeaTable 服务，分别测量
+collect_todos / collect_tasks / collect_sessions（含全量统计）/ collect_by_prefixes 以及完整 _run_once
+的冷启动（首轮）与稳态（次轮）开销，结果以 JSON 输出，便于在提交之间对比。
+
+用法：
+    uv run python benchmarks/run.py --scale small --output bench.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE))
+sys.path.insert(0, str(HERE.parent / "src"))
+
+from fake_seatable import FakeSeaTable  # noqa: E402
+from synth import SCALES, generate  # noqa: E402
+
+from seatable_monitor import main as daemon  # noqa: E402
+from seatable_monitor.collectors.claude import (  # noqa: E402
+    SessionTailer, collect_sessions, collect_tasks, collect_todos,
+)
+from seatable_monitor.collectors.session_stats import SessionAnalytics  # noqa: E402
+from seatable_monitor.collectors.tmux import PaneTracker, collect_by_prefixes  # noqa: E402
+from seatable_monitor.history import HistoryStore  # noqa: E402
+from seatable_monitor.outbox import Outbox  # noqa: E402
+from seatable_monitor.row_cache import RowCache  # noqa: E402
+from seatable_monitor.schema_cache import SchemaCache  # noqa: E402
+from seatable_monitor.seatable_client import SeaTableClient  # noqa: E402
+from seatable_monitor.transport import SeaTableTransport  # noqa: E402
+from seatable_monitor.writer import TaskWriter  # noqa: E402
+
+MACHINE = "bench-host"
+
+
+def _proc_io() -> dict[str, int]:
+    """/proc/self/io：rchar=读取字节数（含页缓存），syscr=read 类系统调用次数"""
+    try:
+        with open("/proc/self/io") as f:
+            return {k: int(v) for k, v in (line.split(":") for line in f)}
+    except OSError:
+        return {}
+
+
+def _peak_rss_kb() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def measure(fn, fake: FakeSeaTable | None = None) -> dict:
+    io_before = _proc_io()
+    http_before = fake.total_requests() if fake else 0
+    start = time.perf_counter()
+    result = fn()
+    wall = time.perf_counter() - start
+    io_after = _proc_io()
+    out = {
+        "wall_s": round(wall, 4),
+        "peak_rss_kb": _peak_rss_kb(),
+        "items": len(result) if hasattr(result, "__len__") else None,
+    }
+    if io_before:
+        out["bytes_read"] = io_after["rchar"] - io_before["rchar"]
+        out["read_syscalls"] = io_after["syscr"] - io_before["syscr"]
+    if fake:
+        out["http_calls"] = fake.total_requests() - http_before
+    return out
+
+
+def _install_stub_tmux(workdir: Path, sessions: int) -> Path:
+    bindir = workdir / "bin"
+    bindir.mkdir()
+    script = bindir / "tmux"
+    script.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{HERE / "stub_tmux.py"}" "$@"\n')
+    script.chmod(0o755)
+    os.environ["PATH"] = f"{bindir}{os.pathsep}{os.environ['PATH']}"
+    os.environ["STUB_TMUX_SESSIONS"] = str(sessions)
+    return bindir
+
+
+def _wait_drained(writer: TaskWriter, timeout: float = 600):
+    deadline = time.monotonic() + timeout
+    while writer.qsize() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def run(scale_name: str, workdir: Path) -> dict:
+    scale = SCALES[scale_name]
+    t0 = time.perf_counter()
+    dirs = generate(workdir / "claude", scale)
+    gen_s = time.perf_counter() - t0
+    _install_stub_tmux(workdir, scale.tmux_sessions)
+    lookback = 5
+
+    results: dict[str, dict] = {}
+    results["collect_todos"] = measure(lambda: collect_todos(str(dirs["todos"]), MACHINE, lookback))
+    results["collect_tasks"] = measure(lambda: collect_tasks(str(dirs["tasks"]), MACHINE, lookback))
+    tailer = SessionTailer()
+    for phase in ("cold", "warm"):
+        results[f"collect_sessions_{phase}"] = measure(
+            lambda: collect_sessions(str(dirs["projects"]), MACHINE, lookback, 300, tailer)
+        )
+    results["collect_sessions_parallel_cold"] = measure(
+        lambda: collect_sessions(str(dirs["projects"]), MACHINE, lookback, 300, SessionTailer(), workers=8)
+    )
+    analytics = SessionAnalytics(workdir / "session-stats.json", budget_bytes=1 << 40)
+    for phase in ("cold", "warm"):
+        results[f"collect_sessions_analytics_{phase}"] = measure(
+            lambda: collect_sessions(
+                str(dirs["projects"]), MACHINE, lookback, 300, SessionTailer(), analytics=analytics,
+            )
+        )
+    tracker = PaneTracker()
+    for phase in ("cold", "warm"):
+        results[f"collect_by_prefixes_{phase}"] = measure(
+            lambda: collect_by_prefixes(["train"], MACHINE, tracker=tracker)
+        )
+
+    fake = FakeSeaTable().start()
+    try:
+        config = {
+            "seatable": {"server_url": fake.url, "api_token": "bench", "table_name": "任务监控"},
+            "monitor": {"poll_interval": 30},
+            "tmux": {"session_prefixes": ["train"]},
+            "claude": {
+                "todos_dir": str(dirs["todos"]),
+                "tasks_dir": str(dirs["tasks"]),
+                "projects_dir": str(dirs["projects"]),
+                "lookback_hours": lookback,
+            },
+        }
+        client = SeaTableClient(
+            fake.url, "bench", "任务监控",
+            row_cache=RowCache(workdir / "cache" / "rows.json"),
+            transport=SeaTableTransport(rate_per_minute=1e9, burst=1000),
+            schema_cache=SchemaCache(workdir / "cache" / "schema.json"),
+        )
+        results["client_init"] = measure(lambda: client.init() or [], fake)
+        warm_client = SeaTableClient(
+            fake.url, "bench", "任务监控",
+            row_cache=RowCache(workdir / "cache" / "rows.json"),
+            transport=SeaTableTransport(rate_per_minute=1e9, burst=1000),
+            schema_cache=SchemaCache(workdir / "cache" / "schema.json"),
+        )
+        results["client_init_warm"] = measure(lambda: warm_client.init() or [], fake)
+        writer = TaskWriter(
+            client, Outbox(workdir / "cache" / "outbox.sqlite3"), flush_interval=0,
+            history=HistoryStore(workdir / "cache" / "history.sqlite3"),
+        )
+        writer.start()
+        state = daemon.CollectorState()
+
+        def cycle():
+            daemon._run_once(config, writer, MACHINE, state)
+            _wait_drained(writer)
+            return []
+
+        for phase in ("cold", "warm"):
+            results[f"run_once_{phase}"] = measure(cycle, fake)
+        writer.stop()
+        results["http_requests_by_endpoint"] = dict(fake.requests)
+    finally:
+        fake.stop()
+
+    return {"generate_s": round(gen_s, 2), "results": results}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--output", help="结果 JSON 路径（默认输出到 stdout）")
+    parser.add_argument("--keep", action="store_true", help="保留生成的临时目录")
+    args = parser.parse_args()
+    # seatable_api 在导入时把根 logger 配到了 stdout，改到 stderr，保证 stdout 只有结果 JSON
+    logging.basicConfig(stream=sys.stderr, level=logging.WARNING, force=True)
+
+    workdir = Path(tempfile.mkdtemp(prefix="seatable-monitor-bench-"))
+    try:
+        report = {
+            "commit": _git_commit(),
+            "scale": args.scale,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **run(args.scale, workdir),
+        }
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""假 tmux：模拟 STUB_TMUX_SESSIONS 个 session（每个 STUB_TMUX_PANES 个 pane）。
+
+支持 `list-panes -a -F` 与 `capture-pane -p -t <pane>`，
+#{...} 格式字段按下表替换，未知字段输出空串。
+"""
+import os
+import re
+import sys
+import time
+
+SESSIONS = int(os.environ.get("STUB_TMUX_SESSIONS", "10"))
+PANES = int(os.environ.get("STUB_TMUX_PANES", "2"))
+_FIELD = re.compile(r"#\{([a-z_]+)\}")
+
+
+def _panes():
+    n = 0
+    for s in range(SESSIONS):
+        for p in range(PANES):
+            yield {
+                "session_name": f"train{s:03d}",
+                "window_index": "0",
+                "pane_index": str(p),
+                "window_active": "1",
+                "pane_active": "1" if p == 0 else "0",
+                "pane_id": f"%{n}",
+                # 按分钟变化，模拟持续有输出的 pane
+                "window_activity": str(int(time.time()) // 60),
+                "history_size": "2000",
+                "cursor_x": "0",
+                "cursor_y": "40",
+                "pane_pid": str(os.getppid()),
+            }
+            n += 1
+
+
+def main(argv: list[str]) -> int:
+    if not argv:
+        return 1
+    cmd = argv[0]
+    if cmd == "list-panes":
+        fmt = argv[argv.index("-F") + 1]
+        for pane in _panes():
+            print(_FIELD.sub(lambda m: pane.get(m.group(1), ""), fmt))
+        return 0
+    if cmd == "capture-pane":
+        target = argv[argv.index("-t") + 1]
+        for i in range(40):
+            print(f"[{target}] step {i} loss=0.{i:03d}")
+        pct = int(time.time()) % 100
+        print(f"{pct:3d}%|{'#' * (pct // 10):<10}| {pct * 10}/1000 [00:30<00:36, 15.00it/s]")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
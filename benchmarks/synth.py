@@ -0,0 +1,120 @@
+"""生成规模可调的合成 ~/.claude 目录树（todos / tasks / projects）"""
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass
+class Scale:
+    projects: int           # 项目目录数
+    sessions_per_project: int
+    session_mb: float       # 每个会话 JSONL 的大小
+    todo_files: int         # todos 目录下的文件数（大部分是陈旧的 *-agent-*.json）
+    recent_todo_files: int  # 其中在 lookback 窗口内的文件数
+    todos_per_file: int
+    teams: int              # tasks 团队目录数
+    tasks_per_team: int
+    tmux_sessions: int
+    huge_sessions: int = 0  # 额外的超大会话数（写在前几个项目里）
+    huge_session_mb: float = 0
+
+
+SCALES = {
+    "small": Scale(50, 2, 0.5, 2000, 50, 5, 10, 20, 10),
+    "medium": Scale(500, 3, 2, 20000, 300, 8, 50, 50, 50, 1, 1024),
+    "large": Scale(2000, 4, 1, 50000, 1000, 10, 200, 100, 100, 4, 2048),
+}
+
+
+def _session_line(session_id: str, cwd: str, i: int, big: bool) -> str:
+    kind = random.choice(("progress", "progress", "assistant", "user"))
+    content = []
+    message: dict = {"content": content}
+    if kind == "assistant":
+        content.append({"type": "tool_use", "name": random.choice(("Bash", "Edit", "Read"))})
+        if random.random() < 0.5:
+            content.append({"type": "text", "text": f"step {i} done"})
+        message["usage"] = {
+            "input_tokens": 3, "cache_read_input_tokens": random.randint(1_000, 50_000),
+            "output_tokens": random.randint(10, 2_000),
+        }
+    elif kind == "user" and big:
+        # 模拟大体积 tool_result
+        content.append({"type": "tool_result", "content": "x" * random.randint(2_000, 200_000)})
+    entry = {
+        "type": kind,
+        "sessionId": session_id,
+        "cwd": cwd,
+        "gitBranch": "main",
+        "timestamp": f"2026-01-01T00:00:{i % 60:02d}Z",
+        "data": {"message": message},
+    }
+    return json.dumps(entry) + "\n"
+
+
+def write_session(path: Path, session_id: str, cwd: str, size_bytes: int):
+    """写出约 size_bytes 的会话文件：先生成一段样本再重复，避免 GB 级文件生成过慢"""
+    sample = "".join(_session_line(session_id, cwd, i, big=True) for i in range(200))
+    data = sample.encode()
+    with open(path, "wb") as f:
+        written = 0
+        while written < size_bytes:
+            f.write(data)
+            written += len(data)
+        # 末尾写几行确定的活动，便于检查提取结果
+        f.write(_session_line(session_id, cwd, 0, big=False).encode())
+
+
+def generate(root: Path, scale: Scale, seed: int = 0) -> dict[str, Path]:
+    random.seed(seed)
+    now = time.time()
+    old = now - 30 * 86400
+
+    todos = root / "todos"
+    tasks = root / "tasks"
+    projects = root / "projects"
+    for d in (todos, tasks, projects):
+        d.mkdir(parents=True, exist_ok=True)
+
+    for i in range(scale.todo_files):
+        f = todos / f"sess{i:06d}-agent-{i:06d}.json"
+        items = [
+            {"content": f"todo {i}-{j}", "status": random.choice(("pending", "in_progress", "completed")),
+             "activeForm": f"doing {i}-{j}"}
+            for j in range(scale.todos_per_file)
+        ]
+        f.write_text(json.dumps(items))
+        if i >= scale.recent_todo_files:
+            os.utime(f, (old, old))
+
+    for t in range(scale.teams):
+        team = tasks / f"team-{t:04d}"
+        team.mkdir(exist_ok=True)
+        for k in range(1, scale.tasks_per_team + 1):
+            task = {
+                "id": str(k),
+                "subject": f"task {t}-{k}",
+                "status": random.choice(("pending", "in_progress", "completed")),
+                "description": "x" * 200,
+                "blockedBy": [str(k - 1)] if k > 1 and random.random() < 0.5 else [],
+            }
+            (team / f"{k}.json").write_text(json.dumps(task))
+
+    size = int(scale.session_mb * 1024 * 1024)
+    for p in range(scale.projects):
+        proj = projects / f"-home-bench-work-project{p:05d}"
+        proj.mkdir(exist_ok=True)
+        for s in range(scale.sessions_per_project):
+            sid = f"{p:08d}-0000-0000-0000-{s:012d}"
+            write_session(proj / f"{sid}.jsonl", sid, f"/home/bench/work/project{p:05d}", size)
+
+    huge = int(scale.huge_session_mb * 1024 * 1024)
+    for h in range(scale.huge_sessions):
+        proj = projects / f"-home-bench-work-project{h:05d}"
+        sid = f"{h:08d}-ffff-0000-0000-000000000000"
+        write_session(proj / f"{sid}.jsonl", sid, f"/home/bench/work/project{h:05d}", huge)
+
+    return {"todos": todos, "tasks": tasks, "projects": projects}
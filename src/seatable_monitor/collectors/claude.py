@@ -2,88 +2,162 @@ import json
 import time
 import logging
 import os
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import Callable, Iterator
+from .. import jsonparse
+from ..metrics import METRICS
 from ..models import TaskInfo, STATUS_MAP
+from .scanner import DirScanner
+from .session_stats import SessionAnalytics
 
 logger = logging.getLogger(__name__)
 
 
-def collect_todos(todos_dir: str, machine: str, lookback_hours: float = 5) -> list[TaskInfo]:
-    """从 ~/.claude/todos/*.json 采集 TodoWrite 数据（最近 N 小时）"""
-    results = []
+def _parse_todo_file(f: Path, machine: str) -> list[TaskInfo]:
+    try:
+        data = jsonparse.loads(f.read_bytes())
+    except Exception:
+        return []
+    if not data:
+        return []
+
+    # 文件名格式：{sessionId}-agent-{agentId}.json；同一会话的各行共享一份字符串
+    session_id = sys.intern(f.stem.split("-agent-")[0])
+    return [
+        TaskInfo(
+            name=item.get("content", "未知任务")[:200],
+            status=STATUS_MAP.get(item.get("status", ""), "未知"),
+            source="claude-code",
+            session_id=session_id,
+            latest_output=item.get("activeForm", ""),
+            parent_name=None,
+            machine=machine,
+        )
+        for item in data
+    ]
+
+
+def iter_todos(
+    todos_dir: str, machine: str, lookback_hours: float = 5, changed: set[Path] | None = None,
+    scanner: DirScanner | None = None,
+) -> Iterator[TaskInfo]:
+    """从 ~/.claude/todos/*.json 逐条产出 TodoWrite 数据（最近 N 小时）。
+    changed 不为 None 时只采集其中列出的文件。文件未变时产出的是上次的同一批对象。
+    """
+    if scanner is None:
+        scanner = DirScanner()
     todos_path = Path(todos_dir).expanduser()
-    if not todos_path.exists():
-        return results
+
+    if changed is None:
+        listing = scanner.scan(todos_path)
+        if listing is None:
+            return
+        files = (
+            (todos_path / name, es) for name, es in listing.entries.items()
+            if name.endswith(".json") and not es.is_dir
+        )
+    else:
+        files = ((p, scanner.stat(p)) for p in changed if p.suffix == ".json")
 
     cutoff = time.time() - lookback_hours * 3600
-    for f in todos_path.glob("*.json"):
-        if f.stat().st_mtime < cutoff:
-            continue
-        try:
-            data = json.loads(f.read_text())
-        except Exception:
-            continue
-        if not data:
+    for f, es in files:
+        if es is None or es.mtime < cutoff:
             continue
+        yield from scanner.parse(f, es, lambda p: _parse_todo_file(p, machine))
 
-        # 文件名格式：{sessionId}-agent-{agentId}.json
-        session_id = f.stem.split("-agent-")[0]
-        for item in data:
-            results.append(TaskInfo(
-                name=item.get("content", "未知任务")[:200],
-                status=STATUS_MAP.get(item.get("status", ""), "未知"),
-                source="claude-code",
-                session_id=session_id,
-                latest_output=item.get("activeForm", ""),
-                parent_name=None,
-                machine=machine,
-            ))
-    return results
 
+def collect_todos(*args, **kwargs) -> list[TaskInfo]:
+    return list(iter_todos(*args, **kwargs))
+
+
+def _parse_task_file(tf: Path) -> dict | None:
+    try:
+        return jsonparse.loads(tf.read_bytes())
+    except Exception:
+        return None
 
-def collect_tasks(tasks_dir: str, machine: str, lookback_hours: float = 5) -> list[TaskInfo]:
-    """从 ~/.claude/tasks/*/*.json 采集 TaskCreate/TaskUpdate 数据（最近 N 小时）"""
+
+def _team_tasks(team_dir: Path, all_tasks: dict[str, dict], machine: str) -> list[TaskInfo]:
     results = []
+    session_id = sys.intern(team_dir.name)
+    # 行名：同一团队内标题重复的任务加上任务 id 区分，否则它们会落到同一行
+    subjects = {task_id: task["subject"][:200] for task_id, task in all_tasks.items()}
+    counts = Counter(subjects.values())
+    names = {
+        task_id: subject if counts[subject] == 1 else f"{subject} #{task_id}"
+        for task_id, subject in subjects.items()
+    }
+    for task_id, task in all_tasks.items():
+        # 父任务：取 blockedBy 第一个，按任务 id 解析到父任务的行名
+        parent_name = None
+        blocked_by = task.get("blockedBy", [])
+        if blocked_by and blocked_by[0] in all_tasks:
+            parent_name = names[blocked_by[0]]
+
+        output = task.get("activeForm") or task.get("description", "")
+        results.append(TaskInfo(
+            name=names[task_id],
+            status=STATUS_MAP.get(task.get("status", ""), "未知"),
+            source="claude-code",
+            session_id=session_id,
+            latest_output=output[:500],
+            parent_name=parent_name,
+            machine=machine,
+        ))
+    return results
+
+
+def iter_tasks(
+    tasks_dir: str, machine: str, lookback_hours: float = 5, changed: set[Path] | None = None,
+    scanner: DirScanner | None = None,
+) -> Iterator[TaskInfo]:
+    """从 ~/.claude/tasks/*/*.json 逐条产出 TaskCreate/TaskUpdate 数据（最近 N 小时）。
+    changed 不为 None 时只采集其中列出的团队目录。团队目录未变时产出的是上次的同一批对象。
+    """
+    if scanner is None:
+        scanner = DirScanner()
     tasks_path = Path(tasks_dir).expanduser()
-    if not tasks_path.exists():
-        return results
+
+    if changed is None:
+        listing = scanner.scan(tasks_path)
+        if listing is None:
+            return
+        team_dirs = [tasks_path / name for name, es in listing.entries.items() if es.is_dir]
+    else:
+        team_dirs = list(changed)
 
     cutoff = time.time() - lookback_hours * 3600
-    for team_dir in tasks_path.iterdir():
-        if not team_dir.is_dir():
-            continue
-        if team_dir.stat().st_mtime < cutoff:
+    for team_dir in team_dirs:
+        # watch 模式报告的目录可能是原地改写，强制重扫
+        team = scanner.scan(team_dir, force=changed is not None)
+        if team is None or team.mtime < cutoff:
             continue
 
-        # 加载团队所有任务，建立 id→task 映射
-        all_tasks: dict[str, dict] = {}
-        for tf in team_dir.glob("*.json"):
-            if tf.stem.startswith(".") or not tf.stem.isdigit():
-                continue
-            try:
-                task_data = json.loads(tf.read_text())
-                all_tasks[task_data["id"]] = task_data
-            except Exception:
-                continue
-
-        for task in all_tasks.values():
-            # 父任务：取 blockedBy 第一个
-            parent_name = None
-            blocked_by = task.get("blockedBy", [])
-            if blocked_by and blocked_by[0] in all_tasks:
-                parent_name = all_tasks[blocked_by[0]]["subject"]
-
-            output = task.get("activeForm") or task.get("description", "")
-            results.append(TaskInfo(
-                name=task["subject"][:200],
-                status=STATUS_MAP.get(task.get("status", ""), "未知"),
-                source="claude-code",
-                session_id=team_dir.name,
-                latest_output=output[:500],
-                parent_name=parent_name,
-                machine=machine,
-            ))
-    return results
+        files = sorted(
+            (name, es) for name, es in team.entries.items()
+            if name.endswith(".json") and name[:-5].isdigit()
+        )
+
+        def build() -> list[TaskInfo]:
+            # 加载团队所有任务，建立 id→task 映射
+            all_tasks: dict[str, dict] = {}
+            for name, es in files:
+                task_data = scanner.parse(team_dir / name, es, _parse_task_file)
+                if isinstance(task_data, dict) and "id" in task_data:
+                    all_tasks[task_data["id"]] = task_data
+            return _team_tasks(team_dir, all_tasks, machine)
+
+        # 父任务名依赖同团队的其它文件，按整个团队的文件状态备忘（键为目录路径，不与文件冲突）
+        validator = tuple((name, es.mtime_ns, es.size) for name, es in files)
+        yield from scanner.memo(str(team_dir), validator, build)
+
+
+def collect_tasks(*args, **kwargs) -> list[TaskInfo]:
+    return list(iter_tasks(*args, **kwargs))
 
 
 def _decode_project_name(encoded: str) -> str:
@@ -112,25 +186,10 @@ def _decode_project_name(encoded: str) -> str:
     return encoded
 
 
-def _tail_lines(filepath: Path, n: int = 20) -> list[str]:
-    """高效读取文件最后 n 行（不读全文件）"""
-    try:
-        size = filepath.stat().st_size
-        if size == 0:
-            return []
-        # 读取尾部 chunk（每行 JSONL 平均 ~2KB，读 n*4KB 足够）
-        chunk_size = min(size, n * 4096)
-        with open(filepath, "rb") as f:
-            f.seek(max(0, size - chunk_size))
-            data = f.read().decode("utf-8", errors="replace")
-        lines = data.splitlines()
-        return lines[-n:]
-    except Exception:
-        return []
-
-
-def _extract_session_state(lines: list[str]) -> dict:
-    """从 JSONL 最后几行提取会话状态"""
+def _extract_session_state(lines: list[bytes], prev: dict | None = None) -> dict:
+    """从 JSONL 行提取会话状态；prev 为此前已读部分的状态，新行中缺失的字段沿用 prev。
+    从最新一行往回解析，各字段都拿到后即停止；拿到活动描述后不再解析 data。
+    """
     last_type = "unknown"
     last_tool = ""
     last_text = ""
@@ -142,50 +201,30 @@ def _extract_session_state(lines: list[str]) -> dict:
     for raw_line in reversed(lines):
         if not raw_line.strip():
             continue
-        try:
-            entry = json.loads(raw_line)
-        except Exception:
+        entry = jsonparse.parse_entry(raw_line, need_content=not (last_tool or last_text))
+        if entry is None:
             continue
 
-        entry_type = entry.get("type", "")
         if not session_id:
-            session_id = entry.get("sessionId", "")
+            session_id = entry.session_id
         if not cwd:
-            cwd = entry.get("cwd", "")
+            cwd = entry.cwd
         if not git_branch:
-            git_branch = entry.get("gitBranch", "")
+            git_branch = entry.git_branch
         if not last_ts:
-            last_ts = entry.get("timestamp", "")
+            last_ts = entry.timestamp
 
         if last_type == "unknown":
-            last_type = entry_type
+            last_type = entry.type
 
         # 提取最新活动描述
         if not last_tool and not last_text:
-            data = entry.get("data", {})
-            if isinstance(data, str):
-                try:
-                    data = json.loads(data)
-                except Exception:
-                    try:
-                        data = eval(data)
-                    except Exception:
-                        data = {}
-
-            if isinstance(data, dict):
-                msg = data.get("message", {})
-                if isinstance(msg, dict):
-                    content = msg.get("content", [])
-                    if isinstance(content, list):
-                        for c in reversed(content):
-                            if not isinstance(c, dict):
-                                continue
-                            if c.get("type") == "tool_use" and not last_tool:
-                                last_tool = c.get("name", "")
-                            elif c.get("type") == "text" and not last_text:
-                                last_text = c.get("text", "")[:200]
-
-    return {
+            last_tool, last_text = entry.tool, entry.text
+
+        if (last_tool or last_text) and session_id and cwd and git_branch and last_ts:
+            break
+
+    state = {
         "last_type": last_type,
         "last_tool": last_tool,
         "last_text": last_text,
@@ -194,75 +233,278 @@ def _extract_session_state(lines: list[str]) -> dict:
         "session_id": session_id,
         "last_ts": last_ts,
     }
+    if prev:
+        if state["last_type"] == "unknown":
+            state["last_type"] = prev.get("last_type", "unknown")
+        # 最新活动描述成对沿用，避免新 tool 配上旧 text
+        if not last_tool and not last_text:
+            state["last_tool"] = prev.get("last_tool", "")
+            state["last_text"] = prev.get("last_text", "")
+        for k in ("cwd", "git_branch", "session_id", "last_ts"):
+            if not state[k]:
+                state[k] = prev.get(k, "")
+    return state
+
+
+class SessionTailer:
+    """增量读取会话 JSONL：按文件记录 (inode, 已读偏移, 已提取状态)。
+    文件未增长时只花一次 stat，不读文件；增长时只读新增字节。
+    可被多个扫描线程同时调用。
+    """
+
+    INITIAL_TAIL_BYTES = 256 * 1024   # 首次见到文件时从尾部读多少
+    MAX_READ_BYTES = 8 * 1024 * 1024  # 单轮新增过多时只读最后这一段
+
+    def __init__(self, state_path: Path | None = None):
+        self.state_path = state_path
+        self._files: dict[str, dict] = {}
+        self._seen: set[str] = set()
+        self._dirty = False
+        self._lock = threading.Lock()
+        # 并行扫描用：各项目上次的结果，以及超时后仍在后台运行的扫描
+        self.last_results: dict[str, list[TaskInfo]] = {}
+        self.stalled: dict[str, Future] = {}
+        self.complete = True  # 最近一轮 iter_sessions 是否扫完了所有目录
+        self._load()
+
+    def _load(self):
+        if not self.state_path:
+            return
+        try:
+            self._files = json.loads(self.state_path.read_text())
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logger.warning("会话偏移缓存损坏，已忽略：%s", self.state_path)
+
+    def save(self, prune: bool = True):
+        """保存偏移；prune 时清理本轮未出现的文件（仅在全量扫描后）"""
+        with self._lock:
+            stale = set(self._files) - self._seen if prune else set()
+            for key in stale:
+                del self._files[key]
+            self._seen = set()
+            if not self.state_path or not (self._dirty or stale):
+                return
+            data = json.dumps(self._files, ensure_ascii=False)
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(data)
+        os.replace(tmp, self.state_path)
+        self._dirty = False
+
+    def read_state(self, filepath: Path, st: os.stat_result) -> dict | None:
+        """返回文件当前会话状态；文件为空或无法读取时返回 None"""
+        key = str(filepath)
+        with self._lock:
+            self._seen.add(key)
+            entry = self._files.get(key)
+        size = st.st_size
+        if entry and entry["inode"] == st.st_ino and entry["size"] == size:
+            return entry["state"]
+        if size == 0:
+            return None
 
+        if entry and entry["inode"] == st.st_ino and entry["offset"] <= size:
+            start, prev, aligned = entry["offset"], entry["state"], True
+        else:
+            # 新文件、被替换或被截断：从尾部窗口重新开始
+            start, prev = max(0, size - self.INITIAL_TAIL_BYTES), None
+            aligned = start == 0
+        if size - start > self.MAX_READ_BYTES:
+            start, aligned = size - self.MAX_READ_BYTES, False
 
-def collect_sessions(
-    projects_dir: str, machine: str, lookback_hours: float = 5, idle_timeout: int = 300
+        try:
+            with open(filepath, "rb") as f:
+                f.seek(start)
+                data = f.read(size - start)
+        except OSError:
+            return entry["state"] if entry else None
+
+        # 只处理完整的行，末尾未写完的半行留到下一轮
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            if entry:
+                with self._lock:
+                    entry["size"] = size
+            return entry["state"] if entry else None
+        lines = data[:end].splitlines()
+        if not aligned and lines:
+            lines = lines[1:]  # 窗口起点落在行中间，丢弃残行
+
+        state = _extract_session_state(lines, prev)
+        with self._lock:
+            self._files[key] = {
+                "inode": st.st_ino, "offset": start + end, "size": size, "state": state,
+            }
+            self._dirty = True
+        return state
+
+
+def _scan_project(
+    proj_dir: Path, machine: str, cutoff: float, idle_timeout: int, tailer: SessionTailer,
+    analytics: SessionAnalytics | None = None,
 ) -> list[TaskInfo]:
-    """从 ~/.claude/projects/*/*.jsonl 采集活跃的 Claude Code 会话"""
+    """扫描一个项目目录下的会话文件，每个活跃会话返回一行；给定 analytics 时附带全量统计列"""
     results = []
-    proj_path = Path(projects_dir).expanduser()
-    if not proj_path.exists():
+    project_name = _decode_project_name(proj_dir.name)
+    try:
+        files = sorted(proj_dir.glob("*.jsonl"))
+    except OSError:
         return results
 
-    cutoff = time.time() - lookback_hours * 3600
+    for jsonl_file in files:
+        try:
+            st = jsonl_file.stat()
+        except OSError:
+            continue
+        mtime = st.st_mtime
+        if mtime < cutoff:
+            continue
 
-    for proj_dir in proj_path.iterdir():
-        if not proj_dir.is_dir():
+        state = tailer.read_state(jsonl_file, st)
+        if not state:
             continue
 
-        project_name = _decode_project_name(proj_dir.name)
-
-        for jsonl_file in proj_dir.glob("*.jsonl"):
-            try:
-                mtime = jsonl_file.stat().st_mtime
-            except OSError:
-                continue
-            if mtime < cutoff:
-                continue
-
-            lines = _tail_lines(jsonl_file, 30)
-            if not lines:
-                continue
-
-            state = _extract_session_state(lines)
-            session_id = state["session_id"] or jsonl_file.stem
-
-            # 用 cwd 作为项目名（比目录名解码更准确）
-            display_name = project_name
-            if state["cwd"]:
-                # 取 cwd 最后两级目录作为简称
-                cwd_parts = Path(state["cwd"]).parts
-                display_name = "/".join(cwd_parts[-2:]) if len(cwd_parts) >= 2 else cwd_parts[-1]
-
-            # 判断状态
-            age_seconds = time.time() - mtime
-            if age_seconds > idle_timeout:
-                status = "已完成"  # 5 分钟无更新视为结束
+        session_id = state["session_id"] or jsonl_file.stem
+
+        # 用 cwd 作为项目名（比目录名解码更准确）
+        display_name = project_name
+        if state["cwd"]:
+            # 取 cwd 最后两级目录作为简称
+            cwd_parts = Path(state["cwd"]).parts
+            display_name = "/".join(cwd_parts[-2:]) if len(cwd_parts) >= 2 else cwd_parts[-1]
+
+        # 判断状态
+        age_seconds = time.time() - mtime
+        if age_seconds > idle_timeout:
+            status = "已完成"  # 5 分钟无更新视为结束
+        else:
+            status = "进行中"
+
+        # 构造最新输出描述
+        output_parts = []
+        if state["git_branch"]:
+            output_parts.append(f"[{state['git_branch']}]")
+        if state["last_tool"]:
+            output_parts.append(f"→ {state['last_tool']}")
+        if state["last_text"]:
+            output_parts.append(state["last_text"][:150])
+        elif state["last_type"] == "progress":
+            output_parts.append("(执行中...)")
+
+        latest_output = " ".join(output_parts) or "(无输出)"
+
+        extra = ()
+        if analytics is not None:
+            stats = analytics.update(jsonl_file, st)
+            if stats is not None:
+                extra = stats.columns()
+
+        results.append(TaskInfo(
+            name=sys.intern(f"session:{display_name}"),
+            status=status,
+            source="claude-session",
+            session_id=sys.intern(session_id[:36]),
+            latest_output=latest_output[:500],
+            parent_name=None,
+            machine=machine,
+            extra=extra,
+        ))
+    return results
+
+
+def _scan_parallel(
+    proj_dirs: list[Path], workers: int, deadline: float, tailer: SessionTailer,
+    scan: Callable[[Path], list[TaskInfo]],
+) -> tuple[dict[str, list[TaskInfo]], bool]:
+    """用线程池扫描项目目录，最多等待 deadline 秒，返回 (各目录结果, 是否完整)。
+    超时或上轮仍卡住的目录沿用上次结果；没有上次结果可用时视为不完整。
+    """
+    per_project: dict[str, list[TaskInfo]] = {}
+    complete = True
+    pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(proj_dirs))), thread_name_prefix="claude-scan")
+    futures: dict[Future, str] = {}
+    for proj_dir in proj_dirs:
+        key = str(proj_dir)
+        stuck = tailer.stalled.get(key)
+        if stuck is not None and not stuck.done():
+            continue
+        tailer.stalled.pop(key, None)
+        futures[pool.submit(scan, proj_dir)] = key
+    done, pending = wait(futures, timeout=deadline)
+    # 卡住的线程无法中断，不等它们；未开始的直接取消
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    for fut in done:
+        key = futures[fut]
+        try:
+            per_project[key] = tailer.last_results[key] = fut.result()
+        except Exception:
+            logger.exception("扫描项目目录失败：%s", key)
+            complete = False
+    for fut in pending:
+        tailer.stalled[futures[fut]] = fut
+    if pending or len(futures) < len(proj_dirs):
+        METRICS.inc("scan_timeouts_total")
+        logger.warning("有 %d 个项目目录在 %.0f 秒内未扫描完，沿用上次结果", len(tailer.stalled), deadline)
+    for proj_dir in proj_dirs:
+        key = str(proj_dir)
+        if key not in per_project:
+            if key in tailer.last_results:
+                per_project[key] = tailer.last_results[key]
             else:
-                status = "进行中"
-
-            # 构造最新输出描述
-            output_parts = []
-            if state["git_branch"]:
-                output_parts.append(f"[{state['git_branch']}]")
-            if state["last_tool"]:
-                output_parts.append(f"→ {state['last_tool']}")
-            if state["last_text"]:
-                output_parts.append(state["last_text"][:150])
-            elif state["last_type"] == "progress":
-                output_parts.append("(执行中...)")
-
-            latest_output = " ".join(output_parts) or "(无输出)"
-
-            results.append(TaskInfo(
-                name=f"session:{display_name}",
-                status=status,
-                source="claude-session",
-                session_id=session_id[:36],
-                latest_output=latest_output[:500],
-                parent_name=None,
-                machine=machine,
-            ))
+                complete = False
+    return per_project, complete
+
+
+def iter_sessions(
+    projects_dir: str, machine: str, lookback_hours: float = 5, idle_timeout: int = 300,
+    tailer: SessionTailer | None = None, changed: set[Path] | None = None,
+    workers: int = 1, deadline: float = 20, analytics: SessionAnalytics | None = None,
+) -> Iterator[TaskInfo]:
+    """从 ~/.claude/projects/*/*.jsonl 逐条产出活跃的 Claude Code 会话。
+    串行扫描时每扫完一个项目目录就产出其中的行；偏移与统计检查点在全部产出后保存，
+    tailer.complete 也要在迭代结束后才有效。
+    changed 不为 None 时只采集其中列出的项目目录。
+    workers > 1 时用线程池并行扫描各项目目录，整轮最多等 deadline 秒；
+    有目录超时且没有上次结果可沿用时 tailer.complete 为 False，调用方不应据此对账。
+    结果按项目目录名、会话文件名排序，与扫描顺序无关。
+    给定 analytics 时每行附带工具调用数、token 用量、会话时长等全量统计列。
+    """
+    if tailer is None:
+        tailer = SessionTailer()
+    tailer.complete = True
+    proj_path = Path(projects_dir).expanduser()
+    if not proj_path.exists():
+        return
 
-    return results
+    cutoff = time.time() - lookback_hours * 3600
+    # 不在这里逐个 is_dir：慢挂载上这一步也会卡住，交给扫描线程（对非目录 glob 结果为空）
+    proj_dirs = sorted(proj_path.iterdir() if changed is None else changed)
+
+    def scan(proj_dir: Path) -> list[TaskInfo]:
+        return _scan_project(proj_dir, machine, cutoff, idle_timeout, tailer, analytics)
+
+    if workers > 1 and len(proj_dirs) > 1:
+        per_project, tailer.complete = _scan_parallel(proj_dirs, workers, deadline, tailer, scan)
+        for p in proj_dirs:
+            yield from per_project.get(str(p), ())
+    else:
+        for p in proj_dirs:
+            yield from scan(p)
+
+    if changed is None:
+        live = {str(p) for p in proj_dirs}
+        for key in tailer.last_results.keys() - live:
+            del tailer.last_results[key]
+        for key in [k for k, f in tailer.stalled.items() if f.done()]:
+            del tailer.stalled[key]
+    # 有扫描仍在进行时不清理偏移缓存，以免删掉它们刚读到的文件
+    tailer.save(prune=changed is None and not tailer.stalled)
+    if analytics is not None:
+        analytics.save(prune=changed is None and not tailer.stalled)
+
+
+def collect_sessions(*args, **kwargs) -> list[TaskInfo]:
+    return list(iter_sessions(*args, **kwargs))
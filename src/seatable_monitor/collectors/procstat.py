@@ -0,0 +1,213 @@
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import NamedTuple
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _default_max_open() -> int:
+    """缓存的描述符上限：软 RLIMIT_NOFILE 的 1/8，最多 256，给 SQLite、HTTP、日志、inotify 留足余量"""
+    try:
+        import resource
+        soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+    except (ImportError, ValueError, OSError):
+        return 128
+    if soft == resource.RLIM_INFINITY:
+        return 256
+    return max(16, min(256, soft // 8))
+
+
+class _Stat(NamedTuple):
+    ppid: int
+    ticks: int    # utime + stime + 已回收子进程的 cutime + cstime
+    threads: int
+    rss_pages: int
+
+
+@dataclass(frozen=True)
+class ResourceUsage:
+    """一组进程树的资源占用；cpu_percent / io_kbps 需要两次采样，首次为 None"""
+    cpu_percent: float | None
+    rss_mb: int
+    threads: int
+    io_kbps: float | None
+
+    def columns(self) -> tuple[tuple[str, object], ...]:
+        """作为 TaskInfo.extra 写入的附加列，列定义见 seatable_client.TMUX_RESOURCE_COLUMNS"""
+        return (
+            ("CPU(%)", self.cpu_percent),
+            ("内存(MB)", self.rss_mb),
+            ("线程数", self.threads),
+            ("读写(KB/s)", self.io_kbps),
+        )
+
+
+def _parse_stat(data: bytes) -> _Stat | None:
+    # 第 2 个字段 comm 可能含空格和括号，从最后一个 ")" 之后按空格切分；rest[i] 是第 i+3 个字段
+    rest = data[data.rfind(b")") + 2:].split()
+    try:
+        return _Stat(
+            int(rest[1]), int(rest[11]) + int(rest[12]) + int(rest[13]) + int(rest[14]),
+            int(rest[17]), int(rest[21]),
+        )
+    except (IndexError, ValueError):
+        return None
+
+
+def _parse_io(data: bytes) -> int:
+    """rchar + wchar（含管道、网络与页缓存命中的读写）"""
+    total = 0
+    for line in data.splitlines():
+        if line.startswith((b"rchar:", b"wchar:")):
+            total += int(line.split()[1])
+    return total
+
+
+class _ProcFiles:
+    """缓存 /proc/<pid>/{stat,io} 的文件描述符，每轮 pread 重读，省去反复 open/close。
+    描述符绑定的是进程本身：进程退出后读取报错，不会读到复用同一 pid 的新进程。
+    最多缓存 max_open 个，超出时关闭最久未读的。
+    """
+
+    def __init__(self, proc: str, max_open: int | None = None):
+        self.proc = proc
+        self.max_open = max_open if max_open is not None else _default_max_open()
+        self._fds: OrderedDict[tuple[int, str], int] = OrderedDict()
+
+    def read(self, pid: int, name: str) -> bytes | None:
+        key = (pid, name)
+        fd = self._fds.get(key)
+        try:
+            if fd is None:
+                fd = os.open(f"{self.proc}/{pid}/{name}", os.O_RDONLY | os.O_CLOEXEC)
+                if self.max_open <= 0:
+                    try:
+                        return os.read(fd, 4096) or None
+                    finally:
+                        os.close(fd)
+                while len(self._fds) >= self.max_open:
+                    os.close(self._fds.popitem(last=False)[1])
+                self._fds[key] = fd
+            else:
+                self._fds.move_to_end(key)
+            return os.pread(fd, 4096, 0) or None
+        except OSError:
+            if key in self._fds:
+                os.close(self._fds.pop(key))
+            return None
+
+    def retain(self, pids: set[int]):
+        """关闭不再关注的进程的描述符"""
+        for key in [k for k in self._fds if k[0] not in pids]:
+            os.close(self._fds.pop(key))
+
+    def close(self):
+        self.retain(set())
+
+
+class ProcSampler:
+    """从 /proc 采样进程树（pane_pid 及其全部后代）的 CPU、RSS、线程数与读写速率，不调用 ps。
+
+    pid → 子进程表由一次 /proc 全量扫描建立并缓存，
+    超过 rebuild_interval 秒或树中有进程退出时才重扫，其余轮次只读树内进程的 stat / io；
+    已知进程新建的子进程最迟在下次重扫时计入。
+    CPU% 与读写速率按与上一轮采样的差值计算，状态按 key（行名）保存。
+    """
+
+    def __init__(self, proc: str = "/proc", rebuild_interval: float = 10):
+        self.proc = proc
+        self.rebuild_interval = rebuild_interval
+        self._children: dict[int, list[int]] = {}
+        self._built_at = float("-inf")
+        self._prev: dict[str, tuple[float, int, int]] = {}  # key → (采样时间, CPU ticks, 读写字节)
+        self._files = _ProcFiles(proc)
+
+    def available(self) -> bool:
+        return os.path.isdir(f"{self.proc}/self")
+
+    def _scan(self) -> dict[int, _Stat]:
+        """一次扫描 /proc 重建子进程表，顺带返回全部进程的 stat"""
+        stats: dict[int, _Stat] = {}
+        with os.scandir(self.proc) as it:
+            for entry in it:
+                if entry.name.isdigit():
+                    try:
+                        with open(f"{self.proc}/{entry.name}/stat", "rb") as f:
+                            st = _parse_stat(f.read())
+                    except OSError:
+                        continue
+                    if st is not None:
+                        stats[int(entry.name)] = st
+        children: dict[int, list[int]] = {}
+        for pid, st in stats.items():
+            children.setdefault(st.ppid, []).append(pid)
+        self._children = children
+        self._built_at = time.monotonic()
+        return stats
+
+    def _tree(self, root: int) -> list[int]:
+        pids, stack = [], [root]
+        while stack:
+            pid = stack.pop()
+            pids.append(pid)
+            stack.extend(self._children.get(pid, ()))
+        return pids
+
+    def _trees(self, groups: dict[str, list[int]]) -> dict[str, list[int]]:
+        return {key: [pid for root in roots for pid in self._tree(root)] for key, roots in groups.items()}
+
+    def sample(self, groups: dict[str, list[int]]) -> dict[str, ResourceUsage]:
+        """groups: key → 根进程 pid 列表（如一个 session 的全部 pane_pid），返回各 key 的合计占用"""
+        now = time.monotonic()
+        stats: dict[int, _Stat] = {}
+        if now - self._built_at > self.rebuild_interval:
+            stats = self._scan()
+        trees = self._trees(groups)
+        if not stats:
+            wanted = {pid for pids in trees.values() for pid in pids}
+            for pid in wanted:
+                data = self._files.read(pid, "stat")
+                st = _parse_stat(data) if data else None
+                if st is None:
+                    break
+                stats[pid] = st
+            if len(stats) < len(wanted):
+                # 树中有进程退出（pid 可能已被复用）：重扫一次
+                stats = self._scan()
+                trees = self._trees(groups)
+
+        results = {}
+        for key, pids in trees.items():
+            members = [stats[pid] for pid in pids if pid in stats]
+            if not members:
+                continue
+            ticks = sum(st.ticks for st in members)
+            io = 0
+            for pid in pids:
+                if pid in stats:
+                    data = self._files.read(pid, "io")  # 无权限时为 None
+                    io += _parse_io(data) if data else 0
+            cpu = io_kbps = None
+            prev = self._prev.get(key)
+            if prev and now > prev[0]:
+                elapsed = now - prev[0]
+                # 树中进程退出会让合计值回落，按 0 计
+                cpu = round(max(0, ticks - prev[1]) / _CLK_TCK / elapsed * 100, 1)
+                io_kbps = round(max(0, io - prev[2]) / 1024 / elapsed, 1)
+            self._prev[key] = (now, ticks, io)
+            results[key] = ResourceUsage(
+                cpu_percent=cpu,
+                rss_mb=sum(st.rss_pages for st in members) * _PAGE_SIZE // (1024 * 1024),
+                threads=sum(st.threads for st in members),
+                io_kbps=io_kbps,
+            )
+        for key in self._prev.keys() - groups.keys():
+            del self._prev[key]
+        self._files.retain({pid for pids in trees.values() for pid in pids})
+        return results
+
+    def close(self):
+        self._files.close()
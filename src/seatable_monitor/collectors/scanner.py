@@ -0,0 +1,112 @@
+import os
+import stat
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Hashable, NamedTuple, TypeVar
+
+T = TypeVar("T")
+
+
+class EntryStat(NamedTuple):
+    mtime: float
+    mtime_ns: int
+    size: int
+    is_dir: bool
+
+
+@dataclass
+class Listing:
+    mtime: float                    # 目录自身的 mtime
+    entries: dict[str, EntryStat]   # 文件名 → stat 结果
+    mtime_ns: int = 0
+    scanned_at: float = 0.0         # time.monotonic()
+
+
+def _entry_stat(st: os.stat_result) -> EntryStat:
+    return EntryStat(st.st_mtime, st.st_mtime_ns, st.st_size, stat.S_ISDIR(st.st_mode))
+
+
+class DirScanner:
+    """带缓存的目录扫描 + 按文件的解析结果备忘。
+
+    - 目录 mtime 未变时（没有增删改名）直接复用上次 os.scandir 得到的 stat 结果，
+      每个目录只花一次 stat；每 rescan_interval 秒强制重扫一次，兜住原地改写的文件
+    - parse() 按 (mtime, size) 备忘解析结果，LRU 淘汰，文件未变时不再读文件
+    """
+
+    def __init__(self, memo_size: int = 8192, rescan_interval: float = 300):
+        self.memo_size = memo_size
+        self.rescan_interval = rescan_interval
+        self._dirs: dict[str, Listing] = {}
+        self._memo: OrderedDict[str, tuple[Hashable, object]] = OrderedDict()
+
+    def scan(self, directory: Path, force: bool = False) -> Listing | None:
+        """列出目录项；目录不存在或无法读取时返回 None"""
+        key = str(directory)
+        try:
+            st = os.stat(directory)
+        except OSError:
+            self._drop_dir(key)
+            return None
+        now = time.monotonic()
+        cached = self._dirs.get(key)
+        if cached and not force and cached.mtime_ns == st.st_mtime_ns \
+                and now - cached.scanned_at < self.rescan_interval:
+            return cached
+
+        entries = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        entries[entry.name] = _entry_stat(entry.stat())
+                    except OSError:
+                        continue
+        except OSError:
+            self._drop_dir(key)
+            return None
+        if cached:
+            # 已删除的文件/子目录不再占缓存
+            for name in cached.entries.keys() - entries.keys():
+                child = os.path.join(key, name)
+                self._memo.pop(child, None)
+                self._drop_dir(child)
+        listing = Listing(st.st_mtime, entries, st.st_mtime_ns, now)
+        self._dirs[key] = listing
+        return listing
+
+    def stat(self, path: Path) -> EntryStat | None:
+        """stat 单个文件并同步到所在目录的缓存（watch 模式下处理变化的文件用）"""
+        try:
+            es = _entry_stat(os.stat(path))
+        except OSError:
+            return None
+        listing = self._dirs.get(str(path.parent))
+        if listing:
+            listing.entries[path.name] = es
+        return es
+
+    def parse(self, path: Path, es: EntryStat, fn: Callable[[Path], T]) -> T:
+        """返回 fn(path)；文件 (mtime, size) 与上次相同时直接返回备忘的结果"""
+        return self.memo(str(path), (es.mtime_ns, es.size), lambda: fn(path))
+
+    def memo(self, key: str, validator: Hashable, fn: Callable[[], T]) -> T:
+        """通用备忘：validator 与上次相同时返回上次 fn() 的结果"""
+        hit = self._memo.get(key)
+        if hit and hit[0] == validator:
+            self._memo.move_to_end(key)
+            return hit[1]
+        value = fn()
+        self._memo[key] = (validator, value)
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return value
+
+    def _drop_dir(self, key: str):
+        listing = self._dirs.pop(key, None)
+        if listing:
+            for name in listing.entries:
+                self._memo.pop(os.path.join(key, name), None)
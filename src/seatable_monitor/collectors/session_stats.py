@@ -0,0 +1,200 @@
+import json
+import logging
+import mmap
+import os
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+from .. import jsonparse
+from ..metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+WINDOW_BYTES = 16 * 1024 * 1024  # 每次映射的窗口大小，决定内存占用上限
+
+
+@dataclass
+class SessionStats:
+    """一个会话文件从头累计的统计"""
+    tool_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    messages: int = 0         # user / assistant 行数
+    first_ts: str = ""
+    last_ts: str = ""
+    last_message_id: str = ""  # 上一条计过 token 的消息，同一消息拆成的多行只计一次
+
+    def add(self, f: jsonparse.StatFields):
+        self.tool_calls += f.tool_calls
+        if f.type in ("user", "assistant"):
+            self.messages += 1
+        if f.input_tokens or f.output_tokens:
+            if not f.message_id or f.message_id != self.last_message_id:
+                self.input_tokens += f.input_tokens
+                self.output_tokens += f.output_tokens
+            self.last_message_id = f.message_id
+        if f.timestamp:
+            if not self.first_ts:
+                self.first_ts = f.timestamp
+            self.last_ts = f.timestamp
+
+    def duration(self) -> int:
+        """首末两行时间戳之差（秒）"""
+        try:
+            first = datetime.fromisoformat(self.first_ts.replace("Z", "+00:00"))
+            last = datetime.fromisoformat(self.last_ts.replace("Z", "+00:00"))
+        except ValueError:
+            return 0
+        return max(0, int((last - first).total_seconds()))
+
+    def columns(self) -> tuple[tuple[str, object], ...]:
+        """作为 TaskInfo.extra 写入的附加列，列定义见 seatable_client.SESSION_STATS_COLUMNS"""
+        return (
+            ("工具调用", self.tool_calls),
+            ("输入Token", self.input_tokens),
+            ("输出Token", self.output_tokens),
+            ("会话时长", self.duration()),
+        )
+
+
+def iter_lines(f, start: int, end: int, window: int = WINDOW_BYTES) -> Iterator[tuple[bytes, int]]:
+    """逐行读取文件 [start, end) 区间，产出 (行, 行尾之后的偏移)。
+    按 window 大小分段 mmap，用完即解除映射，内存占用与文件大小无关；
+    末尾没有换行符的半行不产出，留给下次。
+    """
+    gran = mmap.ALLOCATIONGRANULARITY
+    carry = b""  # 跨窗口的半行
+    pos = start
+    while pos < end:
+        base = pos - pos % gran
+        length = min(end, base + window) - base
+        with mmap.mmap(f.fileno(), length, offset=base, access=mmap.ACCESS_READ) as mm:
+            i = pos - base
+            while True:
+                nl = mm.find(b"\n", i)
+                if nl < 0:
+                    carry += mm[i:]
+                    break
+                line = mm[i:nl]
+                if carry:
+                    line, carry = carry + line, b""
+                i = nl + 1
+                yield line, base + i
+        pos = base + length
+
+
+class SessionAnalytics:
+    """全量会话统计：逐行流式读取每个会话文件一次，按文件保存 (inode, 偏移, 累计值) 检查点。
+    文件增长时只从检查点继续读新增部分，重启后也不会从头重读；文件被替换或截断时从头重算。
+    每轮最多读 budget_bytes，超大文件分多轮追上，不拖慢采集。可被多个扫描线程同时调用。
+    """
+
+    CHECKPOINT_BYTES = 64 * 1024 * 1024  # 单个文件每读这么多就落一次检查点
+
+    def __init__(self, state_path: Path | None = None, budget_bytes: int = 256 * 1024 * 1024):
+        self.state_path = state_path
+        self.budget_bytes = budget_bytes
+        self._files: dict[str, dict] = {}
+        self._seen: set[str] = set()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._budget = budget_bytes
+        self._load()
+
+    def _load(self):
+        if not self.state_path:
+            return
+        try:
+            self._files = json.loads(self.state_path.read_text())
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logger.warning("会话统计检查点损坏，已忽略：%s", self.state_path)
+
+    def save(self, prune: bool = True):
+        """保存检查点并重置本轮读取额度；prune 时清理本轮未出现的文件（仅在全量扫描后）"""
+        with self._lock:
+            stale = set(self._files) - self._seen if prune else set()
+            for key in stale:
+                del self._files[key]
+            self._seen = set()
+            self._budget = self.budget_bytes
+        self._flush(force=bool(stale))
+
+    def _flush(self, force: bool = False):
+        if not self.state_path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not (self._dirty or force):
+                    return
+                data = json.dumps(self._files, ensure_ascii=False)
+                self._dirty = False
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_path.with_suffix(".tmp")
+            tmp.write_text(data)
+            os.replace(tmp, self.state_path)
+
+    def _take_budget(self, want: int) -> int:
+        with self._lock:
+            n = min(want, self._budget)
+            self._budget -= n
+            return n
+
+    def update(self, filepath: Path, st: os.stat_result) -> SessionStats | None:
+        """把文件新增的完整行计入统计并返回当前累计值；文件无法读取时返回上次的结果"""
+        key = str(filepath)
+        with self._lock:
+            self._seen.add(key)
+            entry = self._files.get(key)
+        if entry and entry["inode"] == st.st_ino and entry["offset"] <= st.st_size:
+            stats, offset = SessionStats(**entry["stats"]), entry["offset"]
+        else:
+            stats, offset = SessionStats(), 0
+        if st.st_size == offset:
+            return stats
+
+        end = offset + self._take_budget(st.st_size - offset)
+        if end == offset:
+            return stats  # 本轮额度已用完，下轮继续
+        read = 0
+        start = offset
+        try:
+            with open(filepath, "rb") as f:
+                for line, next_offset in iter_lines(f, offset, end):
+                    self._add_line(stats, line)
+                    read += next_offset - offset
+                    offset = next_offset
+                    if read >= self.CHECKPOINT_BYTES:
+                        self._checkpoint(key, st.st_ino, offset, stats)
+                        METRICS.inc("session_stats_bytes_total", read)
+                        self._flush()
+                        read = 0
+                if offset == start and end < st.st_size:
+                    # 单行比本轮额度还长：超出额度也读完这一行，否则此文件每轮都停在同一位置
+                    for line, next_offset in iter_lines(f, offset, st.st_size):
+                        logger.info("会话文件有超长行（%d 字节），超出本轮读取额度：%s", next_offset - offset, filepath)
+                        self._add_line(stats, line)
+                        read += next_offset - offset
+                        offset = next_offset
+                        break
+        except (OSError, ValueError):
+            logger.warning("读取会话文件失败：%s", filepath, exc_info=True)
+        METRICS.inc("session_stats_bytes_total", read)
+        self._checkpoint(key, st.st_ino, offset, stats)
+        return stats
+
+    @staticmethod
+    def _add_line(stats: SessionStats, line: bytes):
+        if line.strip():
+            fields = jsonparse.parse_stats(line)
+            if fields is not None:
+                stats.add(fields)
+
+    def _checkpoint(self, key: str, inode: int, offset: int, stats: SessionStats):
+        with self._lock:
+            self._files[key] = {"inode": inode, "offset": offset, "stats": asdict(stats)}
+            self._dirty = True
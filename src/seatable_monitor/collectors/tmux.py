@@ -1,52 +1,232 @@
+import hashlib
+import re
 import subprocess
+import sys
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from ..models import TaskInfo
+from .procstat import ProcSampler
 
 logger = logging.getLogger(__name__)
 
+_PANE_FORMAT = "\t".join([
+    "#{session_name}", "#{window_index}", "#{pane_index}",
+    "#{window_active}", "#{pane_active}", "#{pane_id}", "#{pane_pid}",
+    "#{window_activity}", "#{history_size}", "#{cursor_x}", "#{cursor_y}",
+])
+_PANE_FIELDS = 11
 
-def list_sessions() -> list[str]:
-    """列出所有 tmux session 名称"""
+# tqdm: " 45%|████▌     | 450/1000 [00:30<00:36, 15.00it/s]"，慢速迭代时为 "8.50s/it"
+_TQDM_RE = re.compile(
+    r"(?P<pct>\d{1,3})%\|.*?\|\s*(?P<n>[\d.]+[kMG]?)/(?P<total>[\d.]+[kMG]?)"
+    r"\s*\[(?P<elapsed>[\d:]+)<(?P<eta>[\d:?]+),\s*(?P<rate>[\d.?]+\s*(?:[^\]\s,]*/s|s/[^\]\s,]+))"
+)
+# pip: "━━━━━━━━━━ 5.2/10.0 MB 3.1 MB/s eta 0:00:02"
+_PIP_RE = re.compile(
+    r"(?P<n>[\d.]+)/(?P<total>[\d.]+)\s+(?P<unit>[kMG]?B)\s+"
+    r"(?P<rate>[\d.]+\s*[kMG]?B/s)\s+eta\s+(?P<eta>[\d:-]+)"
+)
+# "Epoch 3/10"、"epoch: 3/10"、"Epoch [3/10]"
+_EPOCH_RE = re.compile(r"\bepoch\b\s*[:\[]?\s*(?P<n>\d+)\s*/\s*(?P<total>\d+)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class PaneInfo:
+    session_name: str
+    window_index: str
+    pane_index: str
+    active: bool    # 是否为该 session 当前窗口的当前 pane
+    pane_id: str    # 如 %12，capture-pane 的稳定目标
+    pane_pid: int   # pane 中 shell 的 pid，0 表示未知
+    signature: str  # window_activity/history_size/光标位置，不变则视为无新输出
+
+
+def list_panes() -> list[PaneInfo]:
+    """一次 list-panes -a 拿到全部 session/window/pane 元数据"""
     result = subprocess.run(
-        ["tmux", "ls", "-F", "#{session_name}"],
+        ["tmux", "list-panes", "-a", "-F", _PANE_FORMAT],
         capture_output=True, text=True
     )
     if result.returncode != 0:
         return []
-    return [l.strip() for l in result.stdout.splitlines() if l.strip()]
+    panes = []
+    for line in result.stdout.splitlines():
+        parts = line.split("\t")
+        if len(parts) != _PANE_FIELDS:
+            continue
+        session_name, window_index, pane_index, window_active, pane_active, pane_id, pane_pid = parts[:7]
+        panes.append(PaneInfo(
+            session_name=sys.intern(session_name),  # 同一 session 的各 pane 与各轮共享
+            window_index=window_index,
+            pane_index=pane_index,
+            active=window_active == "1" and pane_active == "1",
+            pane_id=pane_id,
+            pane_pid=int(pane_pid) if pane_pid.isdigit() else 0,
+            signature="/".join(parts[7:]),
+        ))
+    return panes
+
+
+def parse_progress(lines: list[str]) -> str:
+    """从最近几行中提取 tqdm / pip / epoch 进度，返回简短描述（无则返回空串）。
+    各取最靠下的一处；epoch 可以与进度条在同一行（"Epoch 3/10:  45%|…"），也可以在它上方单独一行
+    """
+    epoch = progress = ""
+    for line in reversed(lines[-20:]):
+        # tqdm 用 \r 刷新同一行，只看最后一段
+        line = line.rsplit("\r", 1)[-1]
+        if not epoch:
+            m = _EPOCH_RE.search(line)
+            if m:
+                epoch = f"epoch {m['n']}/{m['total']}"
+        if not progress:
+            m = _TQDM_RE.search(line)
+            if m:
+                progress = f"{m['pct']}% {m['n']}/{m['total']} {m['rate']} ETA {m['eta']}"
+            else:
+                m = _PIP_RE.search(line)
+                if m:
+                    progress = f"{m['n']}/{m['total']} {m['unit']} {m['rate']} ETA {m['eta']}"
+        if epoch and progress:
+            break
+    if epoch and progress:
+        return f"{epoch} {progress}"
+    return epoch or progress
+
+
+@dataclass
+class _PaneState:
+    signature: str
+    content_hash: str
+    changed_at: float   # 内容最后一次变化的时间
+    last_line: str
+    progress: str
+
+
+class PaneTracker:
+    """跨轮次记录每个 pane 的状态：元数据签名不变则跳过 capture，
+    内容哈希超过 idle_timeout 秒未变化则标记为"空闲"。
+    """
+
+    def __init__(self, idle_timeout: float = 300):
+        self.idle_timeout = idle_timeout
+        self._panes: dict[str, _PaneState] = {}
+
+    def get(self, pane: PaneInfo) -> _PaneState | None:
+        state = self._panes.get(pane.pane_id)
+        if state and state.signature == pane.signature:
+            return state
+        return None
+
+    def update(self, pane: PaneInfo, output: str) -> _PaneState:
+        lines = [l for l in output.splitlines() if l.strip()]
+        content_hash = hashlib.blake2b(output.encode("utf-8", "replace"), digest_size=8).hexdigest()
+        prev = self._panes.get(pane.pane_id)
+        now = time.time()
+        changed_at = prev.changed_at if prev and prev.content_hash == content_hash else now
+        state = _PaneState(
+            signature=pane.signature,
+            content_hash=content_hash,
+            changed_at=changed_at,
+            last_line=lines[-1] if lines else "(空)",
+            progress=parse_progress(lines),
+        )
+        self._panes[pane.pane_id] = state
+        return state
+
+    def status(self, state: _PaneState) -> str:
+        return "空闲" if time.time() - state.changed_at > self.idle_timeout else "进行中"
 
+    def prune(self, alive: set[str]):
+        for pane_id in set(self._panes) - alive:
+            del self._panes[pane_id]
+
+
+def collect_by_prefixes(
+    prefixes: list[str], machine: str, per_pane: bool = False, workers: int = 8,
+    tracker: PaneTracker | None = None, sampler: ProcSampler | None = None,
+) -> list[TaskInfo]:
+    """采集名称匹配任意前缀的所有 tmux session。
+    per_pane=False 时每个 session 一行（当前 pane），否则每个 pane 一行。
+    传入 tracker 时跨轮次复用未变化 pane 的结果并识别空闲 pane。
+    传入 sampler 时附带进程树资源占用列（per_pane=False 时为该 session 全部 pane 的合计）。
+    """
+    if tracker is None:
+        tracker = PaneTracker()
+    matched = [p for p in list_panes() if any(p.session_name.startswith(prefix) for prefix in prefixes)]
+    panes = [p for p in matched if per_pane or p.active]
+    tracker.prune({p.pane_id for p in panes})
+    if not panes:
+        return []
 
-def collect_by_prefixes(prefixes: list[str], machine: str) -> list[TaskInfo]:
-    """采集名称匹配任意前缀的所有 tmux session"""
-    all_sessions = list_sessions()
-    matched = [s for s in all_sessions if any(s.startswith(p) for p in prefixes)]
+    extras: dict[str, tuple] = {}
+    if sampler is not None:
+        groups: dict[str, list[int]] = {}
+        for p in matched:
+            if p.pane_pid:
+                groups.setdefault(_task_name(p, per_pane), []).append(p.pane_pid)
+        extras = {name: usage.columns() for name, usage in sampler.sample(groups).items()}
 
     results = []
-    for session_name in matched:
-        task = _collect_one(session_name, machine)
-        if task:
-            results.append(task)
+    to_capture = []
+    for p in panes:
+        state = tracker.get(p)
+        if state:
+            results.append(_to_task(p, state, tracker, machine, per_pane, extras))
+        else:
+            to_capture.append(p)
+
+    if to_capture:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(to_capture)))) as pool:
+            tasks = pool.map(lambda p: _collect_one(p, machine, per_pane, tracker, extras), to_capture)
+            results.extend(t for t in tasks if t)
     return results
 
 
-def _collect_one(session_name: str, machine: str) -> TaskInfo | None:
+def _capture(target: str) -> str | None:
     result = subprocess.run(
-        ["tmux", "capture-pane", "-p", "-t", session_name],
+        ["tmux", "capture-pane", "-p", "-t", target],
         capture_output=True, text=True
     )
     if result.returncode != 0:
-        logger.warning("无法采集 tmux session: %s", session_name)
         return None
+    return result.stdout
+
+
+def _collect_one(
+    pane: PaneInfo, machine: str, per_pane: bool, tracker: PaneTracker, extras: dict[str, tuple],
+) -> TaskInfo | None:
+    output = _capture(pane.pane_id)
+    if output is None:
+        logger.warning("无法采集 tmux pane: %s (%s)", pane.session_name, pane.pane_id)
+        return None
+    return _to_task(pane, tracker.update(pane, output), tracker, machine, per_pane, extras)
+
+
+def _task_name(pane: PaneInfo, per_pane: bool) -> str:
+    name = f"tmux:{pane.session_name}"
+    if per_pane:
+        name = f"{name}:{pane.window_index}.{pane.pane_index}"
+    return name
 
-    lines = [l for l in result.stdout.splitlines() if l.strip()]
-    last_line = lines[-1] if lines else "(空)"
 
+def _to_task(
+    pane: PaneInfo, state: _PaneState, tracker: PaneTracker, machine: str, per_pane: bool,
+    extras: dict[str, tuple],
+) -> TaskInfo:
+    name = _task_name(pane, per_pane)
+    output = state.last_line
+    if state.progress:
+        output = f"[{state.progress}] {output}"
     return TaskInfo(
-        name=f"tmux:{session_name}",
-        status="进行中",
+        name=name,
+        status=tracker.status(state),
         source="tmux",
-        session_id=session_name,
-        latest_output=last_line[:500],  # 最多500字符
+        session_id=pane.session_name,
+        latest_output=output[:500],  # 最多500字符
         parent_name=None,
         machine=machine,
+        extra=extras.get(name, ()),
     )
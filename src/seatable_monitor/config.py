@@ -3,17 +3,20 @@ import tomllib
 from pathlib import Path
 
 
-def load_config() -> dict:
-    """加载配置，优先级：环境变量 > config.toml > 默认值"""
+def config_path() -> Path:
+    """配置文件路径，优先级：SEATABLE_MONITOR_CONFIG > ./config.toml > ~/.config/seatable-monitor/config.toml"""
     config_path = os.environ.get("SEATABLE_MONITOR_CONFIG")
-    if not config_path:
-        local = Path("config.toml")
-        if local.exists():
-            config_path = str(local)
-        else:
-            config_path = str(Path.home() / ".config" / "seatable-monitor" / "config.toml")
-
-    with open(config_path, "rb") as f:
+    if config_path:
+        return Path(config_path)
+    local = Path("config.toml")
+    if local.exists():
+        return local
+    return Path.home() / ".config" / "seatable-monitor" / "config.toml"
+
+
+def load_config(path: Path | None = None) -> dict:
+    """加载配置，优先级：环境变量 > config.toml > 默认值"""
+    with open(path or config_path(), "rb") as f:
         config = tomllib.load(f)
 
     # 环境变量覆盖 token
@@ -22,3 +25,67 @@ def load_config() -> dict:
         config.setdefault("seatable", {})["api_token"] = env_token
 
     return config
+
+
+def _check(ok: bool, message: str):
+    if not ok:
+        raise ValueError(message)
+
+
+def _number(conf: dict, section: str, key: str, minimum: float = 0):
+    value = conf.get(key)
+    if value is not None:
+        _check(
+            isinstance(value, (int, float)) and not isinstance(value, bool) and value >= minimum,
+            f"[{section}] {key} 应为不小于 {minimum} 的数字，实际为 {value!r}",
+        )
+
+
+def validate_config(config: dict):
+    """检查常用配置项的类型与取值，有误时抛出 ValueError（启动与热加载时调用）"""
+    for section in ("monitor", "seatable", "tmux", "claude", "relay", "schedule", "history", "logging", "metrics"):
+        _check(isinstance(config.get(section, {}), dict), f"[{section}] 应为表")
+
+    monitor = config.get("monitor", {})
+    for key in ("poll_interval", "sweep_interval", "heartbeat_interval"):
+        _number(monitor, "monitor", key, minimum=1)
+    for key in ("retention_days", "debounce", "outbox_max_mb", "writer_queue_size"):
+        _number(monitor, "monitor", key)
+    _check(monitor.get("mode", "poll") in ("poll", "watch"), "[monitor] mode 应为 poll 或 watch")
+
+    relay = config.get("relay", {})
+    role = relay.get("role", "")
+    _check(role in ("", "agent", "aggregator"), f"[relay] role 不支持：{role!r}")
+    if role == "agent":
+        _check(isinstance(relay.get("url"), str), "[relay] agent 需要 url")
+    else:
+        seatable = config.get("seatable", {})
+        for key in ("server_url", "api_token"):
+            _check(isinstance(seatable.get(key), str) and seatable[key], f"[seatable] 缺少 {key}")
+
+    tmux = config.get("tmux", {})
+    prefixes = tmux.get("session_prefixes", [])
+    _check(
+        isinstance(prefixes, list) and all(isinstance(p, str) for p in prefixes),
+        "[tmux] session_prefixes 应为字符串列表",
+    )
+    for key in ("capture_workers", "idle_timeout"):
+        _number(tmux, "tmux", key, minimum=1)
+
+    claude = config.get("claude", {})
+    for key in ("lookback_hours", "idle_timeout", "scan_workers", "scan_deadline", "analytics_mb_per_cycle"):
+        _number(claude, "claude", key)
+    _check(
+        claude.get("json_backend", "auto") in ("auto", "msgspec", "orjson", "json"),
+        "[claude] json_backend 应为 auto / msgspec / orjson / json",
+    )
+
+    for name, conf in config.get("schedule", {}).items():
+        _check(isinstance(conf, dict), f"[schedule] {name} 应为 {{ min = ..., max = ... }}")
+        for key in ("min", "max", "deadline"):
+            _number(conf, f"schedule.{name}", key, minimum=0 if key == "deadline" else 1)
+
+    _check(
+        config.get("logging", {}).get("format", "text") in ("text", "json"),
+        "[logging] format 应为 text 或 json",
+    )
@@ -0,0 +1,314 @@
+import argparse
+import json
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+from .models import TaskInfo
+from .seatable_client import ACTIVE_STATUSES
+
+logger = logging.getLogger(__name__)
+
+_ACTIVE_IN = f"({', '.join('?' * len(ACTIVE_STATUSES))})"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    ts REAL NOT NULL,
+    machine TEXT NOT NULL,
+    source TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    prev TEXT,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_key ON events (machine, source, session_id, ts);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE TABLE IF NOT EXISTS current (
+    name TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    machine TEXT NOT NULL,
+    source TEXT NOT NULL,
+    status TEXT NOT NULL,
+    since REAL NOT NULL,
+    PRIMARY KEY (name, session_id, machine)
+) WITHOUT ROWID;
+"""
+
+
+class HistoryStore:
+    """本地状态变迁历史（SQLite WAL）：每行状态变化时追加一条事件，不记录未变化的快照。
+
+    - events 按 (机器, 来源, 会话ID, 时间) 与时间建索引，供 history 子命令按时间范围查询与统计
+    - current 保存每行最近的状态，重启后继续比对，不会重复记录
+    - 超过 retention_days 天的事件定期清理
+    """
+
+    PRUNE_INTERVAL = 3600
+
+    def __init__(self, path: Path, retention_days: float = 90, readonly: bool = False):
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        if readonly:
+            self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute("PRAGMA synchronous = NORMAL")
+            self._db.executescript(_SCHEMA)
+        self._last: dict[tuple[str, str, str], str] = {
+            (name, session_id, machine): status
+            for name, session_id, machine, status in self._db.execute(
+                "SELECT name, session_id, machine, status FROM current"
+            )
+        } if not readonly else {}
+        self._pruned_at = 0.0
+
+    def record(self, tasks: Iterable[TaskInfo], now: float | None = None) -> int:
+        """记录与上次状态不同的行，返回新增事件数"""
+        now = time.time() if now is None else now
+        with self._lock:
+            changed = []
+            for t in tasks:
+                key = t.key()
+                prev = self._last.get(key)
+                if prev != t.status:
+                    self._last[key] = t.status
+                    changed.append((now, t.machine, t.source, t.session_id, t.name, prev, t.status))
+            self._append(changed)
+            self._maybe_prune(now)
+        return len(changed)
+
+    def reconcile(self, source: str, machine: str, active_keys, now: float | None = None) -> int:
+        """与 SeaTableClient.reconcile_source 对应：本轮未采集到的活动行记为已结束"""
+        now = time.time() if now is None else now
+        active = {tuple(k) for k in active_keys}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT name, session_id, status FROM current WHERE source=? AND machine=?",
+                (source, machine),
+            ).fetchall()
+            changed = []
+            for name, session_id, status in rows:
+                if status in ACTIVE_STATUSES and (name, session_id) not in active:
+                    self._last[(name, session_id, machine)] = "已结束"
+                    changed.append((now, machine, source, session_id, name, status, "已结束"))
+            self._append(changed)
+        return len(changed)
+
+    def _append(self, changed: list[tuple]):
+        if not changed:
+            return
+        self._db.execute("BEGIN")
+        self._db.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", changed)
+        self._db.executemany(
+            "INSERT OR REPLACE INTO current VALUES (?, ?, ?, ?, ?, ?)",
+            [(name, session_id, machine, source, status, ts)
+             for ts, machine, source, session_id, name, _, status in changed],
+        )
+        self._db.execute("COMMIT")
+
+    def _maybe_prune(self, now: float):
+        if self.retention_days <= 0 or now - self._pruned_at < self.PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+        cutoff = now - self.retention_days * 86400
+        self._db.execute("BEGIN")
+        n = self._db.execute("DELETE FROM events WHERE ts < ?", (cutoff,)).rowcount
+        # 早已结束的行不再需要比对状态
+        for name, session_id, machine in self._db.execute(
+            f"SELECT name, session_id, machine FROM current WHERE since < ? AND status NOT IN {_ACTIVE_IN}",
+            (cutoff, *ACTIVE_STATUSES),
+        ).fetchall():
+            self._last.pop((name, session_id, machine), None)
+        self._db.execute(
+            f"DELETE FROM current WHERE since < ? AND status NOT IN {_ACTIVE_IN}", (cutoff, *ACTIVE_STATUSES),
+        )
+        self._db.execute("COMMIT")
+        if n:
+            logger.info("已清理 %d 条超过 %g 天的历史事件", n, self.retention_days)
+
+    def query(
+        self, since: float, until: float, machine: str | None = None, source: str | None = None,
+        session_id: str | None = None, name: str | None = None,
+    ) -> list[dict]:
+        """时间范围内的状态变迁事件，按时间排序"""
+        where, params = _filters(machine, source, session_id, name)
+        sql = (
+            "SELECT ts, machine, source, session_id, name, prev, status FROM events "
+            f"WHERE ts >= ? AND ts < ?{where} ORDER BY ts"
+        )
+        with self._lock:
+            rows = self._db.execute(sql, (since, until, *params)).fetchall()
+        return [
+            dict(zip(("ts", "machine", "source", "session_id", "name", "prev", "status"), row))
+            for row in rows
+        ]
+
+    def durations(
+        self, since: float, until: float, machine: str | None = None, source: str | None = None,
+        session_id: str | None = None, name: str | None = None,
+    ) -> list[dict]:
+        """时间范围内有活动的每一行：首次出现、最后状态、总时长与各状态累计时长（秒）。
+        每段状态持续到下一次变化为止，最后一段截止到 until；只统计落在 [since, until) 内的部分。
+        """
+        where, params = _filters(machine, source, session_id, name)
+        # 窗口内有事件的行，加上窗口开始时仍处于活动状态的行
+        sql = (
+            "SELECT machine, source, session_id, name, ts, status, "
+            "LEAD(ts) OVER (PARTITION BY machine, session_id, name ORDER BY ts) FROM events "
+            f"WHERE ts < ?{where} AND (machine, session_id, name) IN ("
+            f"  SELECT machine, session_id, name FROM events WHERE ts >= ? AND ts < ?{where} "
+            "  UNION SELECT machine, session_id, name FROM ("
+            "    SELECT machine, session_id, name, status, MAX(ts) FROM events "
+            f"    WHERE ts < ?{where} GROUP BY machine, session_id, name"
+            f"  ) WHERE status IN {_ACTIVE_IN}"
+            ") ORDER BY machine, source, session_id, name, ts"
+        )
+        with self._lock:
+            rows = self._db.execute(
+                sql, (until, *params, since, until, *params, since, *params, *ACTIVE_STATUSES),
+            ).fetchall()
+        report: dict[tuple, dict] = {}
+        for machine_, source_, session_, name_, ts, status, next_ts in rows:
+            key = (machine_, source_, session_, name_)
+            item = report.setdefault(key, {
+                "machine": machine_, "source": source_, "session_id": session_, "name": name_,
+                "first_seen": ts, "status": status, "total": 0.0, "by_status": {},
+            })
+            item["status"] = status
+            start, end = max(ts, since), min(until if next_ts is None else next_ts, until)
+            if status in ACTIVE_STATUSES and end > start:
+                item["total"] += end - start
+                item["by_status"][status] = item["by_status"].get(status, 0.0) + end - start
+        return list(report.values())
+
+    def summary(self, since: float, until: float, **filters) -> list[dict]:
+        """按 (机器, 来源) 汇总：活跃行数、新出现数、完成数、结束数、平均 / 最长活动时长"""
+        groups: dict[tuple[str, str], dict] = {}
+        for item in self.durations(since, until, **filters):
+            g = groups.setdefault((item["machine"], item["source"]), {
+                "machine": item["machine"], "source": item["source"],
+                "rows": 0, "new": 0, "completed": 0, "ended": 0, "active_total": 0.0, "active_max": 0.0,
+            })
+            g["rows"] += 1
+            g["new"] += item["first_seen"] >= since
+            g["completed"] += item["status"] == "已完成"
+            g["ended"] += item["status"] == "已结束"
+            g["active_total"] += item["total"]
+            g["active_max"] = max(g["active_max"], item["total"])
+        for g in groups.values():
+            g["active_avg"] = g["active_total"] / g["rows"] if g["rows"] else 0.0
+        return list(groups.values())
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _filters(machine, source, session_id, name) -> tuple[str, list]:
+    where, params = "", []
+    for column, value in (("machine", machine), ("source", source), ("session_id", session_id)):
+        if value:
+            where += f" AND {column} = ?"
+            params.append(value)
+    if name:
+        where += " AND instr(name, ?) > 0"
+        params.append(name)
+    return where, params
+
+
+_RELATIVE = re.compile(r"^(\d+(?:\.\d+)?)([smhdw])$")
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_time(value: str, now: float | None = None) -> float:
+    """"30m" / "2h" / "7d" 表示多久之前，"now" 为当前时间，否则按 ISO 格式（本地时区）解析"""
+    now = time.time() if now is None else now
+    if value == "now":
+        return now
+    m = _RELATIVE.match(value)
+    if m:
+        return now - float(m.group(1)) * _UNITS[m.group(2)]
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _fmt_ts(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _fmt_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _print_table(headers: list[str], rows: list[list]):
+    widths = [max([_width(h), *(_width(str(r[i])) for r in rows)]) for i, h in enumerate(headers)]
+    for line in [headers, *rows]:
+        print("  ".join(str(v) + " " * (w - _width(str(v))) for v, w in zip(line, widths)).rstrip())
+
+
+def _width(s: str) -> int:
+    # 中文按两列宽对齐
+    return sum(2 if ord(c) > 0x2E7F else 1 for c in s)
+
+
+def cli(argv: list[str], default_db: Path | None = None) -> int:
+    """seatable-monitor history：查询本地状态历史，不访问 SeaTable"""
+    parser = argparse.ArgumentParser(prog="seatable-monitor history", description="查询本地任务状态历史")
+    parser.add_argument("report", nargs="?", default="events", choices=("events", "durations", "summary"),
+                        help="events：状态变迁明细；durations：每行的活动时长；summary：按机器与来源汇总")
+    parser.add_argument("--since", default="24h", help="起始时间：30m / 2h / 7d 或 ISO 时间，默认 24h")
+    parser.add_argument("--until", default="now", help="截止时间，格式同 --since，默认 now")
+    parser.add_argument("--machine", help="只看某台机器")
+    parser.add_argument("--source", help="只看某个来源（tmux / claude-code / claude-session）")
+    parser.add_argument("--session", help="只看某个会话ID")
+    parser.add_argument("--task", help="任务名包含该字符串")
+    parser.add_argument("--json", action="store_true", help="每行输出一个 JSON 对象")
+    parser.add_argument("--db", type=Path, default=default_db, help="历史库路径，默认 cache_dir/history.sqlite3")
+    args = parser.parse_args(argv)
+
+    if args.db is None or not args.db.exists():
+        print(f"历史库不存在：{args.db}", file=sys.stderr)
+        return 1
+    try:
+        since, until = parse_time(args.since), parse_time(args.until)
+    except ValueError as e:
+        print(f"时间格式错误：{e}", file=sys.stderr)
+        return 2
+    filters = {"machine": args.machine, "source": args.source, "session_id": args.session, "name": args.task}
+    store = HistoryStore(args.db, readonly=True)
+    try:
+        rows = getattr(store, "query" if args.report == "events" else args.report)(since, until, **filters)
+    finally:
+        store.close()
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False))
+        return 0
+    if args.report == "events":
+        _print_table(
+            ["时间", "机器", "来源", "会话ID", "任务名", "变化"],
+            [[_fmt_ts(r["ts"]), r["machine"], r["source"], r["session_id"], r["name"],
+              f"{r['prev'] or '（新）'} → {r['status']}"] for r in rows],
+        )
+    elif args.report == "durations":
+        _print_table(
+            ["首次出现", "机器", "来源", "会话ID", "任务名", "状态", "活动时长", "进行中", "空闲"],
+            [[_fmt_ts(r["first_seen"]), r["machine"], r["source"], r["session_id"], r["name"], r["status"],
+              _fmt_duration(r["total"]), _fmt_duration(r["by_status"].get("进行中", 0)),
+              _fmt_duration(r["by_status"].get("空闲", 0))] for r in rows],
+        )
+    else:
+        _print_table(
+            ["机器", "来源", "行数", "新增", "已完成", "已结束", "平均活动", "最长活动"],
+            [[r["machine"], r["source"], r["rows"], r["new"], r["completed"], r["ended"],
+              _fmt_duration(r["active_avg"]), _fmt_duration(r["active_max"])] for r in rows],
+        )
+    return 0
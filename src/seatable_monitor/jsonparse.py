@@ -0,0 +1,293 @@
+"""JSON 解析后端：优先使用 msgspec / orjson，未安装时回退到标准库 json。
+
+parse_entry() 只提取会话 JSONL 行里用到的几个字段，parse_stats() 只提取统计用的用量字段：
+msgspec 后端按结构体解码，tool_result 等大字段直接跳过不分配；
+其余后端整行解析后取值。任何后端都不会对内容做 eval。
+"""
+import json
+import logging
+from typing import Any, Callable, NamedTuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+
+class EntryFields(NamedTuple):
+    type: str
+    session_id: str
+    cwd: str
+    git_branch: str
+    timestamp: str
+    tool: str   # 本行 content 中最后一个 tool_use 的名称
+    text: str   # 本行 content 中最后一段 text（截断到 200 字）
+
+
+class StatFields(NamedTuple):
+    type: str
+    timestamp: str
+    message_id: str     # 同一条 assistant 消息拆成多行时各行相同，用于避免重复计 token
+    tool_calls: int
+    input_tokens: int   # 含缓存读写
+    output_tokens: int
+
+
+def _str(value) -> str:
+    return value if isinstance(value, str) else ""
+
+
+def _int(value) -> int:
+    return value if isinstance(value, int) and not isinstance(value, bool) else 0
+
+
+def _content_fields(content) -> tuple[str, str]:
+    tool = text = ""
+    if isinstance(content, list):
+        for c in reversed(content):
+            if not isinstance(c, dict):
+                continue
+            if c.get("type") == "tool_use" and not tool:
+                tool = _str(c.get("name"))
+            elif c.get("type") == "text" and not text:
+                text = _str(c.get("text"))[:200]
+    return tool, text
+
+
+def _fields_from_dict(entry, loads: Callable[[Any], Any], need_content: bool) -> EntryFields | None:
+    if not isinstance(entry, dict):
+        return None
+    tool = text = ""
+    if need_content:
+        data = entry.get("data")
+        if isinstance(data, str):
+            try:
+                data = loads(data)
+            except ValueError:
+                data = None
+        if isinstance(data, dict):
+            msg = data.get("message")
+            if isinstance(msg, dict):
+                tool, text = _content_fields(msg.get("content"))
+    return EntryFields(
+        _str(entry.get("type")), _str(entry.get("sessionId")), _str(entry.get("cwd")),
+        _str(entry.get("gitBranch")), _str(entry.get("timestamp")), tool, text,
+    )
+
+
+if msgspec is not None:
+    class _Item(msgspec.Struct):
+        type: str = ""
+        name: str = ""
+        text: str = ""
+
+    class _Message(msgspec.Struct):
+        content: list[_Item] | str = []
+
+    class _Data(msgspec.Struct):
+        message: _Message | None = None
+
+    class _Head(msgspec.Struct):
+        type: str = ""
+        sessionId: str = ""
+        cwd: str = ""
+        gitBranch: str = ""
+        timestamp: str = ""
+
+    class _Entry(_Head):
+        data: _Data | str | None = None
+
+    _head_decoder = msgspec.json.Decoder(_Head)
+    _entry_decoder = msgspec.json.Decoder(_Entry)
+    _data_decoder = msgspec.json.Decoder(_Data)
+
+
+def _msgspec_entry(line: bytes, need_content: bool) -> EntryFields | None:
+    try:
+        e = _entry_decoder.decode(line) if need_content else _head_decoder.decode(line)
+    except msgspec.ValidationError:
+        # 结构与预期不符（如 content 里混有字符串），退回通用解析
+        try:
+            return _fields_from_dict(msgspec.json.decode(line), msgspec.json.decode, need_content)
+        except msgspec.DecodeError:
+            return None
+    except msgspec.DecodeError:
+        return None
+    tool = text = ""
+    if need_content:
+        data = e.data
+        if isinstance(data, str):
+            try:
+                data = _data_decoder.decode(data)
+            except (msgspec.ValidationError, msgspec.DecodeError):
+                data = None
+        if data is not None and data.message is not None and isinstance(data.message.content, list):
+            for c in reversed(data.message.content):
+                if c.type == "tool_use" and not tool:
+                    tool = c.name
+                elif c.type == "text" and not text:
+                    text = c.text[:200]
+    return EntryFields(e.type, e.sessionId, e.cwd, e.gitBranch, e.timestamp, tool, text)
+
+
+def _stats_from_dict(entry, loads: Callable[[Any], Any]) -> StatFields | None:
+    if not isinstance(entry, dict):
+        return None
+    # 消息可能直接在 message 下，也可能包在 data.message 里
+    msg = entry.get("message")
+    if not isinstance(msg, dict):
+        data = entry.get("data")
+        if isinstance(data, str):
+            try:
+                data = loads(data)
+            except ValueError:
+                data = None
+        msg = data.get("message") if isinstance(data, dict) else None
+    tool_calls = input_tokens = output_tokens = 0
+    message_id = ""
+    if isinstance(msg, dict):
+        message_id = _str(msg.get("id"))
+        content = msg.get("content")
+        if isinstance(content, list):
+            tool_calls = sum(1 for c in content if isinstance(c, dict) and c.get("type") == "tool_use")
+        usage = msg.get("usage")
+        if isinstance(usage, dict):
+            input_tokens = (
+                _int(usage.get("input_tokens")) + _int(usage.get("cache_creation_input_tokens"))
+                + _int(usage.get("cache_read_input_tokens"))
+            )
+            output_tokens = _int(usage.get("output_tokens"))
+    return StatFields(
+        _str(entry.get("type")), _str(entry.get("timestamp")), message_id,
+        tool_calls, input_tokens, output_tokens,
+    )
+
+
+if msgspec is not None:
+    class _Usage(msgspec.Struct):
+        input_tokens: int = 0
+        output_tokens: int = 0
+        cache_creation_input_tokens: int = 0
+        cache_read_input_tokens: int = 0
+
+    class _StatItem(msgspec.Struct):
+        type: str = ""
+
+    class _StatMessage(msgspec.Struct):
+        id: str = ""
+        content: list[_StatItem] | str = []
+        usage: _Usage | None = None
+
+    class _StatData(msgspec.Struct):
+        message: _StatMessage | None = None
+
+    class _StatEntry(msgspec.Struct):
+        type: str = ""
+        timestamp: str = ""
+        message: _StatMessage | None = None
+        data: _StatData | str | None = None
+
+    _stat_decoder = msgspec.json.Decoder(_StatEntry)
+    _stat_data_decoder = msgspec.json.Decoder(_StatData)
+
+
+def _msgspec_stats(line: bytes) -> StatFields | None:
+    try:
+        e = _stat_decoder.decode(line)
+    except msgspec.ValidationError:
+        try:
+            return _stats_from_dict(msgspec.json.decode(line), msgspec.json.decode)
+        except msgspec.DecodeError:
+            return None
+    except msgspec.DecodeError:
+        return None
+    msg = e.message
+    if msg is None:
+        data = e.data
+        if isinstance(data, str):
+            try:
+                data = _stat_data_decoder.decode(data)
+            except (msgspec.ValidationError, msgspec.DecodeError):
+                data = None
+        msg = data.message if data is not None else None
+    if msg is None:
+        return StatFields(e.type, e.timestamp, "", 0, 0, 0)
+    tool_calls = 0
+    if isinstance(msg.content, list):
+        tool_calls = sum(1 for c in msg.content if c.type == "tool_use")
+    u = msg.usage
+    if u is None:
+        return StatFields(e.type, e.timestamp, msg.id, tool_calls, 0, 0)
+    return StatFields(
+        e.type, e.timestamp, msg.id, tool_calls,
+        u.input_tokens + u.cache_creation_input_tokens + u.cache_read_input_tokens, u.output_tokens,
+    )
+
+
+def _generic_stats(loads: Callable[[Any], Any]) -> Callable[[bytes], StatFields | None]:
+    def parse(line: bytes) -> StatFields | None:
+        try:
+            entry = loads(line)
+        except ValueError:
+            return None
+        return _stats_from_dict(entry, loads)
+    return parse
+
+
+def _generic_entry(loads: Callable[[Any], Any]) -> Callable[[bytes, bool], EntryFields | None]:
+    def parse(line: bytes, need_content: bool) -> EntryFields | None:
+        try:
+            entry = loads(line)
+        except ValueError:  # orjson.JSONDecodeError / json.JSONDecodeError 均是 ValueError 子类
+            return None
+        return _fields_from_dict(entry, loads, need_content)
+    return parse
+
+
+_BACKENDS: dict[str, tuple[
+    Callable[[Any], Any], Callable[[bytes, bool], EntryFields | None], Callable[[bytes], StatFields | None],
+]] = {
+    "json": (json.loads, _generic_entry(json.loads), _generic_stats(json.loads)),
+}
+if orjson is not None:
+    _BACKENDS["orjson"] = (orjson.loads, _generic_entry(orjson.loads), _generic_stats(orjson.loads))
+if msgspec is not None:
+    _BACKENDS["msgspec"] = (msgspec.json.decode, _msgspec_entry, _msgspec_stats)
+
+BACKEND = ""
+loads: Callable[[Any], Any] = json.loads
+_parse_entry = _BACKENDS["json"][1]
+_parse_stats = _BACKENDS["json"][2]
+
+
+def set_backend(name: str = "auto") -> str:
+    """选择解析后端：auto / msgspec / orjson / json；指定的后端未安装时回退并告警"""
+    global BACKEND, loads, _parse_entry, _parse_stats
+    if name == "auto":
+        name = next(n for n in ("msgspec", "orjson", "json") if n in _BACKENDS)
+    elif name not in _BACKENDS:
+        logger.warning("JSON 后端 %s 不可用，改用标准库 json", name)
+        name = "json"
+    BACKEND = name
+    loads, _parse_entry, _parse_stats = _BACKENDS[name]
+    return name
+
+
+def parse_entry(line: bytes, need_content: bool = True) -> EntryFields | None:
+    """解析一行会话 JSONL；need_content=False 时不解析 data 字段。无法解析时返回 None"""
+    return _parse_entry(line, need_content)
+
+
+def parse_stats(line: bytes) -> StatFields | None:
+    """解析一行会话 JSONL 的统计字段（工具调用数、token 用量）。无法解析时返回 None"""
+    return _parse_stats(line)
+
+
+set_backend()
@@ -0,0 +1,139 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from .metrics import METRICS
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+_cycle = 0                          # 当前采集轮次编号，附加到每条日志（JSON 格式输出）
+_dedup: "DedupFilter | None" = None
+_listener: logging.handlers.QueueListener | None = None
+
+
+class DedupFilter(logging.Filter):
+    """每轮采集内，相同的告警 / 错误（logger、级别、消息模板、异常类型都相同）最多放行 limit 条，
+    其余只计数，下一轮开始时汇总成一条。INFO 及以下不受影响。
+    """
+
+    def __init__(self, limit: int = 5):
+        super().__init__()
+        self.limit = limit
+        self._counts: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.cycle = _cycle
+        if not self.limit or record.levelno < logging.WARNING:
+            return True
+        key = (record.name, record.levelno, record.msg, record.exc_info[0] if record.exc_info else None)
+        with self._lock:
+            n = self._counts[key] = self._counts.get(key, 0) + 1
+        if n <= self.limit:
+            return True
+        METRICS.inc("log_suppressed_total")
+        return False
+
+    def reset(self) -> list[tuple[str, str, int]]:
+        """清空计数，返回被省略的 (logger, 消息模板, 省略条数)"""
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        return [(key[0], str(key[2]), n - self.limit) for key, n in counts.items() if n > self.limit]
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """调用线程只合并参数并入队，不做格式化与 I/O；队列满时丢弃并计数，永不阻塞"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 参数可能在入队后被修改，这里先合并；异常堆栈留给后台线程格式化。
+        # 根 logger 只有这一个 handler，记录不与其他 handler 共享，不必复制
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            METRICS.inc("log_dropped_total")
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志一行 JSON：ts、level、logger、thread、cycle、msg，有异常时附带 exc"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "cycle": getattr(record, "cycle", 0),
+            "msg": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+def setup_logging(conf: dict):
+    """按 [logging] 配置初始化：所有日志经队列交给后台线程写入（按大小轮转的文件 + 可选的终端输出）。
+    可重复调用，旧的后台线程写完后替换。
+    """
+    global _dedup, _listener
+    formatter = JsonFormatter() if conf.get("format", "text") == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers: list[logging.Handler] = []
+    if conf.get("file", "/tmp/seatable-monitor.log"):
+        handlers.append(logging.handlers.RotatingFileHandler(
+            conf.get("file", "/tmp/seatable-monitor.log"),
+            maxBytes=int(conf.get("max_mb", 10) * 1024 * 1024),
+            backupCount=conf.get("backups", 3),
+            encoding="utf-8",
+        ))
+    console = conf.get("console", "auto")
+    if console == "auto":
+        # 交互终端或 systemd（journald 负责轮转）时输出到 stderr；launchd 下 stderr 是不轮转的文件，不输出
+        console = sys.stderr.isatty() or "JOURNAL_STREAM" in os.environ
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    _dedup = DedupFilter(conf.get("dedup_per_cycle", 5))
+    queue_handler = _QueueHandler(queue.Queue(conf.get("queue_size", 10000)))
+    queue_handler.addFilter(_dedup)
+    root = logging.getLogger()
+    root.setLevel(conf.get("level", "INFO"))
+    root.handlers[:] = [queue_handler]
+
+    if _listener is None:
+        atexit.register(shutdown_logging)
+    else:
+        shutdown_logging()
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers)
+    _listener.start()
+
+
+def shutdown_logging():
+    """写完队列中剩余的日志并关闭文件（进程退出时自动调用）"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def begin_cycle() -> int:
+    """开始新一轮采集：轮次编号加一，并汇总上一轮被省略的重复日志"""
+    global _cycle
+    _cycle += 1
+    if _dedup:
+        for name, msg, n in _dedup.reset():
+            logging.getLogger(name).warning("上一轮省略了 %d 条重复日志：%s", n, msg[:200])
+    return _cycle
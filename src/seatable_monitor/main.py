@@ -1,86 +1,595 @@
 import signal
 import socket
 import logging
+import os
+import sys
+import threading
 import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
-from .config import load_config
-from .seatable_client import SeaTableClient
-from .collectors.tmux import collect_by_prefixes
-from .collectors.claude import collect_todos, collect_tasks, collect_sessions
+from . import jsonparse
+from .config import config_path, load_config, validate_config
+from .models import TaskInfo
+from .seatable_client import SESSION_STATS_COLUMNS, TMUX_RESOURCE_COLUMNS, SeaTableClient
+from .schema_cache import SchemaCache
+from .row_cache import RowCache, default_cache_path
+from .collectors.tmux import collect_by_prefixes, PaneTracker
+from .collectors.procstat import ProcSampler
+from .collectors.claude import iter_todos, iter_tasks, iter_sessions, SessionTailer
+from .collectors.session_stats import SessionAnalytics
+from .collectors.scanner import DirScanner
+from .watcher import Changes, create_watcher
+from .writer import TaskWriter
+from .outbox import Outbox
+from .history import HistoryStore, cli as history_cli
+from .relay import RelayClient, RelayServer
+from .transport import SeaTableTransport
+from .metrics import METRICS, start_http_server
+from .logsetup import begin_cycle, setup_logging
+from .scheduler import Job, Scheduler
 
 logger = logging.getLogger("seatable-monitor")
-_running = True
+_stop = threading.Event()
+_reload = threading.Event()             # SIGHUP 或配置文件变化时置位，采集循环返回 main 重新加载
+_wakers: list[Callable[[], None]] = []  # 收到退出 / 重新加载请求时调用，用于打断阻塞中的等待
+
+_FINGERPRINT_MASK = (1 << 64) - 1
+
+
+@dataclass
+class CollectorState:
+    """跨轮次保留的采集器状态"""
+    tailer: SessionTailer = field(default_factory=SessionTailer)
+    panes: PaneTracker = field(default_factory=PaneTracker)
+    scanner: DirScanner = field(default_factory=DirScanner)
+    analytics: SessionAnalytics | None = None  # None 表示不做全量会话统计
+    procs: ProcSampler | None = None           # None 表示不采样 tmux 进程资源
+    cycles: int = 0
 
 
 def _handle_signal(signum, frame):
-    global _running
-    _running = False
+    _stop.set()
+    for wake in _wakers:
+        wake()
     logger.info("收到退出信号，正在停止...")
 
 
-def main():
-    log_file = "/tmp/seatable-monitor.log"
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-        handlers=[logging.FileHandler(log_file), logging.StreamHandler()],
+def _request_reload(signum=None, frame=None):
+    """SIGHUP 或配置文件变化：打断当前等待，回到 main 中重新加载配置"""
+    _reload.set()
+    for wake in _wakers:
+        wake()
+
+
+def _watch_config_file(path: Path, interval: Callable[[], float]):
+    """后台线程：每 interval() 秒检查一次配置文件的 mtime / 大小，变化时请求重新加载。
+    间隔每次从当前配置读取，热加载修改后下一次检查即生效；为 0 时暂停检查（仍可用 SIGHUP）
+    """
+    def signature():
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def run():
+        last = signature()
+        while True:
+            seconds = interval()
+            if _stop.wait(seconds if seconds > 0 else 5):
+                return
+            current = signature()
+            if seconds > 0 and current != last and current is not None:
+                logger.info("配置文件已修改：%s", path)
+                _request_reload()
+            last = current
+
+    threading.Thread(target=run, name="config-watcher", daemon=True).start()
+
+
+def _build_analytics(config: dict, cache_dir: Path) -> SessionAnalytics | None:
+    claude_conf = config.get("claude", {})
+    if not claude_conf.get("analytics", False):
+        return None
+    return SessionAnalytics(
+        cache_dir / "session-stats.json",
+        budget_bytes=int(claude_conf.get("analytics_mb_per_cycle", 256) * 1024 * 1024),
     )
 
-    config = load_config()
-    machine = config.get("monitor", {}).get("hostname") or socket.gethostname()
-    poll_interval = config.get("monitor", {}).get("poll_interval", 30)
 
+def _build_sampler(config: dict) -> ProcSampler | None:
+    if not config.get("tmux", {}).get("resources", False):
+        return None
+    procs = ProcSampler()
+    if not procs.available():
+        logger.warning("未找到 /proc，tmux 资源采样已关闭")
+        return None
+    return procs
+
+
+def _build_transport(seatable_conf: dict) -> SeaTableTransport:
+    return SeaTableTransport(
+        connect_timeout=seatable_conf.get("connect_timeout", 5),
+        read_timeout=seatable_conf.get("read_timeout", 30),
+        rate_per_minute=seatable_conf.get("rate_limit_per_minute", 300),
+        max_retries=seatable_conf.get("max_retries", 3),
+    )
+
+
+def _extra_columns(analytics: bool, resources: bool) -> list:
+    return (SESSION_STATS_COLUMNS if analytics else []) + (TMUX_RESOURCE_COLUMNS if resources else [])
+
+
+def _build_client(
+    config: dict, machine: str, cache_dir: Path, analytics: bool, resources: bool,
+) -> SeaTableClient | RelayClient:
+    """按 [seatable] / [relay] 创建并初始化写入目标（认证、确认表结构）"""
+    monitor_conf = config.get("monitor", {})
+    heartbeat_interval = monitor_conf.get("heartbeat_interval", 600)
+    relay_conf = config.get("relay", {})
+    if relay_conf.get("role", "") == "agent":
+        # agent 不连 SeaTable，写入全部转发给聚合器
+        return RelayClient(relay_conf["url"], relay_conf.get("token", ""), machine)
+    seatable_conf = config["seatable"]
+    server_url = seatable_conf["server_url"]
+    table_name = seatable_conf.get("table_name", "任务监控")
     client = SeaTableClient(
-        server_url=config["seatable"]["server_url"],
-        api_token=config["seatable"]["api_token"],
-        table_name=config["seatable"].get("table_name", "任务监控"),
+        server_url=server_url,
+        api_token=seatable_conf["api_token"],
+        table_name=table_name,
+        row_cache=RowCache(default_cache_path(str(cache_dir), server_url, table_name)),
+        heartbeat_interval=heartbeat_interval,
+        transport=_build_transport(seatable_conf),
+        extra_columns=_extra_columns(analytics, resources),
+        schema_cache=SchemaCache(
+            default_cache_path(str(cache_dir), server_url, table_name, prefix="schema"),
+            ttl=seatable_conf.get("schema_cache_ttl", 86400),
+        ),
     )
     client.init()
-    logger.info("启动成功，机器=%s，间隔=%ds", machine, poll_interval)
+    return client
+
+
+# 只在启动时读取、热加载时不会生效的配置
+_RESTART_ONLY = (
+    ("monitor", "hostname"), ("monitor", "cache_dir"), ("monitor", "outbox_max_mb"),
+    ("monitor", "writer_queue_size"), ("monitor", "heartbeat_interval"),
+    ("relay", None), ("metrics", "port"), ("metrics", "host"), ("history", None),
+)
+
+
+# [seatable] 中需要重新认证的配置；只影响传输层的配置换用新的传输层即可
+_CONNECTION_KEYS = ("server_url", "api_token", "table_name")
+_TRANSPORT_KEYS = ("connect_timeout", "read_timeout", "rate_limit_per_minute", "max_retries")
+
+
+def _section(config: dict, name: str, key: str | None = None):
+    conf = config.get(name, {})
+    return conf if key is None else conf.get(key)
+
+
+def main():
+    if sys.argv[1:2] == ["history"]:
+        sys.exit(_history_main(sys.argv[2:]))
+
+    path = config_path()
+    config = load_config(path)
+    validate_config(config)
+    setup_logging(config.get("logging", {}))
+    monitor_conf = config.get("monitor", {})
+    machine = monitor_conf.get("hostname") or socket.gethostname()
+    poll_interval = monitor_conf.get("poll_interval", 30)
+
+    cache_dir = Path(monitor_conf.get("cache_dir", "~/.cache/seatable-monitor")).expanduser()
+    claude_conf = config.get("claude", {})
+    jsonparse.set_backend(claude_conf.get("json_backend", "auto"))
+    state = CollectorState(
+        tailer=SessionTailer(cache_dir / "sessions.json"),
+        panes=PaneTracker(config.get("tmux", {}).get("idle_timeout", 300)),
+        procs=_build_sampler(config),
+        analytics=_build_analytics(config, cache_dir),
+    )
+    relay_conf = config.get("relay", {})
+    role = relay_conf.get("role", "")
+    client = _build_client(config, machine, cache_dir, bool(state.analytics), bool(state.procs))
+    outbox = Outbox(
+        cache_dir / "outbox.sqlite3",
+        max_bytes=monitor_conf.get("outbox_max_mb", 64) * 1024 * 1024,
+    )
+    history_conf = config.get("history", {})
+    history = HistoryStore(
+        cache_dir / "history.sqlite3", retention_days=history_conf.get("retention_days", 90),
+    ) if history_conf.get("enabled", True) else None
+    writer = TaskWriter(
+        client, outbox, max_pending=monitor_conf.get("writer_queue_size", 10000),
+        flush_interval=relay_conf.get("flush_interval", 2) if role == "aggregator" else 0.5,
+        history=history,
+        heartbeat_interval=monitor_conf.get("heartbeat_interval", 600),
+    )
+    writer.start()
+    relay_server = None
+    if role == "aggregator":
+        relay_server = RelayServer(
+            relay_conf.get("listen", "tcp://127.0.0.1:7480"), writer, relay_conf.get("token", ""),
+        ).start()
+    metrics_conf = config.get("metrics", {})
+    if metrics_conf.get("port"):
+        start_http_server(metrics_conf["port"], metrics_conf.get("host", "127.0.0.1"))
+    logger.info("启动成功，机器=%s，间隔=%ds，JSON 后端=%s", machine, poll_interval, jsonparse.BACKEND)
 
     signal.signal(signal.SIGTERM, _handle_signal)
     signal.signal(signal.SIGINT, _handle_signal)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, _request_reload)
+    _watch_config_file(path, lambda: config.get("monitor", {}).get("config_check_interval", 5))
 
-    while _running:
-        try:
-            _run_once(config, client, machine)
-            client.refresh_auth_if_needed()
-        except Exception:
-            logger.exception("本轮采集出错，将在下次重试")
-        time.sleep(poll_interval)
+    while not _stop.is_set():
+        # 两种循环在收到重新加载请求时返回，应用新配置后按新的 mode / 调度重新进入
+        if config.get("monitor", {}).get("mode", "poll") == "watch":
+            _watch_loop(config, writer, machine, state)
+        else:
+            _poll_loop(config, writer, machine, state)
+        if _reload.is_set() and not _stop.is_set():
+            _reload.clear()
+            config = _reload_config(path, config, machine, cache_dir, state, writer)
 
+    if relay_server:
+        relay_server.stop()
+    writer.stop()
+    outbox.close()
+    if history:
+        history.close()
     logger.info("监控已停止")
 
 
-def _run_once(config: dict, client: SeaTableClient, machine: str):
-    # tmux 采集
-    prefixes = config.get("tmux", {}).get("session_prefixes", [])
-    if prefixes:
-        tasks = collect_by_prefixes(prefixes, machine)
-        active_sessions: dict[str, set] = {}
-        for t in tasks:
-            active_sessions.setdefault(t.session_id, set()).add(t.name)
-            client.upsert_task(t)
+def _reload_config(
+    path: Path, config: dict, machine: str, cache_dir: Path, state: CollectorState, writer: TaskWriter,
+) -> dict:
+    """重新读取并校验配置，全部成功后才生效，否则继续使用原配置。
+    采集参数（前缀、回溯时长、目录等）每轮从 config 读取，换上新 dict 即生效；调度器在重新进入循环时按新配置重建；
+    只有 SeaTable 地址、token 或表名变化时才重建客户端（重新认证）；超时、限速、重试只换传输层，
+    附加列变化沿用现有认证补齐表结构。对客户端的改动都在写入线程两次 flush 之间进行。
+    """
+    try:
+        new = load_config(path)
+        validate_config(new)
+    except Exception as e:
+        logger.error("重新加载配置失败，继续使用原配置：%s", e)
+        return config
+    if new == config:
+        logger.info("配置未变化")
+        return config
+
+    def changed(name: str, key: str | None = None) -> bool:
+        return _section(config, name, key) != _section(new, name, key)
 
-        # 标记已消失的 session 为"已结束"
-        all_current_sessions = set()
-        for session_id in active_sessions.keys():
-            all_current_sessions.add(session_id)
-        client.mark_ended_sessions("tmux", all_current_sessions, machine)
+    restart = [f"[{name}]" + (f" {key}" if key else "") for name, key in _RESTART_ONLY if changed(name, key)]
+    if restart:
+        logger.warning("以下配置需重启后生效：%s", "、".join(restart))
+
+    # 先创建可能失败的部分（新客户端需要认证），成功后再统一替换
+    analytics_changed = changed("claude", "analytics")
+    resources_changed = changed("tmux", "resources")
+    analytics = _build_analytics(new, cache_dir) if analytics_changed else state.analytics
+    procs = _build_sampler(new) if resources_changed else state.procs
+    client = None
+    columns_changed = bool(analytics) != bool(state.analytics) or bool(procs) != bool(state.procs)
+    direct = _section(config, "relay", "role") != "agent"
+    reconnect = direct and any(changed("seatable", key) for key in _CONNECTION_KEYS)
+    try:
+        if reconnect:
+            client = _build_client(
+                config | {"seatable": new.get("seatable", {})}, machine, cache_dir, bool(analytics), bool(procs),
+            )
+        elif direct and columns_changed:
+            writer.call_client("set_extra_columns", _extra_columns(bool(analytics), bool(procs)))
+    except Exception as e:
+        logger.error("按新配置连接 SeaTable 失败，继续使用原配置：%s", e)
+        if reconnect and writer.client.transport is not None:
+            writer.client.transport.install()  # 新客户端已接管 seatable_api 的 HTTP 调用，改回原传输层
+        if procs is not state.procs and procs:
+            procs.close()
+        return config
+
+    if analytics_changed:
+        if state.analytics:
+            state.analytics.save(prune=False)
+        state.analytics = analytics
+    elif state.analytics:
+        state.analytics.budget_bytes = int(new.get("claude", {}).get("analytics_mb_per_cycle", 256) * 1024 * 1024)
+    if resources_changed:
+        if state.procs:
+            state.procs.close()
+        state.procs = procs
+    seatable_conf = new.get("seatable", {})
+    if client is not None:
+        old_client = writer.client
+        writer.set_client(client)
+        if old_client.transport is not None:
+            old_client.transport.close()
+        logger.info("已切换到新的 SeaTable 连接：%s / %s", client.server_url, client.table_name)
+    elif direct and any(changed("seatable", key) for key in _TRANSPORT_KEYS):
+        writer.call_client("set_transport", _build_transport(seatable_conf))
+        logger.info("已按新的超时 / 限速 / 重试设置更换 SeaTable 传输层")
+    if direct and not reconnect and changed("seatable", "schema_cache_ttl"):
+        writer.client.schema_cache.ttl = seatable_conf.get("schema_cache_ttl", 86400)
+    state.panes.idle_timeout = new.get("tmux", {}).get("idle_timeout", 300)
+    if changed("claude", "json_backend"):
+        jsonparse.set_backend(new.get("claude", {}).get("json_backend", "auto"))
+    if changed("logging"):
+        setup_logging(new.get("logging", {}))
+    logger.info("配置已重新加载")
+    return new
+
+
+def _history_main(argv: list[str]) -> int:
+    """seatable-monitor history 子命令：历史库默认位于配置的 cache_dir 下"""
+    try:
+        monitor_conf = load_config().get("monitor", {})
+    except FileNotFoundError:
+        monitor_conf = {}
+    cache_dir = Path(monitor_conf.get("cache_dir", "~/.cache/seatable-monitor")).expanduser()
+    return history_cli(argv, default_db=cache_dir / "history.sqlite3")
+
+
+def _run_cycle(
+    config: dict, writer: TaskWriter, machine: str, state: CollectorState,
+    changes: Changes | None = None, budget: float | None = None,
+) -> dict[str, int] | None:
+    """执行一轮采集，返回各来源的内容指纹（出错时为 None）；每 summary_every 轮输出一行指标摘要。
+    budget 为本轮可用时间（到下次计划采集的间隔），超出部分记为 cycle_overrun_seconds
+    """
+    begin_cycle()
+    start = time.perf_counter()
+    fingerprints = None
+    try:
+        with METRICS.timer("cycle"):
+            fingerprints = _run_once(config, writer, machine, state, changes)
+    except Exception as e:
+        METRICS.inc("cycle_errors_total", type=type(e).__name__)
+        logger.exception("本轮采集出错，将在下次重试")
+    elapsed = time.perf_counter() - start
+    METRICS.set_gauge("last_cycle_seconds", elapsed)
+    if budget is not None:
+        overrun = max(0.0, elapsed - budget)
+        METRICS.set_gauge("cycle_overrun_seconds", overrun)
+        if overrun:
+            METRICS.inc("cycle_overruns_total")
+    state.cycles += 1
+    summary_every = config.get("metrics", {}).get("summary_every", 20)
+    if summary_every and state.cycles % summary_every == 0:
+        logger.info("指标摘要：%s", METRICS.summary())
+    return fingerprints
+
+
+# 调度单位 → 本轮要采集的来源（todos 与 tasks 一起采，才能对账 claude-code）
+_JOB_SOURCES: dict[str, Changes] = {
+    "tmux": {"tmux": None},
+    "claude-code": {"todos": None, "tasks": None},
+    "sessions": {"sessions": None},
+}
+
+
+def _build_scheduler(config: dict) -> Scheduler:
+    """[schedule] 未配置的来源使用默认值；min 缺省取 poll_interval（tmux 为 5 秒）"""
+    poll_interval = config.get("monitor", {}).get("poll_interval", 30)
+    schedule_conf = config.get("schedule", {})
+    defaults = {
+        "tmux": (min(5, poll_interval), max(60, poll_interval)),
+        "claude-code": (poll_interval, max(300, poll_interval)),
+        "sessions": (poll_interval, max(120, poll_interval)),
+    }
+    jobs = []
+    for name, (min_default, max_default) in defaults.items():
+        conf = schedule_conf.get(name.replace("-", "_"), {})
+        min_interval = conf.get("min", min_default)
+        jobs.append(Job(
+            name,
+            min_interval=min_interval,
+            max_interval=conf.get("max", max(max_default, min_interval)),
+            deadline=conf.get("deadline", min_interval),
+        ))
+    return Scheduler(jobs)
+
+
+def _poll_loop(config: dict, writer: TaskWriter, machine: str, state: CollectorState):
+    """poll 模式：各来源按各自（自适应的）间隔采集，触发时刻对齐墙钟；收到重新加载请求时返回"""
+    scheduler = _build_scheduler(config)
+    wake = threading.Event()
+    _wakers.append(wake.set)
+    try:
+        while not (_stop.is_set() or _reload.is_set()):
+            _poll_once(config, writer, machine, state, scheduler)
+            wake.wait(max(0.0, scheduler.next_wakeup() - time.time()))
+            wake.clear()
+    finally:
+        _wakers.remove(wake.set)
+
+
+def _poll_once(config: dict, writer: TaskWriter, machine: str, state: CollectorState, scheduler: Scheduler):
+    now = time.time()
+    due = scheduler.due(now)
+    if not due:
+        return
+    for job in due:
+        METRICS.set_gauge("schedule_lag_seconds", now - job.next_run, source=job.name)
+    changes: Changes = {}
+    for job in due:
+        changes.update(_JOB_SOURCES[job.name])
+    fingerprints = _run_cycle(config, writer, machine, state, changes, min(job.interval for job in due))
+    finished = time.time()
+    for job in due:
+        scheduler.done(job, None if fingerprints is None else fingerprints.get(job.name, 0), finished)
+
+
+def _watch_loop(config: dict, writer: TaskWriter, machine: str, state: CollectorState):
+    """watch 模式：监听 Claude 目录变化即时采集变化的部分；
+    tmux 与近期活跃会话（用于判定空闲）按 poll_interval 定时采集，
+    每 sweep_interval 秒做一次全量扫描兜底。收到重新加载请求时返回，重新进入时先做一次全量扫描。
+    """
+    monitor_conf = config.get("monitor", {})
+    claude_conf = config.get("claude", {})
+    poll_interval = monitor_conf.get("poll_interval", 30)
+    sweep_interval = monitor_conf.get("sweep_interval", 600)
+    idle_timeout = claude_conf.get("idle_timeout", 300)
+
+    watcher = create_watcher(
+        {
+            "todos": (Path(claude_conf.get("todos_dir", "~/.claude/todos")).expanduser(), False),
+            "tasks": (Path(claude_conf.get("tasks_dir", "~/.claude/tasks")).expanduser(), True),
+            "sessions": (Path(claude_conf.get("projects_dir", "~/.claude/projects")).expanduser(), True),
+        },
+        debounce=monitor_conf.get("debounce", 0.5),
+        fallback_interval=poll_interval,
+    )
+    _wakers.append(watcher.wake)
+    recent_projects: dict[Path, float] = {}  # 近期有变化的项目目录 → 最后变化时间
+    next_tick = next_sweep = 0.0
+    changes: Changes = {}
+    try:
+        while not (_stop.is_set() or _reload.is_set()):
+            now = time.monotonic()
+            if now >= next_sweep:
+                run_changes = None
+                next_sweep = now + sweep_interval
+                next_tick = now + poll_interval
+            else:
+                run_changes = dict(changes)
+                if now >= next_tick:
+                    next_tick = now + poll_interval
+                    run_changes["tmux"] = None
+                    # 重新评估近期活跃会话，使其在空闲后转为"已完成"
+                    for proj, ts in list(recent_projects.items()):
+                        if now - ts > idle_timeout + poll_interval:
+                            del recent_projects[proj]
+                    if recent_projects and run_changes.get("sessions", set()) is not None:
+                        run_changes["sessions"] = run_changes.get("sessions", set()) | set(recent_projects)
+
+            for proj in changes.get("sessions") or ():
+                recent_projects[proj] = now
+            if run_changes is None or run_changes:
+                _run_cycle(config, writer, machine, state, run_changes, poll_interval)
+
+            changes = watcher.wait(min(next_tick, next_sweep) - time.monotonic())
+    finally:
+        _wakers.remove(watcher.wake)
+        watcher.close()
+
+
+def _run_once(
+    config: dict, writer: TaskWriter, machine: str, state: CollectorState | None = None,
+    changes: Changes | None = None,
+) -> dict[str, int]:
+    """采集一轮并提交给写入线程。changes 为 None 表示全量；否则只采集其中列出的来源/路径。
+    返回本轮采集到的各来源（tmux / claude-code / sessions）的内容指纹，供调度器判断是否有变化。
+    """
+    if state is None:
+        state = CollectorState()
+    fingerprints: dict[str, int] = {}
+
+    def wanted(source: str) -> bool:
+        return changes is None or source in changes
+
+    def changed_paths(source: str) -> set[Path] | None:
+        return None if changes is None else changes.get(source)
+
+    retention_days = config.get("monitor", {}).get("retention_days", 0)
+
+    def reconcile(source: str, keys: set[tuple[str, str]]):
+        """全量采集后：服务端有而本轮没有的行标记为已结束（在写入线程中执行）"""
+        writer.submit_op(
+            f"reconcile:{source}:{machine}", "reconcile_source",
+            source, machine, sorted(keys), retention_days,
+        )
+
+    # tmux 采集
+    tmux_conf = config.get("tmux", {})
+    prefixes = tmux_conf.get("session_prefixes", [])
+    if prefixes and wanted("tmux"):
+        with METRICS.timer("collect_tmux"):
+            tasks = collect_by_prefixes(
+                prefixes, machine,
+                per_pane=tmux_conf.get("per_pane", False),
+                workers=tmux_conf.get("capture_workers", 8),
+                tracker=state.panes,
+                sampler=state.procs,
+            )
+        METRICS.inc("tasks_collected_total", len(tasks), source="tmux")
+        tally = _Tally()
+        writer.submit(tally.track(tasks))
+        reconcile("tmux", tally.keys)
+        fingerprints["tmux"] = tally.fingerprint
 
     # Claude Code 采集
     claude_conf = config.get("claude", {})
     if claude_conf.get("enabled", True):
         lookback = claude_conf.get("lookback_hours", 5)
         idle_timeout = claude_conf.get("idle_timeout", 300)
-        todos = collect_todos(claude_conf.get("todos_dir", "~/.claude/todos"), machine, lookback)
-        task_list = collect_tasks(claude_conf.get("tasks_dir", "~/.claude/tasks"), machine, lookback)
-        sessions = collect_sessions(
-            claude_conf.get("projects_dir", "~/.claude/projects"),
-            machine, lookback, idle_timeout,
-        )
-        for t in todos + task_list + sessions:
-            client.upsert_task(t)
+        # todos / tasks / sessions 以生成器边采集边落盘，只保留对账需要的键
+        claude = _Tally()
+        if wanted("todos"):
+            with METRICS.timer("collect_todos"):
+                n = writer.submit(claude.track(iter_todos(
+                    claude_conf.get("todos_dir", "~/.claude/todos"), machine, lookback,
+                    changed_paths("todos"), state.scanner,
+                )))
+            METRICS.inc("tasks_collected_total", n, source="todos")
+        if wanted("tasks"):
+            with METRICS.timer("collect_tasks"):
+                n = writer.submit(claude.track(iter_tasks(
+                    claude_conf.get("tasks_dir", "~/.claude/tasks"), machine, lookback,
+                    changed_paths("tasks"), state.scanner,
+                ), links=True))
+            METRICS.inc("tasks_collected_total", n, source="tasks")
+            # 全量与增量共用一个 key：未执行的旧请求被新的替换，漏掉的团队在下次全量时补上
+            writer.submit_op(
+                f"links:claude-code:{machine}", "reconcile_links",
+                "claude-code", machine, sorted([*k, p] for k, p in claude.links.items()),
+            )
+        if wanted("todos") or wanted("tasks"):
+            fingerprints["claude-code"] = claude.fingerprint
+        if wanted("sessions"):
+            session_tally = _Tally()
+            with METRICS.timer("collect_sessions"):
+                n = writer.submit(session_tally.track(iter_sessions(
+                    claude_conf.get("projects_dir", "~/.claude/projects"),
+                    machine, lookback, idle_timeout, state.tailer, changed_paths("sessions"),
+                    workers=claude_conf.get("scan_workers", 1),
+                    deadline=claude_conf.get("scan_deadline", 20),
+                    analytics=state.analytics,
+                )))
+            METRICS.inc("tasks_collected_total", n, source="sessions")
+            fingerprints["sessions"] = session_tally.fingerprint
+
+        # 只有整个来源都是全量采集时才能对账
+        if wanted("todos") and wanted("tasks") \
+                and changed_paths("todos") is None and changed_paths("tasks") is None:
+            reconcile("claude-code", claude.keys)
+        if wanted("sessions") and changed_paths("sessions") is None and state.tailer.complete:
+            reconcile("claude-session", session_tally.keys)
+    return fingerprints
+
+
+class _Tally:
+    """原样转发提交的行，顺便记录对账需要的 (任务名, 会话ID)、父任务关系与整批内容的指纹"""
+
+    def __init__(self):
+        self.keys: set[tuple[str, str]] = set()
+        self.links: dict[tuple[str, str], str] = {}  # (任务名, 会话ID) → 父任务行名，无父任务为空串
+        self.fingerprint = 0
+
+    def track(self, tasks: Iterable[TaskInfo], links: bool = False) -> Iterator[TaskInfo]:
+        fp = self.fingerprint
+        for t in tasks:
+            self.keys.add((t.name, t.session_id))
+            if links:
+                self.links[(t.name, t.session_id)] = t.parent_name or ""
+            # 与顺序无关的累加；字符串的 hash 有缓存，代价很小
+            fp = (fp + hash((t.name, t.session_id, t.status, t.latest_output))) & _FINGERPRINT_MASK
+            yield t
+        self.fingerprint = fp
 
 
 if __name__ == "__main__":
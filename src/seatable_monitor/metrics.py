@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "seatable_monitor_"
+
+# 指标说明，渲染为 # HELP；未列出的指标以名称代替
+HELP = {
+    "api_requests_total": "SeaTable API 请求数",
+    "api_errors_total": "SeaTable API 请求失败数",
+    "cycle_errors_total": "出错的采集轮数",
+    "cycle_overruns_total": "耗时超过调度间隔的采集轮数",
+    "tasks_collected_total": "采集到的行数",
+    "rows_written_total": "写入 SeaTable 的行数",
+    "rows_skipped_total": "内容未变、跳过写入的行数",
+    "rows_unchanged_total": "内容未变、未进入 outbox 的行数",
+    "rows_dropped_total": "outbox 已满而丢弃的行数",
+    "runs_skipped_total": "超过 deadline 而跳过的调度次数",
+    "scan_timeouts_total": "项目目录并行扫描超时次数",
+    "schema_cache_total": "表结构快照命中 / 未命中次数",
+    "session_stats_bytes_total": "会话全量统计读取的字节数",
+    "links_updated_total": "更新的父任务关联数",
+    "link_reconcile_skipped_total": "无需访问服务端的父任务对账次数",
+    "relay_requests_total": "agent 发往聚合器的请求数",
+    "relay_rows_received_total": "聚合器收到的行数",
+    "relay_errors_total": "中继请求处理失败数",
+    "log_suppressed_total": "按轮去重省略的日志条数",
+    "log_dropped_total": "日志队列已满而丢弃的条数",
+    "queue_depth": "outbox 中待写的行与操作数",
+    "last_cycle_seconds": "最近一轮采集耗时（秒）",
+    "cycle_overrun_seconds": "最近一轮采集超出调度间隔的秒数",
+    "schedule_interval_seconds": "各来源当前的调度间隔（秒）",
+    "schedule_lag_seconds": "各来源实际开始时间比计划晚多少秒",
+    "stage_seconds": "各阶段耗时（秒）",
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt(name: str, labels: Labels) -> str:
+    if not labels:
+        return PREFIX + name
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return f"{PREFIX}{name}{{{inner}}}"
+
+
+def _max_name(name: str) -> str:
+    """耗时最大值的指标名：stage_seconds → stage_max_seconds"""
+    return name[:-len("_seconds")] + "_max_seconds" if name.endswith("_seconds") else name + "_max"
+
+
+class Metrics:
+    """进程内指标：计数器、仪表、耗时摘要（count/sum/max），可渲染为 Prometheus 文本格式"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._gauges: dict[tuple[str, Labels], float] = {}
+        self._timings: dict[tuple[str, Labels], list] = {}  # [count, sum, max]
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            t = self._timings.get(key)
+            if t is None:
+                self._timings[key] = [1, seconds, seconds]
+            else:
+                t[0] += 1
+                t[1] += seconds
+                t[2] = max(t[2], seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """记录一个阶段的耗时到 stage_seconds{stage=...}"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, stage=stage)
+
+    def render(self) -> str:
+        """Prometheus 文本格式：每个指标族带 # HELP / # TYPE；耗时为 summary（_count / _sum），
+        最大值另作一个 gauge 族（stage_seconds → stage_max_seconds）
+        """
+        families: dict[str, tuple[str, str, list[str]]] = {}  # 族名 → (类型, 说明, 样本行)
+
+        def add(name: str, kind: str, sample: str, help_text: str | None = None):
+            families.setdefault(name, (kind, help_text or HELP.get(name, name), []))[2].append(sample)
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                add(name, "counter", f"{_fmt(name, labels)} {value:g}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                add(name, "gauge", f"{_fmt(name, labels)} {value:g}")
+            for (name, labels), (count, total, peak) in sorted(self._timings.items()):
+                add(name, "summary", f"{_fmt(name + '_count', labels)} {count}")
+                add(name, "summary", f"{_fmt(name + '_sum', labels)} {total:.6f}")
+                peak_name = _max_name(name)
+                add(peak_name, "gauge", f"{_fmt(peak_name, labels)} {peak:.6f}", HELP.get(name, name) + "的最大值")
+        lines = []
+        for name, (kind, help_text, samples) in families.items():
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+            lines += samples
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """一行摘要：各阶段平均耗时 + 主要计数器"""
+        with self._lock:
+            stages = " ".join(
+                f"{dict(labels).get('stage', name)}={total / count * 1000:.0f}ms"
+                for (name, labels), (count, total, _) in sorted(self._timings.items())
+                if name == "stage_seconds" and count
+            )
+            counters: dict[str, float] = {}
+            for (name, _), value in self._counters.items():
+                counters[name] = counters.get(name, 0) + value
+            gauges = {name: value for (name, labels), value in self._gauges.items() if not labels}
+        parts = [stages] if stages else []
+        parts += [f"{name}={value:g}" for name, value in sorted(counters.items())]
+        parts += [f"{name}={value:g}" for name, value in sorted(gauges.items())]
+        return " ".join(parts)
+
+
+METRICS = Metrics()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = METRICS.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """在后台线程提供 /metrics"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("指标端点已启动：http://%s:%d/metrics", host, server.server_port)
+    return server
@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+import hashlib
+import sys
+from dataclasses import dataclass, fields
 
 
 STATUS_MAP = {
@@ -8,7 +10,7 @@ STATUS_MAP = {
 }
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TaskInfo:
     name: str               # 任务描述
     status: str             # "待办" / "进行中" / "已完成" / "未知"
@@ -17,3 +19,33 @@ class TaskInfo:
     latest_output: str      # 最新输出/进度描述
     parent_name: str | None # 父任务名（用于自关联 link）
     machine: str            # hostname
+    extra: tuple[tuple[str, object], ...] = ()  # 附加列 (列名, 值)，如会话统计
+
+    def key(self) -> tuple[str, str, str]:
+        """upsert 去重键：(任务名, 会话ID, 机器)"""
+        return (self.name, self.session_id, self.machine)
+
+    def row_hash(self) -> str:
+        """行内容指纹：状态 + 来源 + 最新输出 + 附加列（不含更新时间）"""
+        raw = "\x1f".join((self.status, self.source, self.latest_output, *(f"{k}={v}" for k, v in self.extra)))
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+    def to_dict(self) -> dict:
+        return {f: getattr(self, f) for f in FIELDS}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "TaskInfo":
+        """从 outbox / 中继消息还原；重复度高的字段做 intern，大批量时各行共享同一份字符串"""
+        return cls(
+            name=d["name"],
+            status=sys.intern(d["status"]),
+            source=sys.intern(d["source"]),
+            session_id=sys.intern(d["session_id"]),
+            latest_output=d["latest_output"],
+            parent_name=d.get("parent_name"),
+            machine=sys.intern(d["machine"]),
+            extra=tuple((k, v) for k, v in d.get("extra") or ()),
+        )
+
+
+FIELDS = tuple(f.name for f in fields(TaskInfo))
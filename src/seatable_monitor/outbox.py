@@ -0,0 +1,158 @@
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from .models import TaskInfo
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    name TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    machine TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    task TEXT NOT NULL,
+    PRIMARY KEY (name, session_id, machine)
+);
+CREATE INDEX IF NOT EXISTS rows_seq ON rows (seq);
+CREATE TABLE IF NOT EXISTS ops (
+    key TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    method TEXT NOT NULL,
+    args TEXT NOT NULL
+);
+"""
+
+
+class Outbox:
+    """待写入 SeaTable 的本地预写队列（SQLite）。
+
+    - rows 以 (任务名, 会话ID, 机器) 为主键，重复写入只保留最新状态（按行压缩）
+    - ops 保存 mark_ended_sessions 等客户端操作，按 key 只保留最新一次
+    - 文件超过 max_bytes 时丢弃最旧的行
+    path 为 None 时使用内存数据库（不持久化）。
+    """
+
+    def __init__(self, path: Path | None = None, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            str(path) if path else ":memory:", check_same_thread=False, isolation_level=None,
+        )
+        self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(_SCHEMA)
+        row = self._db.execute(
+            "SELECT MAX(seq) FROM (SELECT seq FROM rows UNION ALL SELECT seq FROM ops)"
+        ).fetchone()
+        self._seq = row[0] or 0
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    @contextmanager
+    def _transaction(self):
+        """出错时回滚，连接不会停在未结束的事务里"""
+        self._db.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def put_tasks(self, tasks: list[TaskInfo], max_rows: int | None = None) -> list[tuple[str, str, str]]:
+        """写入行快照，返回因超出 max_rows 或文件大小上限而丢弃的行的 key；替换已在队列中的行不占新名额"""
+        dropped = []
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+            with self._transaction():
+                for t in tasks:
+                    key = t.key()
+                    if max_rows is not None:
+                        exists = self._db.execute(
+                            "SELECT 1 FROM rows WHERE name=? AND session_id=? AND machine=?", key,
+                        ).fetchone()
+                        if not exists:
+                            if count >= max_rows:
+                                dropped.append(key)
+                                continue
+                            count += 1
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?)",
+                        (*key, self._next_seq(), json.dumps(t.to_dict(), ensure_ascii=False)),
+                    )
+            dropped += self._enforce_size()
+        return dropped
+
+    def put_op(self, key: str, method: str, args: list):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO ops VALUES (?, ?, ?, ?)",
+                (key, self._next_seq(), method, json.dumps(args, ensure_ascii=False)),
+            )
+
+    def peek_tasks(self, limit: int) -> list[tuple[int, TaskInfo]]:
+        """按写入顺序取出最多 limit 行（不删除）"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, task FROM rows ORDER BY seq LIMIT ?", (limit,)
+            ).fetchall()
+        return [(seq, TaskInfo.from_dict(json.loads(task))) for seq, task in rows]
+
+    def ack_tasks(self, acked: list[tuple[int, TaskInfo]]):
+        """删除已写入的行；期间被更新过（seq 变化）的行保留"""
+        with self._lock, self._transaction():
+            self._db.executemany(
+                "DELETE FROM rows WHERE name=? AND session_id=? AND machine=? AND seq=?",
+                [(*t.key(), seq) for seq, t in acked],
+            )
+
+    def peek_ops(self) -> list[tuple[str, int, str, list]]:
+        with self._lock:
+            rows = self._db.execute("SELECT key, seq, method, args FROM ops ORDER BY seq").fetchall()
+        return [(key, seq, method, json.loads(args)) for key, seq, method, args in rows]
+
+    def ack_op(self, key: str, seq: int):
+        with self._lock:
+            self._db.execute("DELETE FROM ops WHERE key=? AND seq=?", (key, seq))
+
+    def pending_rows(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT (SELECT COUNT(*) FROM rows) + (SELECT COUNT(*) FROM ops)"
+            ).fetchone()[0]
+
+    def _size(self) -> int:
+        page_count = self._db.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self._db.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size
+
+    def _enforce_size(self) -> list[tuple[str, str, str]]:
+        """超过 max_bytes 时丢弃最旧的 10% 行，返回它们的 key"""
+        if self._size() <= self.max_bytes:
+            return []
+        total = self._db.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+        oldest = self._db.execute(
+            "SELECT seq, name, session_id, machine FROM rows ORDER BY seq LIMIT ?", (max(1, total // 10),),
+        ).fetchall()
+        self._db.executemany("DELETE FROM rows WHERE seq=?", [(row[0],) for row in oldest])
+        evicted = [row[1:] for row in oldest]
+        self._db.execute("PRAGMA incremental_vacuum")
+        logger.warning("outbox 超过 %d 字节，已丢弃最旧的 %d 行", self.max_bytes, len(evicted))
+        return evicted
+
+    def close(self):
+        with self._lock:
+            self._db.close()
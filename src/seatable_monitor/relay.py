@@ -0,0 +1,220 @@
+"""中继模式：各机器以 agent 身份把行快照发给聚合器，由聚合器统一写 SeaTable。
+
+协议为 TCP 或 Unix socket 上的逐行 JSON，一问一答：
+    {"token", "machine", "fields": [...], "rows": [[...], ...]}  行快照（按 fields 顺序）
+    {"token", "machine", "op": "reconcile_source", "args": [...]}  客户端操作
+    响应 {"ok": true} / {"ok": false, "error": "..."}
+聚合器把数据落到自己的 outbox 后才回 ok，agent 收到 ok 才从本地 outbox 删除，任一端重启都不丢数据。
+"""
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from .metrics import METRICS
+from .models import FIELDS, TaskInfo
+
+logger = logging.getLogger(__name__)
+
+# agent 可以请求聚合器执行的操作 → 参数中机器名的位置
+OPS = {"reconcile_source": 1, "mark_ended_sessions": 2, "reconcile_links": 1}
+MAX_LINE = 64 * 1024 * 1024
+
+
+class RelayError(Exception):
+    """聚合器拒绝了请求或返回了无法解析的响应"""
+
+
+def parse_address(url: str) -> tuple[int, str | tuple[str, int]]:
+    """unix:///path/to.sock → (AF_UNIX, path)；tcp://host:port 或 host:port → (AF_INET, (host, port))"""
+    if url.startswith("unix://"):
+        return socket.AF_UNIX, url[len("unix://"):]
+    host, _, port = url.removeprefix("tcp://").rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class RelayClient:
+    """agent 端：实现 TaskWriter 用到的 SeaTableClient 接口，把写入转发给聚合器。
+    内容未变的行已由本机 TaskWriter 过滤，这里收到多少行就发送多少行。
+    """
+
+    def __init__(self, url: str, token: str = "", machine: str = "", timeout: float = 30):
+        self.url = url
+        self.token = token
+        self.machine = machine
+        self.timeout = timeout
+        self._sock: socket.socket | None = None
+        self._file = None
+
+    def _connect(self):
+        family, address = parse_address(self.url)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(address)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+
+    def close(self):
+        if self._sock:
+            self._file.close()
+            self._sock.close()
+            self._sock = self._file = None
+
+    def _call(self, msg: dict):
+        msg["token"] = self.token
+        msg["machine"] = self.machine
+        data = json.dumps(msg, ensure_ascii=False).encode() + b"\n"
+        try:
+            if self._sock is None:
+                self._connect()
+            self._file.write(data)
+            self._file.flush()
+            line = self._file.readline(MAX_LINE)
+        except OSError:
+            self.close()
+            raise
+        if not line:
+            self.close()
+            raise ConnectionError("聚合器关闭了连接")
+        try:
+            resp = json.loads(line)
+        except ValueError:
+            self.close()
+            raise RelayError(f"无法解析聚合器响应：{line[:200]!r}")
+        if not resp.get("ok"):
+            raise RelayError(resp.get("error", "未知错误"))
+        METRICS.inc("relay_requests_total")
+        return resp
+
+    def upsert_tasks(self, tasks: list[TaskInfo]):
+        if tasks:
+            self._call({"fields": list(FIELDS), "rows": [[getattr(t, f) for f in FIELDS] for t in tasks]})
+
+    def reconcile_source(self, *args):
+        self._call({"op": "reconcile_source", "args": list(args)})
+
+    def mark_ended_sessions(self, *args):
+        self._call({"op": "mark_ended_sessions", "args": list(args)})
+
+    def reconcile_links(self, *args):
+        self._call({"op": "reconcile_links", "args": list(args)})
+
+    def refresh_auth_if_needed(self):
+        """agent 不直接访问 SeaTable，无需 token"""
+
+
+class RelayServer:
+    """聚合器端：接收各 agent 的数据放入本机 TaskWriter，由它合并后批量写 SeaTable"""
+
+    def __init__(self, listen: str, writer, token: str = ""):
+        self.listen = listen
+        self.writer = writer
+        self.token = token
+        self._server: socketserver.BaseServer | None = None
+
+    def start(self) -> "RelayServer":
+        family, address = parse_address(self.listen)
+        if family == socket.AF_INET and not self.token and not _is_loopback(address[0]):
+            raise ValueError(f"[relay] 监听非本机地址 {self.listen} 时必须设置 token")
+        relay = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    line = self.rfile.readline(MAX_LINE)
+                    if not line:
+                        return
+                    resp = relay._handle_line(line)
+                    self.wfile.write(json.dumps(resp, ensure_ascii=False).encode() + b"\n")
+                    self.wfile.flush()
+
+        if family == socket.AF_UNIX:
+            if os.path.exists(address):
+                os.unlink(address)  # 上次未清理的 socket 文件
+            # 开始监听前收紧权限，只有本用户能连接（其他本机用户无法冒充本机 agent）
+            self._server = _UnixServer(address, Handler, bind_and_activate=False)
+            try:
+                self._server.server_bind()
+                os.chmod(address, 0o600)
+                self._server.server_activate()
+            except OSError:
+                self._server.server_close()
+                raise
+        else:
+            self._server = _TCPServer(address, Handler)
+        threading.Thread(target=self._server.serve_forever, name="relay-server", daemon=True).start()
+        logger.info("中继聚合器已监听 %s", self.listen)
+        return self
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            family, address = parse_address(self.listen)
+            if family == socket.AF_UNIX and os.path.exists(address):
+                os.unlink(address)
+
+    def _handle_line(self, line: bytes) -> dict:
+        try:
+            msg = json.loads(line)
+            if not hmac.compare_digest(str(msg.get("token", "")), self.token):
+                METRICS.inc("relay_errors_total", type="auth")
+                return {"ok": False, "error": "token 不匹配"}
+            machine = msg.get("machine")
+            if not isinstance(machine, str) or not machine:
+                METRICS.inc("relay_errors_total", type="machine")
+                return {"ok": False, "error": "缺少 machine"}
+            if "rows" in msg:
+                # 按字段名还原，本端不认识的字段忽略，新版本 agent 也能发给旧版本聚合器
+                fields = msg["fields"]
+                tasks = [TaskInfo.from_dict(dict(zip(fields, row))) for row in msg["rows"]]
+                # agent 只能写自己机器的行，整批拒绝，避免部分写入
+                if any(t.machine != machine for t in tasks):
+                    METRICS.inc("relay_errors_total", type="machine")
+                    return {"ok": False, "error": f"行的机器与 agent 不一致：{machine}"}
+                self.writer.submit(tasks)
+                METRICS.inc("relay_rows_received_total", len(tasks))
+                return {"ok": True}
+            method, args = msg["op"], msg.get("args", [])
+            if method not in OPS:
+                return {"ok": False, "error": f"不支持的操作：{method}"}
+            if len(args) <= OPS[method] or args[OPS[method]] != machine:
+                METRICS.inc("relay_errors_total", type="machine")
+                return {"ok": False, "error": f"操作的机器与 agent 不一致：{machine}"}
+            # 同一来源、同一机器的操作只保留最新一次（与本机 submit_op 的 key 规则一致）
+            key = f"relay:{method}:{args[0]}:{machine}"
+            self.writer.submit_op(key, method, *args)
+            return {"ok": True}
+        except Exception as e:
+            METRICS.inc("relay_errors_total", type=type(e).__name__)
+            logger.warning("中继请求处理失败：%s", e)
+            return {"ok": False, "error": repr(e)}
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+RowKey = tuple[str, str, str]  # (任务名, 会话ID, 机器)
+
+
+def default_cache_path(cache_dir: str, server_url: str, table_name: str, prefix: str = "rows") -> Path:
+    """按 (服务器, 表) 区分缓存文件，切换表时不会串用旧索引"""
+    digest = hashlib.md5(f"{server_url}|{table_name}".encode("utf-8")).hexdigest()[:12]
+    return Path(cache_dir).expanduser() / f"{prefix}-{digest}.json"
+
+
+class RowCache:
+    """本地持久化行索引：(任务名, 会话ID, 机器) → (_id, 内容指纹, 上次写入时间)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._rows: dict[RowKey, list] = {}  # key → [row_id, hash, touched]
+        self._machines: set[str] = set()     # 已与服务端对账过的机器
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except Exception:
+            logger.warning("行索引缓存损坏，已忽略：%s", self.path)
+            return
+        if data.get("version") != CACHE_VERSION:
+            return
+        for name, session_id, machine, row_id, h, touched in data.get("rows", []):
+            self._rows[(name, session_id, machine)] = [row_id, h, touched]
+        # 启动时仍需对账，这里不恢复 _machines
+
+    def save(self):
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": CACHE_VERSION,
+            "rows": [[*key, *entry] for key, entry in self._rows.items()],
+        }
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False))
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    def has_machine(self, machine: str) -> bool:
+        return machine in self._machines
+
+    def invalidate(self):
+        """下次写入前强制重新对账"""
+        self._machines.clear()
+
+    def reconcile(self, machine: str, server_ids: dict[RowKey, str]):
+        """以服务端为准：更新 _id，丢弃远端已删除的行"""
+        dropped = 0
+        for key in [k for k in self._rows if k[2] == machine]:
+            if key not in server_ids:
+                del self._rows[key]
+                dropped += 1
+        for key, row_id in server_ids.items():
+            entry = self._rows.get(key)
+            if entry is None:
+                # 服务端有但本地没有：指纹未知，下次必写一次
+                self._rows[key] = [row_id, "", 0]
+            elif entry[0] != row_id:
+                self._rows[key] = [row_id, "", 0]
+        self._machines.add(machine)
+        self._dirty = True
+        if dropped:
+            logger.info("行索引对账：机器=%s，移除 %d 个远端已删除的行", machine, dropped)
+
+    def row_id(self, key: RowKey) -> str | None:
+        entry = self._rows.get(key)
+        return entry[0] if entry else None
+
+    def is_fresh(self, key: RowKey, h: str, now: float, heartbeat_interval: float) -> bool:
+        """内容未变且未到心跳时间 → 可跳过写入"""
+        entry = self._rows.get(key)
+        return bool(entry) and entry[1] == h and now - entry[2] < heartbeat_interval
+
+    def mark_written(self, key: RowKey, row_id: str, h: str, now: float):
+        self._rows[key] = [row_id, h, now]
+        self._dirty = True
+
+    def invalidate_row(self, key: RowKey):
+        """服务端该行被改写过（如标记已结束），下次写入时不再跳过"""
+        entry = self._rows.get(key)
+        if entry:
+            entry[1] = ""
+            self._dirty = True
+
+    def forget(self, key: RowKey):
+        if self._rows.pop(key, None) is not None:
+            self._dirty = True
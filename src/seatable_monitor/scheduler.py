@@ -0,0 +1,80 @@
+import math
+import time
+from dataclasses import dataclass
+from .metrics import METRICS
+
+# 可选的间隔档位（秒），都能整除一分钟或一小时，便于对齐墙钟
+_STEPS = (1, 2, 5, 10, 15, 20, 30, 60, 120, 180, 300, 600, 900, 1800, 3600)
+
+
+def next_aligned(now: float, interval: float) -> float:
+    """now 之后第一个 interval 整数倍的墙钟时刻（interval=10 → 每分钟 :00 :10 :20 ...）"""
+    return (math.floor(now / interval) + 1) * interval
+
+
+@dataclass
+class Job:
+    """一个采集来源的调度状态"""
+    name: str
+    min_interval: float
+    max_interval: float
+    deadline: float          # 到点后最多推迟多少秒仍执行，超过则跳过这一次
+    interval: float = 0.0
+    next_run: float = 0.0    # 墙钟时间（time.time()）
+    fingerprint: int | None = None
+
+    def __post_init__(self):
+        self.max_interval = max(self.max_interval, self.min_interval)
+        self.interval = self.interval or self.min_interval
+
+    def steps(self) -> list[float]:
+        inner = [s for s in _STEPS if self.min_interval < s < self.max_interval]
+        return [self.min_interval, *inner, self.max_interval] if self.max_interval > self.min_interval \
+            else [self.min_interval]
+
+
+class Scheduler:
+    """按来源分别调度的自适应轮询。
+
+    - 每个来源有自己的间隔：本次结果与上次不同则直接回到 min_interval，
+      没有变化则升一档，最长到 max_interval
+    - 触发时刻对齐到墙钟的 interval 整数倍
+    - 前面的运行拖太久、到点后超过 deadline 才轮到时跳过这一次，对齐到下一个时刻，不补跑
+    """
+
+    def __init__(self, jobs: list[Job]):
+        self.jobs = {job.name: job for job in jobs}
+        now = time.time()
+        for job in jobs:
+            job.next_run = job.next_run or now  # 启动后立即跑一轮
+
+    def due(self, now: float | None = None) -> list[Job]:
+        """返回到点的来源；错过 deadline 的直接改到下一个时刻"""
+        now = time.time() if now is None else now
+        due = []
+        for job in self.jobs.values():
+            if job.next_run > now:
+                continue
+            if now - job.next_run > job.deadline:
+                METRICS.inc("runs_skipped_total", source=job.name)
+                job.next_run = next_aligned(now, job.interval)
+                continue
+            due.append(job)
+        return due
+
+    def next_wakeup(self) -> float:
+        return min(job.next_run for job in self.jobs.values())
+
+    def done(self, job: Job, fingerprint: int | None, now: float | None = None):
+        """记录一次运行结果并安排下一次；fingerprint 为 None 表示本次出错，保持原间隔"""
+        now = time.time() if now is None else now
+        if fingerprint is not None and job.fingerprint is not None:
+            if fingerprint != job.fingerprint:
+                job.interval = job.min_interval
+            else:
+                higher = [s for s in job.steps() if s > job.interval]
+                job.interval = higher[0] if higher else job.max_interval
+        if fingerprint is not None:
+            job.fingerprint = fingerprint
+        METRICS.set_gauge("schedule_interval_seconds", job.interval, source=job.name)
+        job.next_run = next_aligned(now, job.interval)
@@ -0,0 +1,61 @@
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+
+@dataclass
+class SchemaSnapshot:
+    """已确认与期望一致的表结构"""
+    digest: str                    # 期望结构（表名、列、选项）的指纹，代码升级增删列后自动失效
+    table_id: str
+    columns: dict[str, str]        # 列名 → column key
+    link_id: str | None            # 父任务 link column id
+    options: dict[str, list[str]] = field(default_factory=dict)  # 单选列 → 已有选项
+    checked_at: float = 0.0        # 上次与服务端核对的时间
+
+
+class SchemaCache:
+    """本地表结构快照：warm start 时直接使用，不再请求 metadata、不再逐项 ensure。
+    超过 ttl 秒或期望结构变化时重新核对一次服务端。
+    """
+
+    def __init__(self, path: Path, ttl: float = 86400):
+        self.path = path
+        self.ttl = ttl
+
+    def load(self, digest: str) -> SchemaSnapshot | None:
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning("表结构缓存损坏，已忽略：%s", self.path)
+            return None
+        if data.get("version") != CACHE_VERSION:
+            return None
+        try:
+            snapshot = SchemaSnapshot(**data["snapshot"])
+        except (KeyError, TypeError):
+            return None
+        if snapshot.digest != digest or time.time() - snapshot.checked_at > self.ttl:
+            return None
+        return snapshot
+
+    def save(self, snapshot: SchemaSnapshot):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": CACHE_VERSION, "snapshot": asdict(snapshot)}, ensure_ascii=False))
+        os.replace(tmp, self.path)
+
+    def invalidate(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
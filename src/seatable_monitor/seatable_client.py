@@ -1,9 +1,15 @@
+import hashlib
+import json
 import time
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from seatable_api import Base
 from seatable_api.constants import ColumnTypes
 from .models import TaskInfo
+from .row_cache import RowCache
+from .schema_cache import SchemaCache, SchemaSnapshot
+from .transport import SeaTableTransport
+from .metrics import METRICS
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +24,26 @@ COLUMNS = [
     ("父任务", ColumnTypes.LINK),  # 自关联，特殊处理
 ]
 
+# 可选的会话统计列（[claude] analytics = true 时创建），值来自 TaskInfo.extra
+SESSION_STATS_COLUMNS = [
+    ("工具调用", ColumnTypes.NUMBER),
+    ("输入Token", ColumnTypes.NUMBER),
+    ("输出Token", ColumnTypes.NUMBER),
+    ("会话时长", ColumnTypes.DURATION),
+]
+
+# 可选的 tmux 进程资源列（[tmux] resources = true 时创建），值来自 TaskInfo.extra
+TMUX_RESOURCE_COLUMNS = [
+    ("CPU(%)", ColumnTypes.NUMBER),
+    ("内存(MB)", ColumnTypes.NUMBER),
+    ("线程数", ColumnTypes.NUMBER),
+    ("读写(KB/s)", ColumnTypes.NUMBER),
+]
+
 STATUS_OPTIONS = [
     {"name": "待办",   "color": "#FF8000", "textColor": "#FFFFFF"},
     {"name": "进行中", "color": "#59CB74", "textColor": "#FFFFFF"},
+    {"name": "空闲",   "color": "#F2C94C", "textColor": "#333333"},
     {"name": "已完成", "color": "#9860E5", "textColor": "#FFFFFF"},
     {"name": "已结束", "color": "#999999", "textColor": "#FFFFFF"},
     {"name": "未知",   "color": "#CCCCCC", "textColor": "#333333"},
@@ -33,52 +56,168 @@ SOURCE_OPTIONS = [
 ]
 
 
+# 仍处于活动中的状态；对账时本轮未采集到的这些行会被标记为已结束
+ACTIVE_STATUSES = ("待办", "进行中", "空闲")
+
+BATCH_SIZE = 1000        # batch_append_rows / batch_update_rows 单次上限
+QUERY_PAGE_SIZE = 10000  # SQL 查询单页上限（不写 LIMIT 时服务端默认只返回 100 行）
+
+
 def _esc(s: str) -> str:
     """转义 SQL 单引号"""
     return s.replace("'", "''")
 
 
+def _now_str() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _parse_time(value) -> datetime:
+    """解析 SQL 返回的日期列（ISO 格式，可能带时区）；无法解析时视为很新"""
+    if not value:
+        return datetime.max
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        return datetime.max
+
+
+def _row_key(name: str, session_id: str, machine: str) -> tuple[str, str, str]:
+    """upsert 去重键：(任务名, 会话ID, 机器)"""
+    return (name, session_id, machine)
+
+
+def _chunks(items: list, size: int = BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _task_row(task: TaskInfo) -> dict:
+    row = {
+        "任务名": task.name,
+        "状态": task.status,
+        "来源": task.source,
+        "会话ID": task.session_id,
+        "最新输出": task.latest_output,
+        "更新时间": _now_str(),
+        "机器": task.machine,
+    }
+    row.update(task.extra)
+    return row
+
+
 class SeaTableClient:
-    def __init__(self, server_url: str, api_token: str, table_name: str):
+    def __init__(
+        self, server_url: str, api_token: str, table_name: str,
+        row_cache: RowCache | None = None, heartbeat_interval: float = 600,
+        transport: SeaTableTransport | None = None, extra_columns: list | None = None,
+        schema_cache: SchemaCache | None = None,
+    ):
         self.server_url = server_url
         self.api_token = api_token
         self.table_name = table_name
         self.base = None
         self._auth_time = 0
         self._link_column_id = None  # 父任务 link column id
+        self.row_cache = row_cache  # 本地行索引，None 表示每轮查询服务端
+        self.heartbeat_interval = heartbeat_interval  # 未变化行的补写间隔（秒）
+        self.transport = transport  # None 表示使用 seatable_api 默认的 requests 调用
+        self.columns = COLUMNS + list(extra_columns or [])
+        self.schema_cache = schema_cache  # 本地表结构快照，None 表示每次启动都核对服务端
+        self._schema_from_cache = False   # 本次启动用的是未经核对的快照
+        self._schema_stale = False
+        # 父任务 link：(来源, 机器) → {(任务名, 会话ID): 父任务行名}，以及上次读取服务端的时间
+        self._links_applied: dict[tuple[str, str], dict[tuple[str, str], str]] = {}
+        self._links_checked: dict[tuple[str, str], float] = {}
 
     def init(self):
-        """认证 + 确保表/列/选项存在"""
+        """认证 + 确保表/列/选项存在（有有效的本地表结构快照时不请求 metadata）"""
+        if self.transport is not None:
+            self.transport.install()
         self.base = Base(self.api_token, self.server_url)
         self.base.auth()
         self._auth_time = time.time()
-        self._ensure_table()
-        self._ensure_columns()
-        self._ensure_options()
+        self._ensure_schema()
         logger.info("SeaTable 初始化完成：表=%s", self.table_name)
 
-    def _ensure_table(self):
-        metadata = self.base.get_metadata()
-        if not any(t["name"] == self.table_name for t in metadata["tables"]):
+    def set_transport(self, transport: SeaTableTransport):
+        """换用新的传输层（超时、限速、重试设置变化时），认证与缓存保持不变"""
+        old, self.transport = self.transport, transport
+        transport.install()
+        if old is not None:
+            old.close()
+
+    def set_extra_columns(self, extra_columns: list):
+        """切换附加列并补齐表结构，沿用现有认证；失败时保持原来的列"""
+        old, self.columns = self.columns, COLUMNS + list(extra_columns)
+        try:
+            self._ensure_schema()
+        except Exception:
+            self.columns = old
+            raise
+
+    def _schema_digest(self) -> str:
+        desired = [
+            self.table_name,
+            [[name, col_type] for name, col_type in self.columns],
+            [o["name"] for o in STATUS_OPTIONS],
+            [o["name"] for o in SOURCE_OPTIONS],
+        ]
+        return hashlib.md5(json.dumps(desired, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _ensure_schema(self, use_cache: bool = True):
+        """本地快照有效时直接使用；否则取一次 metadata，把缺失的表/列/选项一并补齐后保存快照"""
+        digest = self._schema_digest()
+        cache = self.schema_cache
+        snapshot = cache.load(digest) if cache is not None and use_cache else None
+        if snapshot is not None:
+            self._link_column_id = snapshot.link_id
+            self._schema_from_cache = True
+            METRICS.inc("schema_cache_total", result="hit")
+            return
+        METRICS.inc("schema_cache_total", result="miss")
+
+        table = self._find_table(self.base.get_metadata())
+        if table is None:
             self.base.add_table(self.table_name)
             logger.info("已创建表：%s", self.table_name)
+            table = self._find_table(self.base.get_metadata())
+        if self._migrate(table):
+            table = self._find_table(self.base.get_metadata())
 
-    def _ensure_columns(self):
-        metadata = self.base.get_metadata()
-        existing_cols = {}
-        for t in metadata["tables"]:
-            if t["name"] == self.table_name:
-                for c in t.get("columns", []):
-                    existing_cols[c["name"]] = c
+        columns = {c["name"]: c for c in table.get("columns", [])}
+        link = columns.get("父任务")
+        self._link_column_id = (link.get("data") or {}).get("link_id") if link else None
+        self._schema_from_cache = False
+        if cache is not None:
+            cache.save(SchemaSnapshot(
+                digest=digest,
+                table_id=table.get("_id", ""),
+                columns={name: c.get("key", "") for name, c in columns.items()},
+                link_id=self._link_column_id,
+                options={
+                    name: [o.get("name") for o in (c.get("data") or {}).get("options") or []]
+                    for name, c in columns.items() if c.get("type") == ColumnTypes.SINGLE_SELECT
+                },
+                checked_at=time.time(),
+            ))
+
+    def _find_table(self, metadata: dict) -> dict | None:
+        return next((t for t in metadata["tables"] if t["name"] == self.table_name), None)
+
+    def _migrate(self, table: dict) -> bool:
+        """按同一份 metadata 算出全部缺失项后依次补齐，返回是否有改动"""
+        existing_cols = {c["name"]: c for c in table.get("columns", [])}
+        changed = False
 
         # 首列可能叫 Name，重命名为"任务名"
         if "Name" in existing_cols and "任务名" not in existing_cols:
             self.base.rename_column(self.table_name, existing_cols["Name"]["key"], "任务名")
             logger.info("已将首列 Name 重命名为 任务名")
+            changed = True
 
         existing_col_names = set(existing_cols.keys()) | {"任务名"}
-
-        for col_name, col_type in COLUMNS:
+        for col_name, col_type in self.columns:
             if col_name in existing_col_names:
                 continue
             if col_type == ColumnTypes.LINK:
@@ -92,129 +231,262 @@ class SeaTableClient:
                     self.table_name, col_name, col_type,
                     column_data={"format": "YYYY-MM-DD HH:mm"}
                 )
+            elif col_type == ColumnTypes.DURATION:
+                self.base.insert_column(
+                    self.table_name, col_name, col_type,
+                    column_data={"format": "duration", "duration_format": "h:mm:ss"}
+                )
             else:
                 self.base.insert_column(self.table_name, col_name, col_type)
             logger.info("已添加列：%s (%s)", col_name, col_type)
+            changed = True
 
-        # 缓存 link column id
-        self._refresh_link_column_id()
-
-    def _refresh_link_column_id(self):
-        metadata = self.base.get_metadata()
-        for t in metadata["tables"]:
-            if t["name"] == self.table_name:
-                for c in t.get("columns", []):
-                    if c["name"] == "父任务":
-                        self._link_column_id = c.get("data", {}).get("link_id")
-                        return
+        # 只补充缺失的选项（已有表升级后新增的状态也能加上）
+        for col_name, options in (("状态", STATUS_OPTIONS), ("来源", SOURCE_OPTIONS)):
+            col_data = (existing_cols.get(col_name) or {}).get("data") or {}
+            have = {o.get("name") for o in col_data.get("options") or []}
+            missing = [o for o in options if o["name"] not in have]
+            if not missing:
+                continue
+            try:
+                self.base.add_column_options(self.table_name, col_name, missing)
+                changed = True
+            except Exception:
+                logger.warning("添加 %s 列选项失败", col_name, exc_info=True)
+        return changed
 
-    def _ensure_options(self):
-        # 设置状态选项
-        try:
-            self.base.add_column_options(self.table_name, "状态", STATUS_OPTIONS)
-            self.base.add_column_options(self.table_name, "来源", SOURCE_OPTIONS)
-        except Exception:
-            pass  # 选项已存在时可能报错，忽略
+    def _query_all(self, sql: str) -> list[dict]:
+        """分页执行 SELECT，取回全部结果；按 _id 排序，保证分页边界稳定（不漏行、不重复）"""
+        rows = []
+        offset = 0
+        while True:
+            page = self.base.query(f"{sql} ORDER BY _id LIMIT {QUERY_PAGE_SIZE} OFFSET {offset}")
+            rows.extend(page)
+            if len(page) < QUERY_PAGE_SIZE:
+                return rows
+            offset += QUERY_PAGE_SIZE
 
-    def upsert_task(self, task: TaskInfo):
-        """按 (任务名, 会话ID, 机器) 去重 upsert"""
+    def load_row_ids(self, machine: str) -> dict[tuple[str, str, str], str]:
+        """一次查询加载该机器全部行，返回 (任务名, 会话ID, 机器) → _id"""
         sql = (
-            f"SELECT _id FROM `{self.table_name}` "
-            f"WHERE `任务名`='{_esc(task.name)}' "
-            f"AND `会话ID`='{_esc(task.session_id)}' "
-            f"AND `机器`='{_esc(task.machine)}' LIMIT 1"
+            f"SELECT _id, `任务名`, `会话ID` FROM `{self.table_name}` "
+            f"WHERE `机器`='{_esc(machine)}'"
         )
-        rows = self.base.query(sql)
-        row_data = {
-            "任务名": task.name,
-            "状态": task.status,
-            "来源": task.source,
-            "会话ID": task.session_id,
-            "最新输出": task.latest_output,
-            "更新时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "机器": task.machine,
+        return {
+            _row_key(row.get("任务名") or "", row.get("会话ID") or "", machine): row["_id"]
+            for row in self._query_all(sql)
         }
-        if rows:
-            row_id = rows[0]["_id"]
-            self.base.update_row(self.table_name, row_id, row_data)
-        else:
-            self.base.append_row(self.table_name, row_data)
-            # 重新查询拿到新行 id
-            rows = self.base.query(sql)
-            if not rows:
-                return
-            row_id = rows[0]["_id"]
-
-        # 处理父任务 link
-        if task.parent_name and self._link_column_id:
-            self._link_parent(row_id, task)
-
-    def _link_parent(self, child_row_id: str, task: TaskInfo):
-        """建立子任务与父任务的 link 关联"""
-        parent_sql = (
-            f"SELECT _id FROM `{self.table_name}` "
-            f"WHERE `任务名`='{_esc(task.parent_name)}' "
-            f"AND `会话ID`='{_esc(task.session_id)}' "
-            f"AND `机器`='{_esc(task.machine)}' LIMIT 1"
-        )
-        parent_rows = self.base.query(parent_sql)
-        if not parent_rows:
+
+    def upsert_tasks(self, tasks: list[TaskInfo]):
+        """批量 upsert：一次查询（或本地行索引）定位行，再分块 batch 更新/追加。
+        启用 row_cache 时只写内容变化的行，未变化的行每 heartbeat_interval 秒补写一次。
+        """
+        if self._schema_stale:
+            # 用快照启动后写入失败过：表结构可能被手动改动，核对一次服务端
+            self._ensure_schema(use_cache=False)
+            self._schema_stale = False
+        # 同一轮内重复的 key 以最后一条为准
+        pending: dict[tuple[str, str, str], TaskInfo] = {}
+        for t in tasks:
+            pending[t.key()] = t
+        if not pending:
             return
-        parent_row_id = parent_rows[0]["_id"]
+
+        cache = self.row_cache
+        machines = {key[2] for key in pending}
+        row_ids: dict[tuple[str, str, str], str] = {}
+        if cache is None:
+            for machine in machines:
+                row_ids.update(self.load_row_ids(machine))
+        else:
+            for machine in machines:
+                if not cache.has_machine(machine):
+                    cache.reconcile(machine, self.load_row_ids(machine))
+
+        now = time.time()
+        updates, appends, written = [], [], []
+        for key, t in pending.items():
+            h = t.row_hash()
+            row_id = row_ids.get(key) if cache is None else cache.row_id(key)
+            if row_id:
+                if cache is not None and cache.is_fresh(key, h, now, self.heartbeat_interval):
+                    METRICS.inc("rows_skipped_total")
+                    continue
+                updates.append({"row_id": row_id, "row": _task_row(t)})
+            else:
+                appends.append(_task_row(t))
+            written.append((key, h))
+
         try:
-            self.base.add_link(
-                self._link_column_id,
-                self.table_name, self.table_name,
-                child_row_id, parent_row_id
-            )
+            for chunk in _chunks(updates):
+                self.base.batch_update_rows(self.table_name, chunk)
+            for chunk in _chunks(appends):
+                self.base.batch_append_rows(self.table_name, chunk)
+            METRICS.inc("rows_written_total", len(updates), op="update")
+            METRICS.inc("rows_written_total", len(appends), op="append")
         except Exception:
-            pass  # link 已存在时忽略
+            if cache is not None:
+                cache.invalidate()  # 写入状态未知，下轮重新对账
+            self._schema_stale = self._schema_from_cache
+            raise
+
+        # 新追加的行需重新加载一次索引拿到 _id
+        if cache is not None:
+            if appends:
+                for machine in {key[2] for key, _ in written}:
+                    cache.reconcile(machine, self.load_row_ids(machine))
+            for key, h in written:
+                row_id = cache.row_id(key)
+                if row_id:
+                    cache.mark_written(key, row_id, h, now)
+            cache.save()
+
+    def reconcile_links(self, source: str, machine: str, edges):
+        """对账父任务 link：读取一次该来源/机器的当前 link 状态，只批量更新有变化的子任务行。
+        edges 为 [任务名, 会话ID, 父任务行名]（无父任务为空串），只处理其中列出的行；
+        与上次成功应用的结果相同且未到 heartbeat_interval 时不访问服务端。
+        """
+        if not self._link_column_id:
+            return
+        desired = {(name, session_id): parent for name, session_id, parent in edges}
+        scope = (source, machine)
+        applied = self._links_applied.setdefault(scope, {})
+        now = time.time()
+        if now - self._links_checked.get(scope, 0) < self.heartbeat_interval \
+                and all(applied.get(k) == p for k, p in desired.items()):
+            METRICS.inc("link_reconcile_skipped_total")
+            return
+
+        sql = (
+            f"SELECT _id, `任务名`, `会话ID`, `父任务` FROM `{self.table_name}` "
+            f"WHERE `来源`='{_esc(source)}' AND `机器`='{_esc(machine)}'"
+        )
+        ids, current = {}, {}
+        for row in self._query_all(sql):
+            key = (row.get("任务名") or "", row.get("会话ID") or "")
+            ids[key] = row["_id"]
+            current[row["_id"]] = {
+                link["row_id"] if isinstance(link, dict) else link for link in row.get("父任务") or []
+            }
+
+        updates: dict[str, list[str]] = {}
+        resolved = {}
+        for (name, session_id), parent in desired.items():
+            child_id = ids.get((name, session_id))
+            parent_id = ids.get((parent, session_id)) if parent else None
+            if child_id is None or (parent and parent_id is None):
+                continue  # 行尚未写入，下次再处理
+            want = [parent_id] if parent_id else []
+            if current.get(child_id, set()) != set(want):
+                updates[child_id] = want
+            resolved[(name, session_id)] = parent
+
+        row_ids = list(updates)
+        for chunk in _chunks(row_ids):
+            self.base.batch_update_links(
+                self._link_column_id, self.table_name, self.table_name,
+                chunk, {row_id: updates[row_id] for row_id in chunk},
+            )
+        METRICS.inc("links_updated_total", len(row_ids))
+        applied.update(resolved)
+        self._links_checked[scope] = now
+        if row_ids:
+            logger.info("已更新 %d 行父任务关联（来源=%s）", len(row_ids), source)
+
+    def _mark_rows_ended(self, rows: list[dict], machine: str):
+        """把给定行批量标记为已结束，并让本地索引在下次写入时重新写这些行"""
+        now = _now_str()
+        updates = [{"row_id": r["_id"], "row": {"状态": "已结束", "更新时间": now}} for r in rows]
+        for chunk in _chunks(updates):
+            self.base.batch_update_rows(self.table_name, chunk)
+        if self.row_cache is not None:
+            for r in rows:
+                self.row_cache.invalidate_row(_row_key(r.get("任务名") or "", r.get("会话ID") or "", machine))
+            self.row_cache.save()
+
+    def _delete_rows(self, rows: list[dict], machine: str):
+        for chunk in _chunks([r["_id"] for r in rows]):
+            self.base.batch_delete_rows(self.table_name, chunk)
+        if self.row_cache is not None:
+            for r in rows:
+                self.row_cache.forget(_row_key(r.get("任务名") or "", r.get("会话ID") or "", machine))
+            self.row_cache.save()
+
+    def reconcile_source(
+        self, source: str, machine: str, active_keys, retention_days: float = 0,
+    ):
+        """对账某来源在该机器上的全部行（一次查询）：
+        - 本轮未采集到且仍处于活动状态（待办/进行中/空闲）的行 → 批量标记为已结束
+        - retention_days > 0 时，已结束且超过该天数未更新的行 → 批量删除
+        active_keys 为本轮采集到的 (任务名, 会话ID) 集合。
+        """
+        active = {tuple(k) for k in active_keys}
+        sql = (
+            f"SELECT _id, `任务名`, `会话ID`, `状态`, `更新时间` FROM `{self.table_name}` "
+            f"WHERE `来源`='{_esc(source)}' AND `机器`='{_esc(machine)}'"
+        )
+        cutoff = None
+        if retention_days > 0:
+            cutoff = datetime.now() - timedelta(days=retention_days)
+
+        ended, expired = [], []
+        for row in self._query_all(sql):
+            key = (row.get("任务名") or "", row.get("会话ID") or "")
+            status = row.get("状态")
+            if status in ACTIVE_STATUSES and key not in active:
+                ended.append(row)
+            elif status == "已结束" and cutoff and _parse_time(row.get("更新时间")) < cutoff:
+                expired.append(row)
+
+        if ended:
+            self._mark_rows_ended(ended, machine)
+            logger.info("已标记 %d 行结束（来源=%s）", len(ended), source)
+        if expired:
+            self._delete_rows(expired, machine)
+            logger.info("已清理 %d 行超过 %g 天的已结束记录（来源=%s）", len(expired), retention_days, source)
 
     def remove_stale_tasks(self, source: str, session_id: str, machine: str, active_names: set):
         """删除该机器/会话下已不存在的旧任务行"""
         sql = (
-            f"SELECT _id, `任务名` FROM `{self.table_name}` "
-            f"WHERE `来源`='{source}' AND `会话ID`='{_esc(session_id)}' "
+            f"SELECT _id, `任务名`, `会话ID` FROM `{self.table_name}` "
+            f"WHERE `来源`='{_esc(source)}' AND `会话ID`='{_esc(session_id)}' "
             f"AND `机器`='{_esc(machine)}'"
         )
-        for row in self.base.query(sql):
-            if row["任务名"] not in active_names:
-                self.base.delete_row(self.table_name, row["_id"])
+        stale = [row for row in self._query_all(sql) if row["任务名"] not in active_names]
+        if stale:
+            self._delete_rows(stale, machine)
 
     def mark_tasks_ended(self, source: str, session_id: str, machine: str, active_names: set):
         """将该机器/会话下已不存在的任务标记为已结束"""
         sql = (
-            f"SELECT _id, `任务名`, `状态` FROM `{self.table_name}` "
-            f"WHERE `来源`='{source}' AND `会话ID`='{_esc(session_id)}' "
+            f"SELECT _id, `任务名`, `会话ID` FROM `{self.table_name}` "
+            f"WHERE `来源`='{_esc(source)}' AND `会话ID`='{_esc(session_id)}' "
             f"AND `机器`='{_esc(machine)}' AND `状态`='进行中'"
         )
-        for row in self.base.query(sql):
-            if row["任务名"] not in active_names:
-                self.base.update_row(
-                    self.table_name, row["_id"],
-                    {"状态": "已结束", "更新时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-                )
-                logger.info("已标记任务结束：%s", row["任务名"])
+        ended = [row for row in self._query_all(sql) if row["任务名"] not in active_names]
+        if ended:
+            self._mark_rows_ended(ended, machine)
+            logger.info("已标记任务结束：%s", "、".join(r["任务名"] for r in ended))
 
-    def mark_ended_sessions(self, source: str, active_sessions: set, machine: str):
+    def mark_ended_sessions(self, source: str, active_sessions, machine: str):
         """将已消失的 session 标记为已结束"""
+        active_sessions = set(active_sessions)
         sql = (
-            f"SELECT _id, `会话ID`, `状态` FROM `{self.table_name}` "
-            f"WHERE `来源`='{source}' AND `机器`='{_esc(machine)}' "
-            f"AND `状态`='进行中'"
+            f"SELECT _id, `任务名`, `会话ID` FROM `{self.table_name}` "
+            f"WHERE `来源`='{_esc(source)}' AND `机器`='{_esc(machine)}' "
+            f"AND `状态` IN ('进行中', '空闲')"
         )
-        for row in self.base.query(sql):
-            if row["会话ID"] not in active_sessions:
-                self.base.update_row(
-                    self.table_name, row["_id"],
-                    {"状态": "已结束", "更新时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-                )
-                logger.info("已标记 session 结束：%s", row["会话ID"])
+        ended = [row for row in self._query_all(sql) if row["会话ID"] not in active_sessions]
+        if ended:
+            self._mark_rows_ended(ended, machine)
+            logger.info("已标记 session 结束：%s", "、".join(sorted({r["会话ID"] for r in ended})))
 
     def refresh_auth_if_needed(self):
         """base_token 有效期 3 天，超 2 天自动刷新"""
         if time.time() - self._auth_time > 2 * 86400:
             self.base.auth()
             self._auth_time = time.time()
-            self._refresh_link_column_id()
+            if self.row_cache is not None:
+                self.row_cache.invalidate()  # 下次写入前重新对账
+            self._links_checked.clear()
             logger.info("SeaTable token 已刷新")
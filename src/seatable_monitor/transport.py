@@ -0,0 +1,136 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from .metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """令牌桶限速：平均 rate 次/秒，最多突发 burst 次"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _retry_after(response: requests.Response) -> float | None:
+    """解析 Retry-After（秒数或 HTTP 日期）"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _idempotent(method: str, url: str) -> bool:
+    """可以安全重放的请求：非 POST，或 SQL 查询（POST 但只读）"""
+    return method != "POST" or url.rstrip("/").endswith(("/sql", "/query")) or "/query/" in url
+
+
+class SeaTableTransport:
+    """SeaTable HTTP 传输层：长连接池 + 连接/读取超时 + 限速 + 重试。
+
+    seatable_api 直接调用 requests.get/post/put/delete，install() 把这些调用
+    转到本对象上，从而无需改动 Base 即可复用连接并统一超时与重试策略。
+    """
+
+    def __init__(
+        self, connect_timeout: float = 5, read_timeout: float = 30,
+        rate_per_minute: float = 300, burst: int = 10,
+        max_retries: int = 3, backoff: float = 1, pool_size: int = 4,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.bucket = TokenBucket(rate_per_minute / 60, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs["timeout"] = self.timeout
+        method = method.upper()
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            METRICS.inc("api_requests_total", method=method)
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.ConnectTimeout:
+                METRICS.inc("api_errors_total", type="ConnectTimeout")
+                # 连接未建立，请求一定没发出，任何方法都可以重试
+                if attempt >= self.max_retries:
+                    raise
+                delay = None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                METRICS.inc("api_errors_total", type=type(e).__name__)
+                if attempt >= self.max_retries or not _idempotent(method, url):
+                    raise
+                delay = None
+            else:
+                if response.status_code >= 400:
+                    METRICS.inc("api_errors_total", type=str(response.status_code))
+                retryable = response.status_code == 429 or (
+                    response.status_code in RETRY_STATUSES and _idempotent(method, url)
+                )
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                delay = _retry_after(response)
+
+            if delay is None:
+                delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+            attempt += 1
+            logger.warning("SeaTable 请求失败，%.1f 秒后第 %d 次重试：%s %s", delay, attempt, method, url)
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def install(self):
+        """让 seatable_api 的 HTTP 调用走本传输层"""
+        import seatable_api.main
+        import seatable_api.api_gateway
+        seatable_api.main.requests = self
+        seatable_api.api_gateway.requests = self
+
+    def close(self):
+        self.session.close()
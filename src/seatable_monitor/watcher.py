@@ -0,0 +1,184 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x00004000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+)
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+# source → 变化的路径集合；None 表示整个来源都需要重新采集
+Changes = dict[str, set[Path] | None]
+
+
+class PollingWatcher:
+    """无 inotify 时的退化实现：每隔 interval 秒报告全部来源有变化"""
+
+    def __init__(self, roots: dict[str, tuple[Path, bool]], interval: float = 30):
+        self.sources = list(roots)
+        self.interval = interval
+        self._woken = threading.Event()
+
+    def wait(self, timeout: float) -> Changes:
+        delay = max(0.0, min(timeout, self.interval))
+        if self._woken.wait(delay):
+            self._woken.clear()
+            return {}
+        if delay < self.interval:
+            return {}
+        return {source: None for source in self.sources}
+
+    def wake(self):
+        """让阻塞中的 wait() 立即返回（可在信号处理函数中调用）"""
+        self._woken.set()
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """基于 inotify（ctypes 调用 libc）的目录监听。
+
+    roots: source → (根目录, 是否同时监听一级子目录)。
+    返回的路径是根目录下发生变化的直接子项（todos 文件 / tasks 团队目录 / projects 项目目录）。
+    """
+
+    def __init__(self, roots: dict[str, tuple[Path, bool]], debounce: float = 0.5):
+        self.debounce = debounce
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        # 自管道：wake() 写入一个字节即可打断 select
+        self._wake_r, self._wake_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+        # wd → (source, 根目录, 该 wd 对应的子目录；根目录本身为 None)
+        self._watches: dict[int, tuple[str, Path, Path | None]] = {}
+        self._roots = roots
+        for source, (root, recursive) in roots.items():
+            self._add_root(source, root, recursive)
+
+    def _add_watch(self, path: Path) -> int:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            logger.warning("无法监听目录：%s (errno=%d)", path, ctypes.get_errno())
+        return wd
+
+    def _add_root(self, source: str, root: Path, recursive: bool):
+        if not root.is_dir():
+            return
+        wd = self._add_watch(root)
+        if wd >= 0:
+            self._watches[wd] = (source, root, None)
+        if recursive:
+            with os.scandir(root) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        self._add_subdir(source, root, Path(entry.path))
+
+    def _add_subdir(self, source: str, root: Path, path: Path):
+        wd = self._add_watch(path)
+        if wd >= 0:
+            self._watches[wd] = (source, root, path)
+
+    def _drain(self, changes: Changes) -> bool:
+        """读出当前所有事件并合并进 changes，返回是否读到事件"""
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _, name_len = _EVENT.unpack_from(buf, offset)
+            offset += _EVENT.size
+            name = buf[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                # 事件队列溢出：全部来源按全量处理
+                for source in self._roots:
+                    changes[source] = None
+                continue
+            watch = self._watches.get(wd)
+            if watch is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                continue
+            source, root, subdir = watch
+            if subdir is None:
+                if not name:
+                    continue
+                path = root / os.fsdecode(name)
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and self._roots[source][1]:
+                    self._add_subdir(source, root, path)
+            else:
+                path = subdir
+            if source not in changes:
+                changes[source] = set()
+            if changes[source] is not None:
+                changes[source].add(path)
+        return True
+
+    def wait(self, timeout: float) -> Changes:
+        """等待变化事件；收到第一个事件后再静默 debounce 秒合并后续事件"""
+        changes: Changes = {}
+        ready, _, _ = select.select([self._fd, self._wake_r], [], [], max(0.0, timeout))
+        if self._wake_r in ready:
+            try:
+                os.read(self._wake_r, 64)
+            except BlockingIOError:
+                pass
+            return changes
+        if not ready:
+            return changes
+        deadline = time.monotonic() + max(self.debounce * 4, 2.0)
+        while self._drain(changes) and time.monotonic() < deadline:
+            ready, _, _ = select.select([self._fd], [], [], self.debounce)
+            if not ready:
+                break
+        return changes
+
+    def wake(self):
+        """让阻塞中的 wait() 立即返回（可在信号处理函数中调用）"""
+        try:
+            os.write(self._wake_w, b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def close(self):
+        os.close(self._fd)
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+
+def create_watcher(roots: dict[str, tuple[Path, bool]], debounce: float, fallback_interval: float):
+    """Linux 上优先使用 inotify，失败或其他平台退化为定时全量"""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots, debounce)
+        except (OSError, AttributeError) as e:
+            logger.warning("inotify 不可用，退化为定时轮询：%s", e)
+    return PollingWatcher(roots, fallback_interval)
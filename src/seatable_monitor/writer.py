@@ -0,0 +1,279 @@
+import logging
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Iterable
+from .models import TaskInfo
+from .outbox import Outbox
+from .history import HistoryStore
+from .metrics import METRICS
+from .seatable_client import SeaTableClient
+
+logger = logging.getLogger(__name__)
+
+
+def _rejected(error: Exception) -> bool:
+    """服务端明确拒绝了请求内容（4xx，429 除外），原样重试不会成功。
+    seatable_api 对非 2xx 响应抛出 ConnectionError(状态码, 响应体)；网络错误是 requests 的异常
+    """
+    status = error.args[0] if isinstance(error, ConnectionError) and error.args else None
+    return isinstance(status, int) and 400 <= status < 500 and status != 429
+
+
+class TaskWriter(threading.Thread):
+    """后台写入线程：采集线程只管 submit，SeaTable 写入在这里串行进行。
+
+    - 内容与上次提交相同的行在 heartbeat_interval / 2 内不再进入 Outbox，稳态下每轮只落盘变化的行
+    - 待写数据先落到 Outbox（本地 SQLite），同一行的多次更新只保留最新一条
+    - 待写行数超过 max_pending 时丢弃新来的行（下轮采集会重新提交），内存与磁盘都有上限
+    - 写入失败时按指数退避 + 抖动重试，服务端恢复后分批补写；被服务端反复拒绝的单行移出队列，不挡住其余行
+    - 传入 history 时，提交的行与对账结果同时记入本地状态历史（与 SeaTable 是否写成功无关）
+    """
+
+    SUBMIT_CHUNK = 1000
+
+    def __init__(
+        self, client: SeaTableClient, outbox: Outbox | None = None, max_pending: int = 10000,
+        flush_interval: float = 0.5, batch_rows: int = 5000,
+        retry_base: float = 5, retry_max: float = 600, history: HistoryStore | None = None,
+        heartbeat_interval: float = 600, max_row_failures: int = 3,
+    ):
+        super().__init__(name="seatable-writer", daemon=True)
+        self.client = client
+        self.outbox = outbox if outbox is not None else Outbox()
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.batch_rows = batch_rows  # 单次 flush 最多写多少行，补写时分批进行
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.history = history
+        self.heartbeat_interval = heartbeat_interval
+        self.max_row_failures = max_row_failures
+        self.dropped = 0
+        # key → (来源, 内容指纹, 提交时间, 提交的对象)
+        self._submitted: dict[tuple[str, str, str], tuple[str, str, float, TaskInfo]] = {}
+        self._pruned_at = time.time()
+        self._submitted_lock = threading.Lock()  # 聚合器上中继线程也会调用 submit
+        self._client_lock = threading.Lock()     # flush 期间持有，热加载只在两次 flush 之间改动客户端
+        self._failures = 0
+        self._row_failures: dict[tuple[str, str, str], int] = {}  # 被单独拒绝的行 → 次数
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def submit(self, tasks: Iterable[TaskInfo]) -> int:
+        """提交行快照，落盘后立即返回提交的行数。
+        tasks 可以是生成器：按 SUBMIT_CHUNK 条分段落盘，不需要先攒成完整列表。
+        """
+        total = 0
+        it = iter(tasks)
+        while chunk := list(islice(it, self.SUBMIT_CHUNK)):
+            total += len(chunk)
+            staged = self._changed(chunk)
+            if not staged:
+                continue
+            if self.history is not None:
+                self._record(self.history.record, staged)
+            try:
+                dropped = self.outbox.put_tasks(staged, self.max_pending)
+            except sqlite3.Error:
+                self._forget([t.key() for t in staged])
+                raise
+            if dropped:
+                # 没进队列（或被挤出队列）的行下轮重新提交
+                self._forget(dropped)
+                self.dropped += len(dropped)
+                METRICS.inc("rows_dropped_total", len(dropped))
+            self._wakeup.set()
+        METRICS.set_gauge("queue_depth", self.qsize())
+        return total
+
+    def _forget(self, keys):
+        with self._submitted_lock:
+            for key in keys:
+                self._submitted.pop(key, None)
+
+    def _changed(self, tasks: list[TaskInfo]) -> list[TaskInfo]:
+        """筛出需要落盘的行：内容变化，或距上次提交超过 heartbeat_interval / 2（供客户端补写更新时间）"""
+        now = time.time()
+        interval = self.heartbeat_interval / 2
+        staged = []
+        with self._submitted_lock:
+            for t in tasks:
+                key = t.key()
+                last = self._submitted.get(key)
+                if last and now - last[2] < interval:
+                    # 采集器备忘复用的是同一个对象，不必再算指纹
+                    if last[3] is t:
+                        continue
+                    h = t.row_hash()
+                    if last[1] == h:
+                        continue
+                else:
+                    h = t.row_hash()
+                self._submitted[key] = (t.source, h, now, t)
+                staged.append(t)
+            if now - self._pruned_at > self.heartbeat_interval:
+                self._submitted = {k: v for k, v in self._submitted.items() if now - v[2] < interval}
+                self._pruned_at = now
+        METRICS.inc("rows_unchanged_total", len(tasks) - len(staged))
+        return staged
+
+    def submit_op(self, key: str, method: str, *args):
+        """提交一个 SeaTableClient 操作（如 mark_ended_sessions），在已提交的行写完后执行。
+        参数需可 JSON 序列化；相同 key 只保留最新一次。
+        """
+        self.outbox.put_op(key, method, list(args))
+        self._wakeup.set()
+        if method == "reconcile_source":
+            active = self._forget_inactive(*args[:3])
+            if self.history is not None:
+                self._record(self.history.reconcile, args[0], args[1], active)
+
+    def _forget_inactive(self, source: str, machine: str, active) -> set[tuple[str, str]]:
+        """忘掉将被（或已被）对账标记为已结束的行：再次出现时即使内容相同也要重新提交。
+        提交对账时和执行对账后各调用一次：排队期间（如断网）又提交过的同一行，
+        可能先写入、随后被这次较早的对账标记为已结束
+        """
+        active = {tuple(k) for k in active}
+        with self._submitted_lock:
+            for k in [k for k, v in self._submitted.items()
+                      if v[0] == source and k[2] == machine and k[:2] not in active]:
+                del self._submitted[k]
+        return active
+
+    def set_client(self, client: SeaTableClient):
+        """在两次 flush 之间换用新的客户端（SeaTable 地址、token 或表名变化时）；
+        之后提交的行不再按内容跳过，全部写入新表
+        """
+        with self._client_lock:
+            self.client = client
+        with self._submitted_lock:
+            self._submitted.clear()
+
+    def call_client(self, method: str, *args):
+        """在两次 flush 之间调用当前客户端的方法（热加载修改传输层、附加列等设置）"""
+        with self._client_lock:
+            return getattr(self.client, method)(*args)
+
+    def _record(self, fn, *args):
+        """记入状态历史；历史库出错只记日志，不影响采集与写入"""
+        try:
+            fn(*args)
+        except sqlite3.Error:
+            logger.warning("写入状态历史失败", exc_info=True)
+
+    def qsize(self) -> int:
+        return len(self.outbox)
+
+    def stop(self, timeout: float = 30):
+        """停止并尽量写完剩余数据；未写完的部分留在 outbox，下次启动继续"""
+        self._stopping.set()
+        self._wakeup.set()
+        self.join(timeout)
+
+    def run(self):
+        # 上次退出前未写完的数据
+        if len(self.outbox):
+            logger.info("outbox 中有 %d 条待写数据，开始补写", len(self.outbox))
+            self._wakeup.set()
+        while True:
+            self._wakeup.wait()
+            if self._stopping.is_set():
+                with self._client_lock:
+                    self._flush()
+                return
+            # 稍等片刻，让同一行的连续更新合并
+            self._wakeup.clear()
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            with self._client_lock:
+                ok = self._flush()
+            if ok:
+                self._failures = 0
+                if len(self.outbox):
+                    self._wakeup.set()  # 还有积压，继续下一批
+            else:
+                self._failures += 1
+                delay = min(self.retry_max, self.retry_base * 2 ** (self._failures - 1))
+                delay *= random.uniform(0.5, 1.0)
+                logger.warning("写入失败 %d 次，%.1f 秒后重试", self._failures, delay)
+                # 退避期间不被新提交唤醒，只响应停止
+                self._stopping.wait(delay)
+                self._wakeup.set()
+
+    def _write_rows(self, batch: list[tuple[int, TaskInfo]]) -> bool:
+        """写入一批行，写成功的部分立即从 outbox 确认，全部写入时返回 True。
+        整批失败时对半拆开重试：前两半都失败视为服务端暂时不可用，留待退避后重试；
+        否则继续拆分失败的部分，找出被单独拒绝的行。同一行被拒绝 max_row_failures 次后
+        移出 outbox 并记入日志，不再挡住后面的行和操作（内容变化或到补写时间时会重新提交）。
+        """
+        parts, progress, failed, attempts = deque([batch]), False, False, 0
+        while parts:
+            part = parts.popleft()
+            attempts += 1
+            try:
+                with METRICS.timer("upsert_tasks"):
+                    self.client.upsert_tasks([t for _, t in part])
+            except Exception as e:
+                if part is batch:
+                    logger.exception("写入 SeaTable 失败，%d 行留在 outbox 稍后重试", len(batch))
+                if len(part) == 1:
+                    failed = True
+                    if progress or _rejected(e):
+                        self._row_rejected(*part[0], e)
+                elif not progress and attempts >= 3:
+                    return False
+                else:
+                    mid = len(part) // 2
+                    parts.extend((part[:mid], part[mid:]))
+                continue
+            self.outbox.ack_tasks(part)
+            for _, t in part:
+                self._row_failures.pop(t.key(), None)
+            progress = True
+        return not failed
+
+    def _row_rejected(self, seq: int, task: TaskInfo, error: Exception):
+        key = task.key()
+        n = self._row_failures[key] = self._row_failures.get(key, 0) + 1
+        if n < self.max_row_failures:
+            logger.warning("SeaTable 拒绝了该行（第 %d 次）：%s：%s", n, key, error)
+            return
+        del self._row_failures[key]
+        self.outbox.ack_tasks([(seq, task)])
+        METRICS.inc("rows_rejected_total")
+        logger.error("SeaTable 连续 %d 次拒绝该行，已移出 outbox：%s：%s", n, key, error)
+
+    def _flush(self) -> bool:
+        if self.dropped:
+            logger.warning("写入积压，已丢弃 %d 条中间状态", self.dropped)
+            self.dropped = 0
+
+        batch = self.outbox.peek_tasks(self.batch_rows)
+        if batch:
+            if not self._write_rows(batch):
+                return False
+            if self.outbox.pending_rows():
+                return True
+
+        for key, seq, method, args in self.outbox.peek_ops():
+            try:
+                with METRICS.timer(method):
+                    getattr(self.client, method)(*args)
+            except Exception:
+                logger.exception("执行 %s 失败，稍后重试", method)
+                return False
+            self.outbox.ack_op(key, seq)
+            if method == "reconcile_source":
+                self._forget_inactive(*args[:3])
+        METRICS.set_gauge("queue_depth", self.qsize())
+
+        try:
+            self.client.refresh_auth_if_needed()
+        except Exception:
+            logger.exception("刷新 SeaTable token 失败")
+            return False
+        return True
@@ -0,0 +1,50 @@
+"""/proc 描述符缓存的上限与淘汰"""
+import os
+
+from seatable_monitor.collectors.procstat import _default_max_open, _ProcFiles
+
+
+def _fake_proc(tmp_path, pids):
+    for pid in pids:
+        (tmp_path / str(pid)).mkdir()
+        (tmp_path / str(pid) / "stat").write_bytes(f"{pid} (cmd) S 1".encode())
+    return str(tmp_path)
+
+
+def _is_open(fd: int) -> bool:
+    try:
+        os.fstat(fd)
+    except OSError:
+        return False
+    return True
+
+
+def test_cache_respects_cap_and_closes_evicted(tmp_path):
+    files = _ProcFiles(_fake_proc(tmp_path, range(1, 21)), max_open=8)
+    for pid in range(1, 21):
+        assert files.read(pid, "stat").startswith(f"{pid} ".encode())
+    assert len(files._fds) == 8
+    assert [key[0] for key in files._fds] == list(range(13, 21))
+
+    # 最近读过的保留，最久未读的先被关闭
+    fd = files._fds[(13, "stat")]
+    files.read(13, "stat")
+    evicted = files._fds[(14, "stat")]
+    files.read(1, "stat")
+    assert len(files._fds) == 8
+    assert (13, "stat") in files._fds and _is_open(fd)
+    assert (14, "stat") not in files._fds and not _is_open(evicted)
+
+    kept = list(files._fds.values())
+    files.close()
+    assert not files._fds
+    assert not any(_is_open(fd) for fd in kept)
+
+
+def test_default_cap_is_small_fraction_of_rlimit():
+    import resource
+    soft = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+    cap = _default_max_open()
+    assert 16 <= cap <= 256
+    if soft != resource.RLIM_INFINITY:
+        assert cap <= max(16, soft // 8)
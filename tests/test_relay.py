@@ -0,0 +1,129 @@
+"""中继模式：多个 agent 经聚合器写入假 SeaTable，以及按机器隔离的校验"""
+import os
+import stat
+import time
+
+import pytest
+
+from fake_seatable import FakeSeaTable
+from seatable_monitor.models import TaskInfo
+from seatable_monitor.outbox import Outbox
+from seatable_monitor.relay import RelayClient, RelayError, RelayServer
+from seatable_monitor.seatable_client import SeaTableClient
+from seatable_monitor.transport import SeaTableTransport
+from seatable_monitor.writer import TaskWriter
+
+TABLE = "任务监控"
+AGENTS = 3
+
+
+def _tasks(machine: str, n: int = 5, status: str = "进行中") -> list[TaskInfo]:
+    return [
+        TaskInfo(
+            name=f"task {i}", status=status, source="claude-code", session_id="sess",
+            latest_output="", parent_name=None, machine=machine,
+        )
+        for i in range(n)
+    ]
+
+
+def _drain(writers: list[TaskWriter], timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while any(w.qsize() for w in writers) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not any(w.qsize() for w in writers)
+
+
+def _rows(fake: FakeSeaTable) -> dict[tuple[str, str], str]:
+    return {(r["机器"], r["任务名"]): r["状态"] for r in fake.tables[TABLE]["rows"].values()}
+
+
+@pytest.fixture
+def relay(tmp_path):
+    fake = FakeSeaTable().start()
+    client = SeaTableClient(
+        fake.url, "test", TABLE, transport=SeaTableTransport(rate_per_minute=1e9, burst=1000),
+    )
+    client.init()
+    aggregator = TaskWriter(client, Outbox(None), flush_interval=0.05)
+    aggregator.start()
+    server = RelayServer(f"unix://{tmp_path / 'relay.sock'}", aggregator, "secret").start()
+    yield fake, aggregator, server
+    server.stop()
+    aggregator.stop()
+    fake.stop()
+
+
+def test_agents_write_through_aggregator(relay):
+    fake, aggregator, server = relay
+    agents = [
+        TaskWriter(RelayClient(server.listen, "secret", f"node{i}"), Outbox(None), flush_interval=0)
+        for i in range(AGENTS)
+    ]
+    for w in agents:
+        w.start()
+    for i, w in enumerate(agents):
+        w.submit(_tasks(f"node{i}"))
+    _drain(agents)
+    _drain([aggregator])
+    assert len(_rows(fake)) == AGENTS * 5
+
+    # node0 只剩前 2 个任务，对账只影响 node0 的行
+    active = [["task 0", "sess"], ["task 1", "sess"]]
+    agents[0].submit_op("reconcile", "reconcile_source", "claude-code", "node0", active)
+    _drain(agents)
+    _drain([aggregator])
+    rows = _rows(fake)
+    assert [rows[("node0", f"task {i}")] for i in range(5)] == ["进行中"] * 2 + ["已结束"] * 3
+    assert all(status == "进行中" for (machine, _), status in rows.items() if machine != "node0")
+
+    # 被标记为已结束的任务原样再次出现：agent 重新发送，恢复为进行中
+    agents[0].submit(_tasks("node0"))
+    _drain(agents)
+    _drain([aggregator])
+    assert {_rows(fake)[("node0", f"task {i}")] for i in range(5)} == {"进行中"}
+    for w in agents:
+        w.stop()
+
+
+def test_rejects_rows_and_ops_for_other_machines(relay):
+    fake, aggregator, server = relay
+    victim = RelayClient(server.listen, "secret", "node0")
+    victim.upsert_tasks(_tasks("node0"))
+    _drain([aggregator])
+
+    spoofer = RelayClient(server.listen, "secret", "node1")
+    with pytest.raises(RelayError):
+        spoofer.upsert_tasks(_tasks("node1", 1) + _tasks("node0", 1, status="已完成"))
+    with pytest.raises(RelayError):
+        spoofer.reconcile_source("claude-code", "node0", [])
+    with pytest.raises(RelayError):
+        spoofer.mark_ended_sessions("tmux", [], "node0")
+    with pytest.raises(RelayError):
+        spoofer.reconcile_links("claude-code", "node0", [])
+    with pytest.raises(RelayError):
+        RelayClient(server.listen, "secret", "").upsert_tasks(_tasks(""))
+    with pytest.raises(RelayError):
+        RelayClient(server.listen, "wrong", "node0").reconcile_source("claude-code", "node0", [])
+
+    _drain([aggregator])
+    rows = _rows(fake)
+    assert len(rows) == 5  # 整批拒绝，node1 的行也没有写入
+    assert set(rows.values()) == {"进行中"}
+    victim.close()
+    spoofer.close()
+
+
+def test_refuses_public_listener_without_token():
+    writer = TaskWriter(None, Outbox(None))
+    for listen in ("tcp://0.0.0.0:0", "tcp://192.0.2.1:7480"):
+        with pytest.raises(ValueError):
+            RelayServer(listen, writer, "").start()
+    RelayServer("tcp://127.0.0.1:0", writer, "").start().stop()
+    RelayServer("tcp://0.0.0.0:0", writer, "secret").start().stop()
+
+
+def test_unix_socket_is_owner_only(relay):
+    _, _, server = relay
+    mode = os.stat(server.listen.removeprefix("unix://")).st_mode
+    assert stat.S_IMODE(mode) == 0o600
@@ -0,0 +1,39 @@
+"""tmux pane 输出中的进度解析"""
+from seatable_monitor.collectors.tmux import parse_progress
+
+
+def test_tqdm_fast_and_slow_rates():
+    assert parse_progress([" 45%|████▌     | 450/1000 [00:30<00:36, 15.00it/s]"]) == \
+        "45% 450/1000 15.00it/s ETA 00:36"
+    assert parse_progress([" 12%|█▏        | 12/100 [00:01<00:10,  8.50s/it]"]) == \
+        "12% 12/100 8.50s/it ETA 00:10"
+    assert parse_progress(["  0%|          | 0/100 [00:00<?, ?it/s]"]) == "0% 0/100 ?it/s ETA ?"
+    assert parse_progress([" 30%|███       | 3.0k/10.0k [00:10<00:23, 300.00B/s, loss=0.12]"]) == \
+        "30% 3.0k/10.0k 300.00B/s ETA 00:23"
+
+
+def test_tqdm_uses_last_refresh_on_line():
+    line = " 10%|█         | 10/100 [00:01<00:09, 9.00it/s]\r 20%|██        | 20/100 [00:02<00:08, 9.50it/s]"
+    assert parse_progress([line]) == "20% 20/100 9.50it/s ETA 00:08"
+
+
+def test_epoch_on_same_line_as_tqdm():
+    assert parse_progress(["Epoch 3/10:  45%|████▌     | 450/1000 [00:30<00:36,  1.20s/it]"]) == \
+        "epoch 3/10 45% 450/1000 1.20s/it ETA 00:36"
+
+
+def test_epoch_on_line_above_progress():
+    lines = [
+        "Epoch 2/10",
+        "loss: 0.31",
+        "Epoch 3/10",
+        " 45%|████▌     | 450/1000 [00:30<00:36, 15.00it/s]",
+    ]
+    assert parse_progress(lines) == "epoch 3/10 45% 450/1000 15.00it/s ETA 00:36"
+
+
+def test_pip_and_epoch_only():
+    assert parse_progress(["   ━━━━━━━━━━━━━ 5.2/10.0 MB 3.1 MB/s eta 0:00:02"]) == \
+        "5.2/10.0 MB 3.1 MB/s ETA 0:00:02"
+    assert parse_progress(["epoch: 7/20", "val_loss=0.2"]) == "epoch 7/20"
+    assert parse_progress(["$ ls", "README.md"]) == ""
@@ -0,0 +1,153 @@
+"""SeaTableTransport 的重试、超时、连接复用与限速，对本地 http.server 替身验证"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from seatable_monitor.transport import SeaTableTransport
+
+
+class StandIn:
+    """按路径预设响应序列的本地 HTTP 服务；记录每个请求和建立的连接数"""
+
+    def __init__(self):
+        self.script: dict[str, list[tuple[int, dict, float]]] = {}  # 路径 → [(状态码, 响应头, 延迟秒)]
+        self.requests: list[tuple[str, str]] = []
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def respond(self, path: str, *responses: tuple):
+        self.script[path] = [(r[0], r[1] if len(r) > 1 else {}, r[2] if len(r) > 2 else 0) for r in responses]
+
+    def count(self, method: str, path: str) -> int:
+        return self.requests.count((method, path))
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stand_in.lock:
+                    stand_in.connections += 1
+
+            def _reply(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                with stand_in.lock:
+                    stand_in.requests.append((self.command, self.path))
+                    script = stand_in.script.get(self.path) or [(200, {}, 0)]
+                    status, headers, delay = script.pop(0) if len(script) > 1 else script[0]
+                if delay:
+                    time.sleep(delay)
+                body = b"{}"
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    pass  # 客户端已超时断开
+
+            do_GET = do_POST = do_PUT = do_DELETE = _reply
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def server():
+    stand_in = StandIn()
+    yield stand_in
+    stand_in.server.shutdown()
+    stand_in.server.server_close()
+
+
+def _transport(**kwargs) -> SeaTableTransport:
+    options = {"rate_per_minute": 60000, "burst": 100, "backoff": 0.01, "read_timeout": 5}
+    options.update(kwargs)
+    return SeaTableTransport(**options)
+
+
+def test_429_waits_retry_after_then_succeeds(server):
+    server.respond("/rows/", (429, {"Retry-After": "0.3"}), (200,))
+    transport = _transport()
+    start = time.monotonic()
+    response = transport.post(server.url + "/rows/", json={"rows": []})
+    assert response.status_code == 200
+    assert server.count("POST", "/rows/") == 2
+    assert time.monotonic() - start >= 0.3
+    transport.close()
+
+
+def test_5xx_retried_for_idempotent_requests_only(server):
+    server.respond("/metadata/", (503,), (502,), (200,))
+    server.respond("/rows/", (503,), (200,))
+    transport = _transport()
+
+    assert transport.get(server.url + "/metadata/").status_code == 200
+    assert server.count("GET", "/metadata/") == 3
+
+    # 写请求可能已生效，5xx 不重放
+    assert transport.post(server.url + "/rows/", json={}).status_code == 503
+    assert server.count("POST", "/rows/") == 1
+    transport.close()
+
+
+def test_5xx_gives_up_after_max_retries(server):
+    server.respond("/metadata/", (500,))
+    transport = _transport(max_retries=2)
+    assert transport.get(server.url + "/metadata/").status_code == 500
+    assert server.count("GET", "/metadata/") == 3
+    transport.close()
+
+
+def test_post_not_retried_after_read_timeout(server):
+    server.respond("/rows/", (200, {}, 1))
+    server.respond("/sql", (200, {}, 1), (200,))
+    transport = _transport(read_timeout=0.2)
+
+    with pytest.raises(requests.ReadTimeout):
+        transport.post(server.url + "/rows/", json={"rows": []})
+    assert server.count("POST", "/rows/") == 1
+
+    # SQL 查询虽是 POST 但只读，可以重放
+    assert transport.post(server.url + "/sql", json={"sql": "SELECT 1"}).status_code == 200
+    assert server.count("POST", "/sql") == 2
+    transport.close()
+
+
+def test_connection_reused_across_requests(server):
+    transport = _transport()
+    for _ in range(5):
+        assert transport.get(server.url + "/metadata/").status_code == 200
+    server.respond("/rows/", (429, {"Retry-After": "0"}), (200,))
+    assert transport.put(server.url + "/rows/", json={}).status_code == 200
+    assert len(server.requests) == 7
+    assert server.connections == 1
+    transport.close()
+
+
+def test_token_bucket_paces_requests(server):
+    transport = _transport(rate_per_minute=600, burst=2)  # 10 次/秒，突发 2 次
+    start = time.monotonic()
+    for _ in range(6):
+        transport.get(server.url + "/metadata/")
+    elapsed = time.monotonic() - start
+    # 前 2 次用掉突发额度，其余 4 次每次等 0.1 秒
+    assert 0.35 <= elapsed < 2
+    transport.close()
@@ -0,0 +1,125 @@
+"""TaskWriter 与 Outbox：只落盘变化的行、对账后重新提交、outbox 上限与出错处理"""
+import pytest
+import requests
+
+from seatable_monitor.models import TaskInfo
+from seatable_monitor.outbox import Outbox
+from seatable_monitor.writer import TaskWriter
+
+
+class RecordingClient:
+    """记录调用的客户端替身；fail 为 True 时所有写入抛错（模拟断网）"""
+
+    def __init__(self, reject: str | None = None):
+        self.fail = False
+        self.reject = reject  # 含这一行的写入返回 400
+        self.upserts: list[list[TaskInfo]] = []
+        self.ops: list[tuple] = []
+
+    def upsert_tasks(self, tasks):
+        if self.fail:
+            raise requests.ConnectionError("offline")
+        if any(t.name == self.reject for t in tasks):
+            raise ConnectionError(400, "invalid value")
+        self.upserts.append(list(tasks))
+
+    def reconcile_source(self, *args):
+        if self.fail:
+            raise requests.ConnectionError("offline")
+        self.ops.append(("reconcile_source",) + args)
+
+    def refresh_auth_if_needed(self):
+        pass
+
+
+def _task(name: str, output: str = "") -> TaskInfo:
+    return TaskInfo(
+        name=name, status="进行中", source="claude-code", session_id="sess",
+        latest_output=output, parent_name=None, machine="m",
+    )
+
+
+def _reconcile(writer: TaskWriter, *names: str):
+    writer.submit_op("reconcile:claude-code:m", "reconcile_source", "claude-code", "m",
+                     [[n, "sess"] for n in names])
+
+
+def test_unchanged_rows_are_not_restaged():
+    writer = TaskWriter(RecordingClient(), Outbox(None))
+    assert writer.submit([_task("a"), _task("b")]) == 2
+    assert writer.qsize() == 2
+    writer.submit([_task("a"), _task("b", "step 2")])
+    assert [t.name for _, t in writer.outbox.peek_tasks(10)] == ["a", "b"]
+    assert writer._changed([_task("a"), _task("b", "step 2")]) == []
+
+
+def test_stale_reconcile_after_fresh_rows_restages_them():
+    client = RecordingClient()
+    writer = TaskWriter(client, Outbox(None))
+    writer.submit([_task("a")])
+    _reconcile(writer, "a")
+    assert writer._flush()
+
+    # 断网期间 a 消失一轮又出现：对账（不含 a）排在重新提交的 a 之后执行
+    client.fail = True
+    _reconcile(writer)
+    writer.submit([_task("a")])
+    assert not writer._flush()
+    client.fail = False
+    assert writer._flush()
+    assert client.ops[-1] == ("reconcile_source", "claude-code", "m", [])
+
+    # 服务端上 a 已被标记为已结束，下一轮即使内容相同也要重新写入
+    assert [t.name for t in writer._changed([_task("a")])] == ["a"]
+
+
+def test_outbox_reports_rows_evicted_for_size():
+    writer = TaskWriter(RecordingClient(), Outbox(None, max_bytes=64 * 1024))
+    writer.submit(_task(f"t{i}", "x" * 500) for i in range(400))
+    assert writer.dropped > 0
+    queued = {t.key() for _, t in writer.outbox.peek_tasks(1000)}
+    assert len(queued) + writer.dropped == 400
+    # 被挤出 outbox 的行不算已提交，下轮原样提交时重新落盘
+    restaged = writer._changed([_task(f"t{i}", "x" * 500) for i in range(400)])
+    assert {t.key() for t in restaged} == {_task(f"t{i}").key() for i in range(400)} - queued
+
+
+def test_outbox_rolls_back_failed_put():
+    outbox = Outbox(None)
+    bad = TaskInfo(
+        name="bad", status="进行中", source="tmux", session_id="s", latest_output="",
+        parent_name=None, machine="m", extra=(("col", object()),),
+    )
+    with pytest.raises(TypeError):
+        outbox.put_tasks([_task("a"), bad])
+    assert outbox.pending_rows() == 0
+    outbox.put_tasks([_task("b")])
+    assert [t.name for _, t in outbox.peek_tasks(10)] == ["b"]
+
+
+def test_rejected_row_does_not_block_the_rest():
+    client = RecordingClient(reject="bad")
+    writer = TaskWriter(client, Outbox(None), max_row_failures=2)
+    writer.submit([_task(f"t{i}") for i in range(7)] + [_task("bad")])
+    _reconcile(writer, *[f"t{i}" for i in range(7)], "bad")
+
+    assert not writer._flush()
+    assert sorted(t.name for batch in client.upserts for t in batch) == [f"t{i}" for i in range(7)]
+    assert [t.name for _, t in writer.outbox.peek_tasks(10)] == ["bad"]
+    assert not writer._flush()
+    assert writer.outbox.pending_rows() == 0
+    assert writer._flush()
+    assert client.ops  # 对账不再被挡住
+
+
+def test_outage_keeps_rows_queued():
+    client = RecordingClient()
+    client.fail = True
+    writer = TaskWriter(client, Outbox(None), max_row_failures=1)
+    writer.submit([_task(f"t{i}") for i in range(8)])
+    for _ in range(3):
+        assert not writer._flush()
+    assert writer.outbox.pending_rows() == 8
+    client.fail = False
+    assert writer._flush()
+    assert writer.outbox.pending_rows() == 0